@@ -2,15 +2,21 @@ import os
 from flask import Flask, jsonify
 from .config import get_config
 from .extensions import db, migrate, jwt, cors, bcrypt
+from .database import configure_engine_options, configure_engines
 from .models.models import User
+from .startup import StartupTimer
 
 
 def create_app() -> Flask:
+    timer = StartupTimer()
     app = Flask(__name__)
     app.config.from_object(get_config())
+    timer.mark("config")
 
     # Init extensions
+    configure_engine_options(app)
     db.init_app(app)
+    configure_engines(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     bcrypt.init_app(app)
@@ -26,12 +32,14 @@ def create_app() -> Flask:
             "origins": cors_origins,
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type"],
+            "expose_headers": ["Content-Type", "Content-Disposition", "X-Job-Id"],
         }}, 
         supports_credentials=True,
         automatic_options=True
     )
 
+    timer.mark("extensions")
+
     # JWT configuration
     @jwt.user_identity_loader
     def user_identity_lookup(user_id):
@@ -74,18 +82,39 @@ def create_app() -> Flask:
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(api_bp, url_prefix="/api")
 
-    # Create tables only if not using migrations (for backward compatibility)
-    # When using Flask-Migrate, tables should be created via migrations
+    # Autosaved evaluation drafts are written behind by a per-worker thread
+    from .evaluation_drafts import draft_buffer
+    draft_buffer.init_app(app)
+    timer.mark("routes")
+
+    # Create missing tables (for setups without migrations), skipped when the stored
+    # schema fingerprint already matches the models
     skip_table_creation = os.getenv("SKIP_TABLE_CREATION", "False").lower() == "true"
     if not skip_table_creation:
+        from .schema import ensure_schema
         with app.app_context():
-            # Only create if tables don't exist (migration-friendly)
             try:
-                db.create_all()
+                ensure_schema()
             except Exception as e:
                 # If database doesn't exist yet, that's okay - migrations will handle it
                 import logging
                 logging.warning(f"Could not create tables on startup: {e}")
+    timer.mark("schema")
+
+    # Compile the rubric/criterion index once per process
+    from .rubrics import criteria
+    with app.app_context():
+        try:
+            criteria.load()
+        except Exception as e:
+            # Tables not migrated yet: loaded on first use instead
+            import logging
+            logging.warning(f"Could not load rubrics on startup: {e}")
+    timer.mark("rubrics")
+
+    app.extensions["startup_timings"] = timer.report()
+    if app.config.get("STARTUP_TIMING_REPORT"):
+        print(timer.format())
 
     return app
 
@@ -6,6 +6,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Default to instance/dev.db relative to the api directory
 DEFAULT_DB_PATH = BASE_DIR / "instance" / "dev.db"
 
+
+def _read_only_url(database_url):
+    """Derive a read-only URL for the primary database; SQLite files are reopened with mode=ro."""
+    if database_url.startswith("sqlite:///") and ":memory:" not in database_url:
+        db_path = database_url.replace("sqlite:///", "", 1)
+        return f"sqlite:///file:{db_path}?mode=ro&uri=true"
+    if database_url.startswith("sqlite:"):
+        # In-memory databases are private to one connection, nothing to split
+        return None
+    # Server databases get their own pool on the same URL, opened in read-only transaction mode
+    return database_url
+
+
 class Config:
     # Use absolute path for SQLite to avoid path resolution issues
     db_url = os.getenv("DATABASE_URL")
@@ -29,10 +42,76 @@ class Config:
         db_path = str(DEFAULT_DB_PATH).replace("\\", "/")
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read-only engine for analytics, reports and list endpoints (a replica URL, or derived from the primary)
+    READ_ENGINE_ENABLED = os.getenv("READ_ENGINE_ENABLED", "True").lower() == "true"
+    DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or _read_only_url(SQLALCHEMY_DATABASE_URI)
+
+    # Connection pools (SQLALCHEMY_ENGINE_OPTIONS and the read bind are built from these in app.database)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Statement timeouts in ms (0 = none): default, per blueprint ("auth=5000,api=15000"), and report views
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    DB_STATEMENT_TIMEOUTS = {
+        name.strip(): int(ms)
+        for name, ms in (item.split("=", 1) for item in os.getenv("DB_STATEMENT_TIMEOUTS", "auth=5000").split(",") if "=" in item)
+    }
+    DB_REPORT_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_REPORT_STATEMENT_TIMEOUT_MS", "120000"))
+
+    # SQLite connection profile, applied to every new connection (ignored for other databases)
+    SQLITE_PROFILE_ENABLED = os.getenv("SQLITE_PROFILE_ENABLED", "True").lower() == "true"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-20000"))  # negative = KiB, so ~20MB
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "True").lower() == "true"
+    # Print per-phase create_app timings at startup
+    STARTUP_TIMING_REPORT = os.getenv("STARTUP_TIMING_REPORT", "False").lower() == "true"
     SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "dev-secret")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET", "dev-jwt-secret")
     CORS_ORIGINS = os.getenv("API_CORS_ORIGIN", "http://localhost:3000")
     GOOGLE_OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID", "")
+    # Google ID-token signing certificates, cached per Cache-Control max-age (default when absent)
+    GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+    GOOGLE_CERTS_DEFAULT_MAX_AGE = int(os.getenv("GOOGLE_CERTS_DEFAULT_MAX_AGE", "300"))
+    GOOGLE_CERTS_MIN_REFRESH = int(os.getenv("GOOGLE_CERTS_MIN_REFRESH", "30"))
+    GOOGLE_CERTS_TIMEOUT = float(os.getenv("GOOGLE_CERTS_TIMEOUT", "5"))
+    GOOGLE_TOKEN_CLOCK_SKEW = int(os.getenv("GOOGLE_TOKEN_CLOCK_SKEW", "0"))
+
+    # Reference data cache (study programs, deadlines, evaluation templates)
+    REFERENCE_CACHE_CHECK_INTERVAL = float(os.getenv("REFERENCE_CACHE_CHECK_INTERVAL", "1.0"))
+    REFERENCE_CACHE_MAX_AGE = int(os.getenv("REFERENCE_CACHE_MAX_AGE", "30"))
+    # Analytics responses share that cache; browsers revalidate them by ETag (max-age 0 by default)
+    ANALYTICS_CACHE_MAX_AGE = int(os.getenv("ANALYTICS_CACHE_MAX_AGE", "0"))
+
+    # Most entries accepted by POST /api/evaluations/batch in one request
+    EVALUATION_BATCH_MAX_ENTRIES = int(os.getenv("EVALUATION_BATCH_MAX_ENTRIES", "200"))
+
+    # Grading queue: how long /api/grading/next leases a project, and the most leased per call
+    GRADING_LEASE_SECONDS = int(os.getenv("GRADING_LEASE_SECONDS", "1800"))
+    GRADING_QUEUE_MAX_CLAIM = int(os.getenv("GRADING_QUEUE_MAX_CLAIM", "20"))
+
+    # Evaluation draft autosave: seconds between buffered writes, and buffered drafts that force an early flush
+    DRAFT_FLUSH_SECONDS = float(os.getenv("DRAFT_FLUSH_SECONDS", "5"))
+    DRAFT_BUFFER_MAX_ENTRIES = int(os.getenv("DRAFT_BUFFER_MAX_ENTRIES", "500"))
+    # How long a discarded draft's tombstone is kept (must outlast any worker's unflushed autosaves)
+    DRAFT_TOMBSTONE_SECONDS = int(os.getenv("DRAFT_TOMBSTONE_SECONDS", "3600"))
+
+    # PDF report rendering: process pool size, backlog bound and on-disk artifact cache
+    REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+    REPORT_RENDER_QUEUE_SIZE = int(os.getenv("REPORT_RENDER_QUEUE_SIZE", "8"))
+    REPORT_RENDER_QUEUE_WAIT = float(os.getenv("REPORT_RENDER_QUEUE_WAIT", "0"))
+    REPORT_RENDER_TIMEOUT = float(os.getenv("REPORT_RENDER_TIMEOUT", "60"))
+    REPORT_RENDER_START_METHOD = os.getenv("REPORT_RENDER_START_METHOD", "spawn")
+    REPORT_ARTIFACT_DIR = str(BASE_DIR / os.getenv("REPORT_ARTIFACT_DIR", "instance/report_artifacts"))
+    REPORT_ARTIFACT_MAX_BYTES = int(os.getenv("REPORT_ARTIFACT_MAX_BYTES", str(256 * 1024 * 1024)))
+    # Batch transcript exports: worker processes per job and where job progress is recorded
+    REPORT_TRANSCRIPT_WORKERS = int(os.getenv("REPORT_TRANSCRIPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    REPORT_JOB_DIR = str(BASE_DIR / os.getenv("REPORT_JOB_DIR", "instance/report_jobs"))
 
 
 def get_config() -> type[Config]:
@@ -0,0 +1,316 @@
+"""
+Engine configuration applied on top of Flask-SQLAlchemy.
+
+SQLite: every new DB-API connection gets a pragma profile through a
+SQLAlchemy ``connect`` event. WAL lets analytics reads run alongside
+evaluation writes, and busy_timeout makes writers wait for the lock
+instead of failing with "database is locked".
+
+Read routing: views decorated with ``use_read_engine()`` run their
+queries on the ``read`` bind (a read-only SQLite connection, or a
+separate read-only pool/replica for server databases), so long
+aggregates never hold the write connection or its locks.
+
+Pools and timeouts: engine options are built from the DB_* settings,
+every queue pool records checkout waits and saturation, and statements
+get a timeout chosen by blueprint (or ``statement_timeout()`` on the view).
+"""
+
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+READ_BIND = "read"
+
+SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+# VM instructions between SQLite progress-handler calls when a statement timeout is active
+SQLITE_PROGRESS_STEPS = 10000
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait and how often the pool runs dry."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._in_get = threading.local()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; only the outermost call is timed
+        if getattr(self._in_get, "active", False):
+            return super()._do_get()
+
+        self._in_get.active = True
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except sa_exc.TimeoutError:
+            with self._stats_lock:
+                self.checkout_timeouts += 1
+            raise
+        finally:
+            self._in_get.active = False
+
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.checkout_wait_total += waited
+            self.checkout_wait_max = max(self.checkout_wait_max, waited)
+        return record
+
+    def metrics(self):
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        with self._stats_lock:
+            checkouts = self.checkouts
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": checked_out,
+                "idle": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "saturation": round(checked_out / capacity, 3) if capacity else None,
+                "checkouts": checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+            }
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the read bind inside ``use_read_engine`` views."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Flushes always go to the primary, even from a read-routed view
+        if bind is None and not self._flushing and has_app_context() and g.get("db_read_only"):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_read_engine():
+    """Decorator routing the view's queries to the read-only engine."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.db_read_only = True
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def statement_timeout(config_key):
+    """Decorator giving the view the statement timeout named by ``config_key`` instead of its blueprint's."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.statement_timeout_ms = int(current_app.config.get(config_key, 0))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def current_statement_timeout():
+    """Statement timeout in ms for the current request; 0 (none) outside requests."""
+    if not has_request_context():
+        return 0
+    if "statement_timeout_ms" in g:
+        return g.statement_timeout_ms
+    config = current_app.config
+    return int(config.get("DB_STATEMENT_TIMEOUTS", {}).get(request.blueprint, config.get("DB_STATEMENT_TIMEOUT_MS", 0)))
+
+
+def _pool_options(config, url):
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # Flask-SQLAlchemy gives in-memory SQLite a StaticPool
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 10),
+    }
+    if url.get_backend_name() != "sqlite":
+        options["pool_pre_ping"] = config.get("DB_POOL_PRE_PING", True)
+        options["pool_recycle"] = config.get("DB_POOL_RECYCLE", 1800)
+    return options
+
+
+def configure_engine_options(app):
+    """Build SQLALCHEMY_ENGINE_OPTIONS and the read bind from DB_* settings. Call before ``db.init_app``."""
+    config = app.config
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **_pool_options(config, config["SQLALCHEMY_DATABASE_URI"]),
+        **config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+
+    read_url = config.get("DATABASE_READ_URL")
+    if config.get("READ_ENGINE_ENABLED", True) and read_url:
+        # String binds skip SQLALCHEMY_ENGINE_OPTIONS, so the read bind carries its own
+        binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault(READ_BIND, {"url": read_url, **_pool_options(config, read_url)})
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+def sqlite_pragmas(config, read_only=False):
+    """Build the ordered pragma list from config, validating values before they reach SQL."""
+    journal_mode = str(config.get("SQLITE_JOURNAL_MODE", "WAL")).upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Invalid SQLITE_JOURNAL_MODE: {journal_mode}")
+    synchronous = str(config.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper()
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {synchronous}")
+
+    # busy_timeout first so the journal_mode switch itself waits for other connections
+    pragmas = [("busy_timeout", int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)))]
+    if read_only:
+        # The journal mode is a property of the file, set by the primary connections
+        pragmas.append(("query_only", "ON"))
+    else:
+        pragmas += [
+            ("journal_mode", journal_mode),
+            ("synchronous", synchronous),
+        ]
+    pragmas += [
+        ("cache_size", int(config.get("SQLITE_CACHE_SIZE", -20000))),
+        ("mmap_size", int(config.get("SQLITE_MMAP_SIZE", 0))),
+        ("foreign_keys", "ON" if config.get("SQLITE_FOREIGN_KEYS", True) else "OFF"),
+    ]
+    return pragmas
+
+
+def _install_sqlite_profile(engine, pragmas):
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _install_read_only_session(engine):
+    statement = {
+        "postgresql": "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY",
+        "mysql": "SET SESSION TRANSACTION READ ONLY",
+        "mariadb": "SET SESSION TRANSACTION READ ONLY",
+    }.get(engine.dialect.name)
+    if statement is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_read_only(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+        dbapi_connection.commit()
+
+
+def _install_statement_timeout(engine):
+    dialect = engine.dialect.name
+
+    if dialect == "sqlite":
+        # SQLite has no statement timeout; a progress handler aborts the statement past its deadline
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_deadline(conn, cursor, statement, parameters, context, executemany):
+            timeout_ms = current_statement_timeout()
+            if timeout_ms:
+                deadline = time.monotonic() + timeout_ms / 1000
+                cursor.connection.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+
+        # Clear it afterwards so a later COMMIT or ROLLBACK is never interrupted
+        @event.listens_for(engine, "after_cursor_execute")
+        def clear_deadline(conn, cursor, statement, parameters, context, executemany):
+            cursor.connection.set_progress_handler(None, 0)
+
+        @event.listens_for(engine, "handle_error")
+        def clear_deadline_on_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and not connection.invalidated:
+                connection.connection.driver_connection.set_progress_handler(None, 0)
+
+    elif dialect == "postgresql":
+        # SET LOCAL lasts until the end of the transaction, so issue it once per transaction
+        @event.listens_for(engine, "before_cursor_execute")
+        def set_transaction_timeout(conn, cursor, statement, parameters, context, executemany):
+            transaction = conn.get_transaction()
+            if transaction is None or conn.info.get("statement_timeout_transaction") is transaction:
+                return
+            conn.info["statement_timeout_transaction"] = transaction
+            cursor.execute(f"SET LOCAL statement_timeout = {int(current_statement_timeout())}")
+
+    elif dialect in ("mysql", "mariadb"):
+        variable = "max_statement_time" if dialect == "mariadb" else "max_execution_time"
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def set_session_timeout(conn, cursor, statement, parameters, context, executemany):
+            timeout_ms = int(current_statement_timeout())
+            if conn.info.get("statement_timeout_ms") != timeout_ms:
+                value = timeout_ms / 1000 if dialect == "mariadb" else timeout_ms
+                cursor.execute(f"SET SESSION {variable} = {value}")
+                conn.info["statement_timeout_ms"] = timeout_ms
+
+
+def configure_engines(app):
+    """Attach per-dialect connection setup to every engine of ``app``. Call after ``db.init_app``."""
+    db = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            read_only = bind_key == READ_BIND
+            if engine.dialect.name == "sqlite":
+                if app.config.get("SQLITE_PROFILE_ENABLED", True):
+                    _install_sqlite_profile(engine, sqlite_pragmas(app.config, read_only=read_only))
+            elif read_only:
+                _install_read_only_session(engine)
+            _install_statement_timeout(engine)
+
+
+def _engine_status(engine):
+    status = {"dialect": engine.dialect.name}
+    if engine.dialect.name != "sqlite":
+        return status
+
+    with engine.connect() as connection:
+        for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "foreign_keys", "query_only"):
+            status[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    # PRAGMA synchronous reports a number
+    status["synchronous"] = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}.get(status["synchronous"], status["synchronous"])
+    status["foreign_keys"] = bool(status["foreign_keys"])
+    status["query_only"] = bool(status["query_only"])
+    return status
+
+
+def database_status():
+    """Dialect and effective connection settings of each engine, for the admin health details endpoint."""
+    db = current_app.extensions["sqlalchemy"]
+    status = _engine_status(db.engine)
+    read_engine = db.engines.get(READ_BIND)
+    status["read_engine"] = _engine_status(read_engine) if read_engine is not None else None
+    return status
+
+
+def pool_metrics():
+    """Checkout wait and saturation figures for every engine with an instrumented pool."""
+    db = current_app.extensions["sqlalchemy"]
+    metrics = {}
+    for bind_key, engine in db.engines.items():
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            metrics[bind_key or "default"] = engine.pool.metrics()
+    return metrics
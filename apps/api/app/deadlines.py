@@ -0,0 +1,108 @@
+"""
+Deadline lookups and submission lateness.
+
+Deadlines change a handful of times per term but are read on every
+submission, so they are kept in a small in-process cache. It is keyed on
+the shared ``deadlines`` version in ``cache_versions``, which every
+deadline write bumps, so all workers see a change within
+``REFERENCE_CACHE_CHECK_INTERVAL``. Lateness is stored on the project when
+a submission is written; changing a deadline recomputes it for every
+project at that level in one UPDATE.
+"""
+
+import threading
+
+from sqlalchemy import case, func, select, update, and_
+
+from app import reference_cache as refdata
+from app.extensions import db
+from app.models.models import Deadline, Project
+from app.reference_cache import reference_cache
+
+
+class DeadlineCache:
+    """In-process cache of ``{ProjectLevel: deadline datetime}``, reloaded when the deadlines version changes."""
+
+    def __init__(self):
+        self._deadlines = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, level):
+        """Return the deadline datetime for ``level``, or None if none is set."""
+        version = reference_cache.current_version(refdata.DEADLINES)
+        with self._lock:
+            # No version (cache_versions missing): read through every time
+            if self._deadlines is None or version is None or version != self._version:
+                rows = db.session.query(Deadline.level, Deadline.deadline).all()
+                self._deadlines = {row.level: row.deadline for row in rows}
+                self._version = version
+            return self._deadlines.get(level)
+
+
+deadline_cache = DeadlineCache()
+
+
+def compute_lateness(submitted_at, deadline):
+    """Return ``(is_late, late_by_seconds)`` for a submission time against a deadline."""
+    if submitted_at is None or deadline is None or submitted_at <= deadline:
+        return False, None
+    return True, int((submitted_at - deadline).total_seconds())
+
+
+def apply_submission_lateness(project):
+    """Set ``is_late``/``late_by_seconds`` on a project from its ``submitted_at``."""
+    project.is_late, project.late_by_seconds = compute_lateness(
+        project.submitted_at,
+        deadline_cache.get(project.level)
+    )
+
+
+def _seconds_between(later, earlier):
+    """Dialect-specific SQL expression for ``later - earlier`` in whole seconds, or None if there is none."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return func.cast((func.julianday(later) - func.julianday(earlier)) * 86400, db.Integer)
+    if dialect == 'postgresql':
+        return func.cast(func.extract('epoch', later - earlier), db.Integer)
+    if dialect in ('mysql', 'mariadb'):
+        return func.timestampdiff(db.text('SECOND'), earlier, later)
+    return None
+
+
+def recompute_lateness(level=None):
+    """
+    Recompute lateness for all projects (or those at ``level``) in a single UPDATE
+    against the current deadlines table. The caller commits.
+    """
+    deadline = select(Deadline.deadline).where(Deadline.level == Project.level).scalar_subquery()
+    seconds_late = _seconds_between(Project.submitted_at, deadline)
+    if seconds_late is None:
+        return _recompute_lateness_by_row(level)
+    late = and_(Project.submitted_at.isnot(None), deadline.isnot(None), Project.submitted_at > deadline)
+
+    statement = update(Project).values(
+        is_late=case((late, True), else_=False),
+        late_by_seconds=case((late, seconds_late), else_=None)
+    )
+    if level is not None:
+        statement = statement.where(Project.level == level)
+
+    return db.session.execute(statement.execution_options(synchronize_session=False)).rowcount
+
+
+def _recompute_lateness_by_row(level=None):
+    """recompute_lateness for other dialects: read the submissions, compute lateness in Python, update by id."""
+    query = select(Project.id, Project.submitted_at, Deadline.deadline).outerjoin(
+        Deadline, Deadline.level == Project.level
+    )
+    if level is not None:
+        query = query.where(Project.level == level)
+
+    rows = []
+    for project_id, submitted_at, deadline in db.session.execute(query):
+        is_late, late_by_seconds = compute_lateness(submitted_at, deadline)
+        rows.append({'id': project_id, 'is_late': is_late, 'late_by_seconds': late_by_seconds})
+    if rows:
+        db.session.execute(update(Project), rows)
+    return len(rows)
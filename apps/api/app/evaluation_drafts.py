@@ -0,0 +1,296 @@
+"""
+Write-behind buffer for autosaved evaluation drafts.
+
+The grading form autosaves every few seconds while an admin fills in a
+rubric. Writing each save to the database would put a write (and on
+SQLite, the database write lock) on every keystroke burst, so saves are
+merged into an in-process buffer keyed by (project, evaluation type,
+admin) and written to ``evaluation_drafts`` by a background thread every
+``DRAFT_FLUSH_SECONDS``. However often a draft is saved, it costs at most
+one row write per flush interval; the buffer is also flushed early when it
+holds ``DRAFT_BUFFER_MAX_ENTRIES`` drafts and when the worker exits. While
+a flush writes its batch, saves build on the batch rather than on the
+database row, which does not have it yet.
+
+Submitting the evaluation discards the submitter's draft. Discards are
+buffered the same way and written as a tombstone: a row whose document is
+JSON ``null``, stamped with the time of the discard. Tombstones are pruned
+once they are ``DRAFT_TOMBSTONE_SECONDS`` old.
+
+Each worker has its own buffer, so a draft saved through one worker is
+visible to the others after the next flush, and the database row decides
+between them: an upsert never replaces a newer row, and a buffered draft
+started before a stored tombstone is dropped rather than written, so
+another worker's pending autosave cannot bring a submitted draft back.
+``get`` reads the row as well and prefers it over an older buffered copy.
+"""
+
+import atexit
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models.models import EvaluationDraft, Project
+
+drafts = EvaluationDraft.__table__
+
+# Most criteria one draft may hold
+MAX_DRAFT_MARKS = 50
+
+# Stored document of a discarded draft
+TOMBSTONE = 'null'
+
+
+def _upsert():
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(drafts)
+        newer = drafts.c.updated_at <= statement.inserted.updated_at
+        # No WHERE on ON DUPLICATE KEY UPDATE, and the assignments apply in
+        # order: take the document before updated_at changes
+        return statement.on_duplicate_key_update([
+            ('document', func.if_(newer, statement.inserted.document, drafts.c.document)),
+            ('updated_at', func.if_(newer, statement.inserted.updated_at, drafts.c.updated_at)),
+        ])
+    if dialect not in ('postgresql', 'sqlite'):
+        raise NotImplementedError(f"Evaluation drafts do not support the {dialect} dialect")
+    statement = (postgresql if dialect == 'postgresql' else sqlite).insert(drafts)
+    return statement.on_conflict_do_update(
+        index_elements=['project_id', 'evaluation_type', 'admin_id'],
+        set_={'document': statement.excluded.document, 'updated_at': statement.excluded.updated_at},
+        # Another worker may have written a newer copy of the same draft
+        where=drafts.c.updated_at <= statement.excluded.updated_at
+    )
+
+
+def merge_marks(document, marks, comments=None, replace=False):
+    """Apply a draft update: marks are merged by criterion_name (or replace the list when ``replace``)."""
+    merged = [] if replace else [dict(mark) for mark in document.get('marks', [])]
+    by_name = {mark['criterion_name']: mark for mark in merged}
+    for mark in marks:
+        existing = by_name.get(mark['criterion_name'])
+        if existing is None:
+            existing = by_name[mark['criterion_name']] = {'criterion_name': mark['criterion_name']}
+            merged.append(existing)
+        existing.update(mark)
+    document = dict(document, marks=merged, updated_at=datetime.utcnow().isoformat())
+    if comments is not None:
+        document['comments'] = comments
+    return document
+
+
+def _updated_at(entry):
+    document, started_at = entry
+    return datetime.fromisoformat(document['updated_at']) if document is not None else started_at
+
+
+class DraftBuffer:
+    def __init__(self):
+        # (project_id, EvaluationType, admin_id) -> (draft document, or None for a discard;
+        # when the entry was started, which for a discard is the time of the discard)
+        self._pending = {}
+        # The batch the running flush is writing, until it commits
+        self._in_flight = {}
+        # Flushes finished, so a save can tell its database read may predate one
+        self._flushes = 0
+        self._pruned_at = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        atexit.register(self.flush)
+
+    def _load(self, key):
+        """``(project exists, stored document or None, stored updated_at or None)`` in one query"""
+        project_id, evaluation_type, admin_id = key
+        row = db.session.execute(
+            select(Project.id, drafts.c.document, drafts.c.updated_at)
+            .outerjoin(drafts, and_(
+                drafts.c.project_id == Project.id,
+                drafts.c.evaluation_type == evaluation_type,
+                drafts.c.admin_id == admin_id
+            ))
+            .where(Project.id == project_id)
+        ).first()
+        if row is None:
+            return False, None, None
+        return True, json.loads(row.document) if row.document else None, row.updated_at
+
+    def _buffered(self, key):
+        # Call with the lock held
+        return self._pending.get(key) or self._in_flight.get(key)
+
+    def get(self, key):
+        """The current draft for ``key``, buffered or stored, or None."""
+        with self._lock:
+            entry = self._buffered(key)
+        _, stored, stored_at = self._load(key)
+        if entry is None:
+            return stored
+        if stored_at is None or stored_at <= _updated_at(entry):
+            return dict(entry[0]) if entry[0] is not None else None
+
+        # Another worker wrote a newer copy or discarded the draft: this one would lose the flush anyway
+        with self._lock:
+            if self._pending.get(key) is entry:
+                del self._pending[key]
+        return stored
+
+    def save(self, key, marks, comments=None, replace=False):
+        """
+        Merge an update into the draft for ``key`` and buffer it. Returns the
+        merged draft, or None if the project does not exist.
+        """
+        while True:
+            started_at = datetime.utcnow()
+            with self._lock:
+                buffered = self._buffered(key) is not None
+                flushes = self._flushes
+            base = None
+            if not buffered:
+                # First save since the last flush: start from the stored copy
+                exists, base, _ = self._load(key)
+                if not exists:
+                    return None
+
+            with self._lock:
+                entry = self._buffered(key)
+                if entry is None and self._flushes != flushes:
+                    continue  # A flush committed while we read: the stored copy may be older than it
+                if entry is not None:
+                    current, started_at = entry
+                else:
+                    current = base
+                document = merge_marks(current or {}, marks, comments, replace)
+                self._pending[key] = (document, started_at)
+                full = len(self._pending) >= self._app.config.get("DRAFT_BUFFER_MAX_ENTRIES", 500)
+                break
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+        return dict(document)
+
+    def discard(self, *keys):
+        """Drop drafts (e.g. once their evaluation is submitted); tombstoned in the database in the next flush."""
+        now = datetime.utcnow()
+        with self._lock:
+            for key in keys:
+                self._pending[key] = (None, now)
+        if keys:
+            self._ensure_flusher()
+
+    def flush(self):
+        """Write every buffered draft and discard now. Returns the number of drafts written."""
+        if self._app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._in_flight = pending
+            if not pending:
+                return 0
+            try:
+                return self._flush(pending)
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+                    self._flushes += 1
+
+    def _flush(self, pending):
+        with self._app.app_context():
+            try:
+                written = self._write(pending)
+                self._prune()
+            except IntegrityError:
+                # A draft's project was deleted meanwhile: write one at a time and drop the bad ones
+                db.session.rollback()
+                written = 0
+                for key, entry in pending.items():
+                    try:
+                        written += self._write({key: entry})
+                    except IntegrityError:
+                        db.session.rollback()
+                        print(f"Warning: Dropping draft for missing project {key[0]}")
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                print(f"Warning: Could not write {len(pending)} evaluation drafts, will retry: {e}")
+                with self._lock:
+                    for key, entry in pending.items():
+                        # Keep anything saved since the swap
+                        self._pending.setdefault(key, entry)
+                return 0
+        return written
+
+    def _write(self, pending):
+        """Upsert ``pending`` in one transaction; returns the number of drafts (not tombstones) written"""
+        # Drafts started before a tombstone was stored were edited from the discarded copy
+        discarded_at = {
+            (row.project_id, row.evaluation_type, row.admin_id): row.updated_at
+            for row in db.session.execute(
+                select(drafts.c.project_id, drafts.c.evaluation_type, drafts.c.admin_id, drafts.c.updated_at)
+                .where(
+                    tuple_(drafts.c.project_id, drafts.c.evaluation_type, drafts.c.admin_id).in_(list(pending)),
+                    drafts.c.document == TOMBSTONE
+                )
+            )
+        }
+        rows = []
+        for key, (document, started_at) in pending.items():
+            if document is not None and key in discarded_at and discarded_at[key] > started_at:
+                continue
+            rows.append({
+                'project_id': key[0],
+                'evaluation_type': key[1],
+                'admin_id': key[2],
+                'document': json.dumps(document) if document is not None else TOMBSTONE,
+                'updated_at': _updated_at((document, started_at))
+            })
+        if rows:
+            db.session.execute(_upsert(), rows)
+        db.session.commit()
+        return sum(1 for row in rows if row['document'] != TOMBSTONE)
+
+    def _prune(self):
+        """Delete old tombstones, at most once per DRAFT_TOMBSTONE_SECONDS"""
+        now = datetime.utcnow()
+        keep = timedelta(seconds=self._app.config.get("DRAFT_TOMBSTONE_SECONDS", 3600))
+        if self._pruned_at is not None and now - self._pruned_at < keep:
+            return
+        self._pruned_at = now
+        db.session.execute(delete(drafts).where(drafts.c.document == TOMBSTONE, drafts.c.updated_at < now - keep))
+        db.session.commit()
+
+    def _ensure_flusher(self):
+        # Started on first use in each worker; threads do not survive a fork
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._run, name="evaluation-draft-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        interval = self._app.config.get("DRAFT_FLUSH_SECONDS", 5)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: Evaluation draft flush failed: {e}")
+
+
+draft_buffer = DraftBuffer()
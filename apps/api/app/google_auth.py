@@ -0,0 +1,130 @@
+"""
+Google ID-token verification with an in-process certificate cache.
+
+google.oauth2.id_token.verify_oauth2_token downloads Google's signing
+certificates on every call. Here the certificates are fetched over one
+reused HTTP session and kept until their Cache-Control max-age runs out,
+and tokens are checked against the cached copy with google.auth.jwt.decode,
+so a login costs no network round trip. A token signed with a key id we
+have not seen yet (Google rotated keys) triggers an early refresh, at most
+once per GOOGLE_CERTS_MIN_REFRESH seconds.
+"""
+
+import re
+import threading
+import time
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class GoogleCertsUnavailable(Exception):
+    """Raised when the signing certificates cannot be fetched and none are cached."""
+
+
+def _max_age(headers, default):
+    """Seconds the response may be cached for, from Cache-Control max-age minus Age."""
+    cache_control = headers.get("Cache-Control") or ""
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    if not match:
+        return default
+    try:
+        age = int(headers.get("Age") or 0)
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens against a cached copy of the signing certificates."""
+
+    def __init__(self, certs_url=GOOGLE_CERTS_URL, default_max_age=300, min_refresh=30, timeout=5):
+        self.certs_url = certs_url
+        self.default_max_age = default_max_age
+        self.min_refresh = min_refresh
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._session = None
+        self._certs = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self.fetches = 0
+
+    def _fetch(self):
+        # Deferred like the rest of the Google sign-in path
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+        try:
+            response = self._session.get(self.certs_url, timeout=self.timeout)
+            response.raise_for_status()
+            certs = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GoogleCertsUnavailable(f"Could not fetch certificates from {self.certs_url}: {e}")
+
+        self.fetches += 1
+        now = time.monotonic()
+        self._certs = certs
+        self._fetched_at = now
+        self._expires_at = now + _max_age(response.headers, self.default_max_age)
+
+    def _get_certs(self, key_id=None):
+        now = time.monotonic()
+        if now < self._expires_at and (key_id is None or key_id in self._certs):
+            return self._certs
+
+        with self._lock:
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            unknown_key = key_id is not None and key_id not in self._certs
+            if expired or (unknown_key and now - self._fetched_at >= self.min_refresh):
+                try:
+                    self._fetch()
+                except GoogleCertsUnavailable:
+                    if not self._certs:
+                        raise
+                    # Keep serving from stale certificates, retrying after a back-off
+                    self._expires_at = now + self.min_refresh
+            return self._certs
+
+    def verify(self, token, audience, clock_skew_in_seconds=0):
+        """Return the token's claims, or raise ValueError if it is not a valid Google ID token."""
+        from google.auth import jwt
+
+        # Signature, expiry and audience are checked by google.auth; the key id
+        # is read first only to refresh the certificates when Google rotated them
+        key_id = jwt.decode_header(token).get("kid")
+        payload = jwt.decode(
+            token,
+            certs=self._get_certs(key_id),
+            audience=audience,
+            clock_skew_in_seconds=clock_skew_in_seconds,
+        )
+        if payload.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer {payload.get('iss')}")
+        return payload
+
+
+_verifiers = {}
+_init_lock = threading.Lock()
+
+
+def get_google_verifier(config):
+    """Process-wide verifier for the configured certificate URL."""
+    certs_url = config.get("GOOGLE_CERTS_URL") or GOOGLE_CERTS_URL
+    with _init_lock:
+        verifier = _verifiers.get(certs_url)
+        if verifier is None:
+            verifier = GoogleTokenVerifier(
+                certs_url,
+                default_max_age=config.get("GOOGLE_CERTS_DEFAULT_MAX_AGE", 300),
+                min_refresh=config.get("GOOGLE_CERTS_MIN_REFRESH", 30),
+                timeout=config.get("GOOGLE_CERTS_TIMEOUT", 5),
+            )
+            _verifiers[certs_url] = verifier
+    return verifier
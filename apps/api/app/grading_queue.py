@@ -0,0 +1,157 @@
+"""
+Grading work queue.
+
+GET /api/grading/next hands each admin the oldest submitted projects still
+missing an evaluation of the requested type, and leases them so no other
+admin is handed the same ones until the lease expires or is released.
+
+Claiming first renews the caller's own live leases, oldest first, and
+releases any beyond the number asked for, so a smaller claim never leaves
+projects leased to someone who was not handed them. The rest is filled by
+a single INSERT ... SELECT upsert into ``grading_leases``: the SELECT walks
+the partial index of projects waiting for grading, skipping evaluated ones
+and those under a live lease, and the ON CONFLICT update only takes over a
+lease that has expired or is already the caller's. Two admins claiming at
+once therefore never get the same project; the later one just gets fewer.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, delete, func, literal, or_, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.extensions import db
+from app.models.models import Evaluation, GradingLease, Project, ProjectStatus, Student, StudyProgram, User
+
+leases = GradingLease.__table__
+
+# Projects that can still be missing an evaluation (matches ix_projects_grading_queue)
+QUEUE_STATUSES = (ProjectStatus.SUBMITTED, ProjectStatus.UNDER_REVIEW)
+
+
+def _in_queue():
+    # Rendered as literals: the planner only uses the partial index when the
+    # query repeats its predicate, which bound parameters cannot prove
+    return Project.status.in_(bindparam('queue_statuses', list(QUEUE_STATUSES), expanding=True, literal_execute=True))
+
+
+def _claim_upsert(candidates, admin_id, now):
+    """INSERT ``candidates`` into grading_leases, taking over only expired leases or the caller's own"""
+    columns = ['project_id', 'evaluation_type', 'admin_id', 'leased_until', 'created_at']
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(leases).from_select(columns, candidates)
+        takeover = or_(leases.c.leased_until <= now, leases.c.admin_id == admin_id)
+        # No WHERE on ON DUPLICATE KEY UPDATE, and the assignments apply in
+        # order: admin_id follows leased_until, which only changed on a takeover
+        return statement.on_duplicate_key_update([
+            ('leased_until', func.if_(takeover, statement.inserted.leased_until, leases.c.leased_until)),
+            ('admin_id', func.if_(
+                leases.c.leased_until == statement.inserted.leased_until, statement.inserted.admin_id, leases.c.admin_id
+            )),
+        ])
+    if dialect not in ('postgresql', 'sqlite'):
+        raise NotImplementedError(f"The grading queue does not support the {dialect} dialect")
+    statement = (postgresql if dialect == 'postgresql' else sqlite).insert(leases).from_select(columns, candidates)
+    return statement.on_conflict_do_update(
+        index_elements=['project_id', 'evaluation_type'],
+        set_={'admin_id': statement.excluded.admin_id, 'leased_until': statement.excluded.leased_until},
+        # Another admin may have claimed the project since the SELECT ran
+        where=or_(leases.c.leased_until <= now, leases.c.admin_id == admin_id)
+    )
+
+
+def claim(admin_id, evaluation_type, count, lease_seconds, now=None):
+    """
+    Lease up to ``count`` projects needing an ``evaluation_type`` evaluation to
+    ``admin_id`` and return them, oldest submission first. The caller's own
+    live leases take precedence over new projects: up to ``count`` of them
+    are renewed and handed back, and the rest are released so other admins
+    can be handed them.
+    """
+    now = now or datetime.utcnow()
+    leased_until = now + timedelta(seconds=lease_seconds)
+
+    evaluated = select(Evaluation.id).where(
+        Evaluation.project_id == Project.id,
+        Evaluation.evaluation_type == evaluation_type
+    ).exists()
+    mine = leases.c.admin_id == admin_id
+    live = and_(leases.c.evaluation_type == evaluation_type, leases.c.leased_until > now)
+
+    # The caller's live leases still waiting for grading, oldest first
+    kept = db.session.execute(
+        select(leases.c.project_id)
+        .join(Project, Project.id == leases.c.project_id)
+        .where(mine, live, _in_queue(), ~evaluated)
+        .order_by(Project.submitted_at, Project.id)
+        .limit(count)
+    ).scalars().all()
+    db.session.execute(delete(leases).where(mine, live, leases.c.project_id.not_in(kept)))
+    if kept:
+        db.session.execute(
+            update(leases).where(mine, live, leases.c.project_id.in_(kept)).values(leased_until=leased_until)
+        )
+
+    held = select(leases.c.project_id).where(
+        leases.c.project_id == Project.id,
+        leases.c.evaluation_type == evaluation_type,
+        leases.c.leased_until > now
+    ).exists()
+    candidates = select(
+        Project.id,
+        literal(evaluation_type, leases.c.evaluation_type.type),
+        literal(admin_id),
+        literal(leased_until, leases.c.leased_until.type),
+        literal(now, leases.c.created_at.type)
+    ).where(
+        _in_queue(),
+        ~evaluated,
+        ~held
+    ).order_by(Project.submitted_at, Project.id).limit(count - len(kept))
+
+    # Expired leases are only kept until the next claim
+    db.session.execute(delete(leases).where(leases.c.leased_until <= now))
+    if len(kept) < count:
+        db.session.execute(_claim_upsert(candidates, admin_id, now))
+
+    rows = db.session.execute(
+        select(
+            Project.id, Project.title, Project.level, Project.submitted_at, Project.is_late,
+            StudyProgram.name.label('study_program_name'), User.name.label('student_name')
+        )
+        .join(leases, leases.c.project_id == Project.id)
+        .outerjoin(StudyProgram, StudyProgram.id == Project.study_program_id)
+        .outerjoin(Student, Student.id == Project.student_id)
+        .outerjoin(User, User.id == Student.user_id)
+        .where(
+            leases.c.evaluation_type == evaluation_type,
+            leases.c.admin_id == admin_id,
+            leases.c.leased_until == leased_until
+        )
+        .order_by(Project.submitted_at, Project.id)
+    ).all()
+    db.session.commit()
+
+    return leased_until, [{
+        'id': row.id,
+        'title': row.title,
+        'level': row.level.value,
+        'study_program_name': row.study_program_name,
+        'student_name': row.student_name,
+        'submitted_at': row.submitted_at.isoformat() if row.submitted_at else None,
+        'is_late': bool(row.is_late),
+    } for row in rows]
+
+
+def release(admin_id, project_id, evaluation_type):
+    """Give back ``admin_id``'s lease on a project; returns False if they held none."""
+    released = db.session.execute(
+        delete(leases).where(
+            leases.c.project_id == project_id,
+            leases.c.evaluation_type == evaluation_type,
+            leases.c.admin_id == admin_id
+        )
+    ).rowcount
+    db.session.commit()
+    return bool(released)
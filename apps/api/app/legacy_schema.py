@@ -0,0 +1,201 @@
+"""
+Upgrade for databases that are not managed by Alembic.
+
+Databases created with ``db.create_all()`` (the original container
+entrypoint, or ensure_schema at startup) have no ``alembic_version``
+table, and create_all never adds columns, indexes or data to tables that
+already exist. ``upgrade_unmanaged()`` brings such a database up to the
+models: it creates the missing tables, then runs every step below whose
+change is not there yet, then creates missing indexes. Each step checks
+before it changes anything, so the upgrade is safe to repeat and works on
+databases left at any point in between.
+
+The steps mirror the Alembic revisions that change existing tables, but
+alter tables in place (plain ALTER TABLE) instead of the batch mode's
+table copy, which SQLite refuses while foreign keys are enforced. On
+SQLite that leaves out what only a table copy can add: evaluation_marks
+.criterion_id stays nullable and without its foreign key there.
+boot.py stamps the database at the Alembic head afterwards, so later
+changes reach it through the migrations; comprehensive_migration_script.py
+runs the same upgrade.
+"""
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from app.extensions import db
+from app.rubrics import DEFAULT_RUBRICS
+
+
+def _columns(connection, table):
+    return {column['name'] for column in sa.inspect(connection).get_columns(table)}
+
+
+def _add_project_lateness(op, connection):
+    """Revision a1f3c9d2e7b4: projects.is_late and late_by_seconds, backfilled from the deadlines."""
+    if 'is_late' in _columns(connection, 'projects'):
+        return
+    print("Adding projects.is_late and projects.late_by_seconds...")
+    op.add_column('projects', sa.Column('is_late', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('projects', sa.Column('late_by_seconds', sa.Integer(), nullable=True))
+
+    if connection.dialect.name == 'sqlite':
+        seconds = "CAST((julianday(projects.submitted_at) - julianday(d.deadline)) * 86400 AS INTEGER)"
+    else:
+        seconds = "CAST(EXTRACT(EPOCH FROM projects.submitted_at - d.deadline) AS INTEGER)"
+    connection.execute(sa.text(f"""
+        UPDATE projects SET late_by_seconds = (
+            SELECT {seconds} FROM deadlines d
+            WHERE d.level = projects.level AND projects.submitted_at > d.deadline
+        )
+    """))
+    connection.execute(sa.text("UPDATE projects SET is_late = (late_by_seconds IS NOT NULL)"))
+
+
+def _backfill_project_status_events(op, connection):
+    """Revision e5b8c1d7f3a9: status events for projects that have none (changed before events were recorded)."""
+    project_ids = connection.execute(sa.text("""
+        SELECT id FROM projects p
+        WHERE (p.submitted_at IS NOT NULL OR p.status = 'rejected')
+          AND NOT EXISTS (SELECT 1 FROM project_status_events e WHERE e.project_id = p.id)
+    """)).scalars().all()
+    if not project_ids:
+        return
+    print(f"Backfilling status events for {len(project_ids)} projects...")
+    for statement in (
+        """
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT id, 'draft', 'submitted', submitted_at FROM projects
+        WHERE submitted_at IS NOT NULL AND id IN :ids
+        """,
+        """
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT project_id, 'submitted', 'under_review', MIN(created_at) FROM evaluations
+        WHERE project_id IN :ids
+        GROUP BY project_id
+        """,
+        """
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT project_id, 'under_review', 'evaluated', MAX(created_at) FROM evaluations
+        WHERE project_id IN :ids
+        GROUP BY project_id
+        HAVING COUNT(DISTINCT evaluation_type) = 2
+        """,
+        """
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT id, NULL, 'rejected', COALESCE(updated_at, created_at) FROM projects
+        WHERE status = 'rejected' AND id IN :ids
+        """,
+    ):
+        connection.execute(
+            sa.text(statement).bindparams(sa.bindparam('ids', expanding=True)),
+            {'ids': project_ids}
+        )
+
+
+def _add_evaluation_version(op, connection):
+    """Revision f7c2a9e4b8d1: evaluations.version, which every Evaluation UPDATE checks and bumps."""
+    if 'version' in _columns(connection, 'evaluations'):
+        return
+    print("Adding evaluations.version...")
+    op.add_column('evaluations', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def _add_mark_criteria(op, connection):
+    """Revision c6f1a3d8e2b5: rubrics and criteria; evaluation_marks.criterion_name replaced by criterion_id."""
+    columns = _columns(connection, 'evaluation_marks')
+    if 'criterion_name' not in columns:
+        return
+    print("Moving evaluation mark criterion names to criteria...")
+
+    # Template rubrics and criteria, unless the criterion index already seeded them
+    for rubric in DEFAULT_RUBRICS:
+        connection.execute(sa.text("""
+            INSERT INTO rubrics (key, name, description, evaluation_type, created_at)
+            SELECT :key, :name, :description, :evaluation_type, CURRENT_TIMESTAMP
+            WHERE NOT EXISTS (SELECT 1 FROM rubrics WHERE key = :key)
+        """), {
+            'key': rubric['key'], 'name': rubric['name'], 'description': rubric['description'],
+            'evaluation_type': rubric['evaluation_type'].name
+        })
+        for position, (name, max_score, description, field) in enumerate(rubric['criteria']):
+            connection.execute(sa.text("""
+                INSERT INTO criteria (rubric_id, name, key, max_score, description, field, position, in_template, created_at)
+                SELECT r.id, :name, :key, :max_score, :description, :field, :position, :in_template, CURRENT_TIMESTAMP
+                FROM rubrics r WHERE r.key = :rubric
+                  AND NOT EXISTS (SELECT 1 FROM criteria c WHERE c.rubric_id = r.id AND c.key = :key)
+            """), {
+                'name': name, 'key': name.lower(), 'max_score': max_score, 'description': description,
+                'field': field, 'position': position, 'in_template': True, 'rubric': rubric['key']
+            })
+
+    # Every other criterion name graders have used
+    connection.execute(sa.text("""
+        INSERT INTO criteria (rubric_id, name, key, in_template, created_at)
+        SELECT r.id, MIN(TRIM(m.criterion_name)), LOWER(TRIM(m.criterion_name)), :in_template, CURRENT_TIMESTAMP
+        FROM evaluation_marks m
+        JOIN evaluations e ON e.id = m.evaluation_id
+        JOIN rubrics r ON r.evaluation_type = e.evaluation_type
+        WHERE NOT EXISTS (
+            SELECT 1 FROM criteria c WHERE c.rubric_id = r.id AND c.key = LOWER(TRIM(m.criterion_name))
+        )
+        GROUP BY r.id, LOWER(TRIM(m.criterion_name))
+    """), {'in_template': False})
+    connection.execute(sa.text("""
+        UPDATE criteria SET field = CASE
+            WHEN rubric_id = (SELECT id FROM rubrics WHERE key = 'project') THEN CASE
+                WHEN key LIKE '%code quality%' THEN 'code_quality'
+                WHEN key LIKE '%documentation%' THEN 'documentation_score'
+                WHEN key LIKE '%functionality%' THEN 'functionality_score'
+            END
+            ELSE CASE
+                WHEN key LIKE '%clarity%' OR key LIKE '%communication%' THEN 'clarity_communication'
+                WHEN key LIKE '%visual%' OR key LIKE '%presentation%' THEN 'visual_presentation'
+                WHEN key LIKE '%technical%' OR key LIKE '%explanation%' THEN 'technical_explanation'
+            END
+        END
+        WHERE NOT in_template AND field IS NULL
+    """))
+
+    # Point marks at their criteria
+    if 'criterion_id' not in columns:
+        op.add_column('evaluation_marks', sa.Column('criterion_id', sa.Integer(), nullable=True))
+    connection.execute(sa.text("""
+        UPDATE evaluation_marks SET criterion_id = (
+            SELECT c.id FROM criteria c
+            JOIN rubrics r ON r.id = c.rubric_id
+            JOIN evaluations e ON e.evaluation_type = r.evaluation_type
+            WHERE e.id = evaluation_marks.evaluation_id
+              AND c.key = LOWER(TRIM(evaluation_marks.criterion_name))
+        )
+        WHERE criterion_id IS NULL
+    """))
+    if connection.dialect.name != 'sqlite':
+        op.alter_column('evaluation_marks', 'criterion_id', existing_type=sa.Integer(), nullable=False)
+        op.create_foreign_key('fk_evaluation_marks_criterion_id', 'evaluation_marks', 'criteria', ['criterion_id'], ['id'])
+    op.drop_column('evaluation_marks', 'criterion_name')
+
+
+# In revision order
+STEPS = [
+    _add_project_lateness,
+    _backfill_project_status_events,
+    _add_evaluation_version,
+    _add_mark_criteria,
+]
+
+
+def upgrade_unmanaged():
+    """Bring a database created with db.create_all() up to the current models (in an app context)."""
+    db.create_all()
+    engine = db.engine
+    for step in STEPS:
+        with engine.begin() as connection:
+            step(Operations(MigrationContext.configure(connection)), connection)
+
+    # create_all only indexes the tables it creates
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
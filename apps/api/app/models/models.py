@@ -159,11 +159,29 @@ class Project(db.Model):
     pdf_path = db.Column(db.String(500), nullable=True)
     submitted_at = db.Column(db.DateTime, nullable=True)
     
+    # Lateness against the level deadline, recorded when the submission is written
+    # and recomputed in bulk when a deadline changes
+    is_late = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    late_by_seconds = db.Column(db.Integer, nullable=True)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     evaluations = db.relationship('Evaluation', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    status_events = db.relationship('ProjectStatusEvent', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    grading_leases = db.relationship('GradingLease', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    evaluation_drafts = db.relationship('EvaluationDraft', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_projects_level_is_late', 'level', 'is_late'),
+        # Grading queue: only projects waiting for an evaluation, in submission order
+        db.Index(
+            'ix_projects_grading_queue', 'submitted_at', 'id',
+            sqlite_where=db.text("status IN ('submitted', 'under_review')"),
+            postgresql_where=db.text("status IN ('submitted', 'under_review')")
+        ),
+    )
     
     @property
     def status_value(self):
@@ -197,11 +215,47 @@ class Project(db.Model):
             'documentation_link': self.documentation_link,
             'pdf_path': self.pdf_path,
             'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'is_late': bool(self.is_late),
+            'late_by_seconds': self.late_by_seconds,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'evaluation_count': self.evaluations.count()
         }
 
+class ProjectStatusEvent(db.Model):
+    """Append-only log of project status changes, written by update_project_status"""
+    __tablename__ = 'project_status_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    from_status = db.Column(db.Enum(ProjectStatus, values_callable=lambda x: [e.value for e in x]), nullable=True)
+    to_status = db.Column(db.Enum(ProjectStatus, values_callable=lambda x: [e.value for e in x]), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_project_status_events_project_created', 'project_id', 'created_at'),)
+
+class GradingLease(db.Model):
+    """An admin's claim on grading one evaluation type of a project, handed out by /api/grading/next"""
+    __tablename__ = 'grading_leases'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True)
+    evaluation_type = db.Column(db.Enum(EvaluationType), primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    leased_until = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_grading_leases_leased_until', 'leased_until'),)
+
+class EvaluationDraft(db.Model):
+    """Autosaved, unsubmitted marks of one admin for one evaluation type of a project"""
+    __tablename__ = 'evaluation_drafts'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True)
+    evaluation_type = db.Column(db.Enum(EvaluationType), primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    document = db.Column(db.Text, nullable=False)  # JSON: {"marks": [...], "comments": ..., "updated_at": ...}
+    updated_at = db.Column(db.DateTime, nullable=False)
+
 class Evaluation(db.Model):
     __tablename__ = 'evaluations'
     
@@ -233,11 +287,15 @@ class Evaluation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Bumped on every UPDATE; a stale version makes the UPDATE match no row (StaleDataError)
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    
     # Relationships
     marks = db.relationship('EvaluationMark', backref='evaluation', lazy='dynamic', cascade='all, delete-orphan')
     
     # Unique constraint: one evaluation of each type per project
     __table_args__ = (db.UniqueConstraint('project_id', 'evaluation_type', name='unique_project_evaluation_type'),)
+    __mapper_args__ = {'version_id_col': version}
     
     def calculate_total_score(self):
         """Calculate total score as percentage"""
@@ -252,12 +310,16 @@ class Evaluation(db.Model):
         
         return round((total_score / total_max_score) * 100, 2)
     
-    def to_dict(self):
+    def to_dict(self, marks=None):
+        # Marks may be passed in when the caller already has them loaded
+        if marks is None:
+            marks = self.marks.all()
+        
         # Calculate total_score from actual marks (sum of scores / sum of max scores) * 100
         calculated_total_score = self.total_score  # Default to stored value
-        if self.marks.count() > 0:
-            total_score = sum(mark.score for mark in self.marks)
-            total_max_score = sum(mark.max_score for mark in self.marks)
+        if marks:
+            total_score = sum(mark.score for mark in marks)
+            total_max_score = sum(mark.max_score for mark in marks)
             if total_max_score > 0:
                 calculated_total_score = round((total_score / total_max_score) * 100, 2)
         
@@ -285,25 +347,65 @@ class Evaluation(db.Model):
             'grade': self.grade,
             
             'comments': self.comments,
+            'version': self.version,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'marks': [mark.to_dict() for mark in self.marks]
+            'marks': [mark.to_dict() for mark in marks]
         }
 
+class Rubric(db.Model):
+    """Marking scheme for one evaluation type; its template criteria make up the evaluation template"""
+    __tablename__ = 'rubrics'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), nullable=False, unique=True)  # e.g. 'project'
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    evaluation_type = db.Column(db.Enum(EvaluationType), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    criteria = db.relationship('Criterion', backref='rubric', lazy='dynamic')
+
+class Criterion(db.Model):
+    """A criterion marks can be given against. Names graders typed that are not in the template are added with in_template false."""
+    __tablename__ = 'criteria'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rubric_id = db.Column(db.Integer, db.ForeignKey('rubrics.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    key = db.Column(db.String(100), nullable=False)  # Lowercased, trimmed name used for lookups
+    max_score = db.Column(db.Float, nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    # Evaluation column this criterion's score is added to (e.g. 'code_quality'), if any
+    field = db.Column(db.String(50), nullable=True)
+    position = db.Column(db.Integer, nullable=True)
+    in_template = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('rubric_id', 'key', name='uq_criteria_rubric_key'),)
+
 class EvaluationMark(db.Model):
     __tablename__ = 'evaluation_marks'
     
     id = db.Column(db.Integer, primary_key=True)
     evaluation_id = db.Column(db.Integer, db.ForeignKey('evaluations.id'), nullable=False)
-    criterion_name = db.Column(db.String(100), nullable=False)
+    criterion_id = db.Column(db.Integer, db.ForeignKey('criteria.id'), nullable=False)
     max_score = db.Column(db.Float, nullable=False)
     score = db.Column(db.Float, nullable=False, default=0.0)
     comments = db.Column(db.Text, nullable=True)
     
+    @property
+    def criterion_name(self):
+        """Criterion name from the in-process criterion cache (no query)"""
+        from app.rubrics import criteria
+        criterion = criteria.by_id(self.criterion_id)
+        return criterion.name if criterion else None
+    
     def to_dict(self):
         return {
             'id': self.id,
             'evaluation_id': self.evaluation_id,
+            'criterion_id': self.criterion_id,
             'criterion_name': self.criterion_name,
             'max_score': self.max_score,
             'score': self.score,
@@ -369,4 +471,33 @@ class Notification(db.Model):
             'actionUrl': self.action_url,
             'audience': self.audience.value if self.audience else None,
             'userId': self.user_id
-        }
\ No newline at end of file
+        }
+
+
+class CacheVersion(db.Model):
+    """Version counter per cached data set, bumped by writers so every worker sees invalidations"""
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SchemaState(db.Model):
+    """Fingerprint of what was last applied to this database (model schema, seed data)"""
+    __tablename__ = 'schema_state'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class StudentDashboard(db.Model):
+    """Precomputed student dashboard document (read model), cleared by writes to the data it shows"""
+    __tablename__ = 'student_dashboards'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    document = db.Column(db.Text, nullable=True)
+    etag = db.Column(db.String(40), nullable=True)
+    built_at = db.Column(db.DateTime, nullable=True)
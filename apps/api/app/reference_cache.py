@@ -0,0 +1,170 @@
+"""
+In-process cache for nearly static reference data.
+
+Study programs, deadlines and evaluation templates are served from
+preserialized JSON bytes. Each data set has a row in ``cache_versions``;
+write endpoints bump it in the same transaction as their change, and every
+worker compares its cached version against that row (at most once per
+``REFERENCE_CACHE_CHECK_INTERVAL`` seconds) before serving, so caches stay
+coherent across processes.
+
+Analytics responses use the same mechanism under one ``analytics`` version.
+They depend on too many write paths for explicit bumps, so ``track()``
+notes in a flush hook when projects, evaluations, marks or study programs
+change and bumps the version once the writer has committed, in its own
+short transaction. Bumping inside the writer's transaction would hold the
+row lock on ``cache_versions`` until commit and serialize every grader on
+it. A worker may serve the previous analytics for the moment between the
+commit and the bump.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, current_app, request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models.models import CacheVersion, Project, Evaluation, EvaluationMark, StudyProgram
+
+STUDY_PROGRAMS = 'study_programs'
+DEADLINES = 'deadlines'
+EVALUATION_TEMPLATES = 'evaluation_templates'
+ANALYTICS = 'analytics'
+
+
+class ReferenceDataCache:
+    def __init__(self):
+        # (name, key) -> (version, body bytes, etag)
+        self._entries = {}
+        # name -> (version, monotonic time it was read)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def current_version(self, name):
+        """Version of ``name`` from the database, re-read at most once per check interval."""
+        interval = current_app.config.get("REFERENCE_CACHE_CHECK_INTERVAL", 1.0)
+        now = time.monotonic()
+        with self._lock:
+            known = self._versions.get(name)
+        if known and now - known[1] < interval:
+            return known[0]
+
+        # On a connection of its own: this runs in the middle of writes (e.g. a
+        # submission reading deadlines), whose transaction a failure here must not end
+        try:
+            with db.engine.connect() as connection:
+                version = connection.execute(
+                    select(CacheVersion.version).where(CacheVersion.name == name)
+                ).scalar() or 0
+        except SQLAlchemyError:
+            # Table not created yet (e.g. migrations pending) or the read failed: serve uncached
+            return None
+
+        with self._lock:
+            self._versions[name] = (version, now)
+        return version
+
+    def get_body(self, name, builder, key=None):
+        """Return ``(body, etag)`` for ``name`` (variant ``key``), rebuilding with ``builder()`` when stale."""
+        version = self.current_version(name)
+        with self._lock:
+            entry = self._entries.get((name, key))
+        if version is not None and entry and entry[0] == version:
+            return entry[1], entry[2]
+
+        body = current_app.json.dumps(builder()).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()
+        if version is not None:
+            with self._lock:
+                self._entries[(name, key)] = (version, body, etag)
+        return body, etag
+
+    def respond(self, name, builder, public=False, key=None, max_age=None):
+        """JSON response for ``name`` with ETag/Cache-Control, or 304 if the client copy is current."""
+        body, etag = self.get_body(name, builder, key)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        if max_age is None:
+            max_age = current_app.config.get("REFERENCE_CACHE_MAX_AGE", 30)
+        response.headers['Cache-Control'] = f"{'public' if public else 'private'}, max-age={max_age}"
+        return response.make_conditional(request)
+
+    def bump(self, name):
+        """
+        Invalidate ``name`` everywhere. Call inside the writer's transaction,
+        before it commits, so the new version is visible with the new data.
+        """
+        values = {"version": CacheVersion.version + 1, "updated_at": datetime.utcnow()}
+        updated = db.session.execute(update(CacheVersion).where(CacheVersion.name == name).values(**values)).rowcount
+        if not updated:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(CacheVersion(name=name, version=1))
+            except IntegrityError:
+                # Another worker created the row first
+                db.session.execute(update(CacheVersion).where(CacheVersion.name == name).values(**values))
+
+        self._forget(name)
+
+    def _forget(self, name):
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == name]:
+                del self._entries[entry_key]
+            self._versions.pop(name, None)
+
+    def bump_committed(self, names):
+        """Bump ``names`` in a transaction of their own (for changes that are already committed)."""
+        values = {"version": CacheVersion.version + 1, "updated_at": datetime.utcnow()}
+        try:
+            with db.engine.begin() as connection:
+                for name in names:
+                    statement = update(CacheVersion).where(CacheVersion.name == name).values(**values)
+                    if not connection.execute(statement).rowcount:
+                        try:
+                            with connection.begin_nested():
+                                connection.execute(insert(CacheVersion).values(name=name, version=1, updated_at=datetime.utcnow()))
+                        except IntegrityError:
+                            # Another worker created the row first
+                            connection.execute(statement)
+        except SQLAlchemyError as e:
+            print(f"Warning: Could not bump cache versions {sorted(names)}: {e}")
+        for name in names:
+            self._forget(name)
+
+    def track(self, name, *models):
+        """Bump ``name`` after every commit that inserted, updated or deleted an instance of ``models``."""
+        models = tuple(models)
+
+        def changed(session):
+            if any(isinstance(obj, models) for obj in session.new) or any(isinstance(obj, models) for obj in session.deleted):
+                return True
+            return any(
+                isinstance(obj, models) and session.is_modified(obj, include_collections=False)
+                for obj in session.dirty
+            )
+
+        @event.listens_for(db.session, "before_flush")
+        def note_on_flush(session, flush_context, instances):
+            if changed(session):
+                session.info.setdefault('bump_after_commit', set()).add(name)
+
+
+reference_cache = ReferenceDataCache()
+
+
+@event.listens_for(db.session, "after_commit")
+def _bump_tracked_after_commit(session):
+    names = session.info.pop('bump_after_commit', None)
+    if names:
+        reference_cache.bump_committed(names)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _drop_uncommitted_bumps(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('bump_after_commit', None)
+reference_cache.track(ANALYTICS, Project, Evaluation, EvaluationMark, StudyProgram)
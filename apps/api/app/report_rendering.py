@@ -0,0 +1,589 @@
+"""
+PDF rendering for report exports.
+
+ReportLab holds the GIL for the whole render, so exports are rendered in a
+small process pool. Finished PDFs are kept on disk, content-addressed by a
+hash of the summary they were rendered from, so repeat exports of the same
+filters and data are served straight from disk.
+
+ReportLab is imported inside the render functions: they run in the pool's
+worker processes, so the web process never pays for importing it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import multiprocessing
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render pool already has a full backlog of work."""
+
+
+def render_summary_pdf(summary):
+    """Render a report summary dict to PDF bytes."""
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.lib.utils import simpleSplit
+
+    buffer = BytesIO()
+    pdf = Canvas(buffer, pagesize=LETTER)
+    width, height = LETTER
+    margin = 40
+    line_height = 14
+    y = height - margin
+
+    def ensure_space():
+        nonlocal y
+        if y <= margin:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 10)
+            y = height - margin
+
+    def draw_heading(text, size=14):
+        nonlocal y
+        pdf.setFont("Helvetica-Bold", size)
+        pdf.drawString(margin, y, text)
+        y -= line_height + 4
+        ensure_space()
+        pdf.setFont("Helvetica", 10)
+
+    def draw_label_value(label, value):
+        nonlocal y
+        ensure_space()
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(margin, y, f"{label}:")
+        pdf.setFont("Helvetica", 10)
+        pdf.drawString(margin + 120, y, str(value))
+        y -= line_height
+
+    def draw_list(items, label_fields):
+        nonlocal y
+        for item in items:
+            ensure_space()
+            line = " • " + " | ".join(f"{label}: {item.get(field, '')}" for label, field in label_fields)
+            lines = simpleSplit(line, "Helvetica", 10, width - (margin * 2))
+            for part in lines:
+                pdf.drawString(margin, y, part)
+                y -= line_height
+                ensure_space()
+
+    draw_heading("Evaluation Summary Report")
+
+    meta = summary.get("meta", {})
+    filters = meta.get("filters", {})
+    draw_label_value("Generated At", meta.get("generated_at", ""))
+    draw_label_value("Level", filters.get("level") or "All")
+    draw_label_value("Start Date", filters.get("start_date") or "—")
+    draw_label_value("End Date", filters.get("end_date") or "—")
+    y -= line_height
+
+    draw_heading("Project Overview", 12)
+    overview = summary.get("project_overview", {})
+    draw_label_value("Total Projects", overview.get("total_projects", 0))
+    draw_label_value("Evaluated Projects", overview.get("evaluated_projects", 0))
+    draw_label_value("Pending Projects", overview.get("pending_projects", 0))
+    draw_label_value("Completed Projects", overview.get("completed_projects", 0))
+    draw_label_value("Completion Rate (%)", overview.get("completion_rate", 0))
+
+    if overview.get("status_breakdown"):
+        y -= line_height
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(margin, y, "Status Breakdown:")
+        y -= line_height
+        pdf.setFont("Helvetica", 10)
+        for status, count in overview["status_breakdown"].items():
+            ensure_space()
+            pdf.drawString(margin + 10, y, f"{status.title()}: {count}")
+            y -= line_height
+
+    y -= line_height
+    draw_heading("Performance", 12)
+    performance = summary.get("performance", {})
+    draw_label_value("Average Score", performance.get("average_score", 0))
+    draw_label_value("Evaluation Count", performance.get("evaluation_count", 0))
+
+    if performance.get("grade_distribution"):
+        y -= line_height
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(margin, y, "Grade Distribution:")
+        y -= line_height
+        pdf.setFont("Helvetica", 10)
+        for grade in performance["grade_distribution"]:
+            ensure_space()
+            pdf.drawString(margin + 10, y, f"{grade.get('grade')}: {grade.get('count')}")
+            y -= line_height
+
+    if summary.get("study_programs"):
+        y -= line_height
+        draw_heading("Study Program Performance", 12)
+        pdf.setFont("Helvetica", 10)
+        draw_list(
+            summary["study_programs"],
+            [
+                ("Program", "study_program_name"),
+                ("Projects", "project_count"),
+                ("Avg Score", "average_score"),
+            ],
+        )
+
+    if summary.get("top_projects"):
+        y -= line_height
+        draw_heading("Top Projects", 12)
+        pdf.setFont("Helvetica", 10)
+        draw_list(
+            summary["top_projects"],
+            [
+                ("Title", "title"),
+                ("Level", "level"),
+                ("Avg Score", "average_score"),
+            ],
+        )
+
+    if summary.get("recent_activity"):
+        y -= line_height
+        draw_heading("Recent Activity", 12)
+        pdf.setFont("Helvetica", 10)
+        for activity in summary["recent_activity"]:
+            ensure_space()
+            pdf.drawString(
+                margin,
+                y,
+                f"{activity.get('project_title')} • {activity.get('evaluated_by')} • {activity.get('score')}%",
+            )
+            y -= line_height
+            timestamp_text = activity.get('timestamp', '')
+            if timestamp_text:
+                pdf.drawString(margin + 10, y, timestamp_text)
+                y -= line_height
+
+    pdf.showPage()
+    pdf.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def render_transcript_pdf(transcript):
+    """Render one student's result sheet to PDF bytes."""
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.lib.utils import simpleSplit
+
+    buffer = BytesIO()
+    pdf = Canvas(buffer, pagesize=LETTER)
+    width, height = LETTER
+    margin = 40
+    line_height = 14
+    y = height - margin
+
+    def ensure_space():
+        nonlocal y
+        if y <= margin:
+            pdf.showPage()
+            pdf.setFont("Helvetica", 10)
+            y = height - margin
+
+    def draw_heading(text, size=14):
+        nonlocal y
+        pdf.setFont("Helvetica-Bold", size)
+        pdf.drawString(margin, y, text)
+        y -= line_height + 4
+        ensure_space()
+        pdf.setFont("Helvetica", 10)
+
+    def draw_label_value(label, value):
+        nonlocal y
+        ensure_space()
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(margin, y, f"{label}:")
+        pdf.setFont("Helvetica", 10)
+        pdf.drawString(margin + 150, y, str(value))
+        y -= line_height
+
+    def draw_wrapped(text, indent=0):
+        nonlocal y
+        for part in simpleSplit(text, "Helvetica", 10, width - (margin * 2) - indent):
+            ensure_space()
+            pdf.drawString(margin + indent, y, part)
+            y -= line_height
+
+    def draw_marks(title, marks):
+        nonlocal y
+        if not marks:
+            return
+        y -= line_height
+        draw_heading(title, 12)
+        for criterion, mark in marks.items():
+            label = criterion.replace("__", " & ").replace("_", " ").title()
+            draw_label_value(label, f"{mark.get('score')} / {mark.get('max_score')}")
+            if mark.get("feedback"):
+                draw_wrapped(mark["feedback"], indent=10)
+
+    draw_heading("Student Result Sheet")
+
+    draw_label_value("Student", transcript.get("student_name") or "")
+    draw_label_value("Registration No.", transcript.get("student_registration") or "—")
+    draw_label_value("Study Program", transcript.get("study_program") or "—")
+    draw_label_value("Level", transcript.get("level") or "—")
+    draw_label_value("Project", transcript.get("project_title") or "")
+    draw_label_value("Status", (transcript.get("status") or "").replace("_", " ").title())
+
+    evaluation = transcript.get("evaluation")
+    if evaluation:
+        draw_marks("Project Marks", evaluation.get("marks", {}).get("project_marks"))
+        draw_marks("Presentation Marks", evaluation.get("marks", {}).get("presentation_marks"))
+
+        y -= line_height
+        draw_heading("Result", 12)
+        draw_label_value("Total", f"{evaluation.get('total_score')} / {evaluation.get('max_score')}")
+        draw_label_value("Percentage", f"{evaluation.get('percentage')}%")
+        draw_label_value("Grade", evaluation.get("grade") or "—")
+
+        if evaluation.get("overall_feedback"):
+            y -= line_height
+            draw_heading("Feedback", 12)
+            for paragraph in evaluation["overall_feedback"].splitlines():
+                draw_wrapped(paragraph)
+    else:
+        y -= line_height
+        draw_wrapped("This project has not been evaluated yet.")
+
+    pdf.showPage()
+    pdf.save()
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def summary_fingerprint(summary):
+    """
+    Hash a report summary for use as an artifact key.
+
+    ``meta.generated_at`` changes on every request, so it is left out; the
+    filters and every figure in the summary are part of the key.
+    """
+    payload = dict(summary)
+    meta = dict(payload.get("meta") or {})
+    meta.pop("generated_at", None)
+    payload["meta"] = meta
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ReportArtifactStore:
+    """Content-addressed PDF store on disk with LRU-by-size eviction."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        """Return the artifact path for ``key`` if it exists, marking it as recently used."""
+        path = self.path_for(key)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, data):
+        """Atomically write an artifact and evict old ones if over budget."""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Delete least recently used artifacts until the store fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class PdfRenderPool:
+    """
+    Process pool for PDF renders with a bounded backlog.
+
+    At most ``workers + queue_size`` renders may be running or waiting at once.
+    Identical summaries that are already being rendered share one future.
+    """
+
+    def __init__(self, workers, queue_size, start_method="spawn"):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._context = multiprocessing.get_context(start_method)
+        self._executor = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+        return self._executor
+
+    def _drop_executor(self, executor):
+        # A worker died: the executor rejects all further work, so the next submit builds a new one.
+        # Called with self._lock held.
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, key, summary, wait_timeout=0):
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+
+        if wait_timeout:
+            acquired = self._slots.acquire(timeout=wait_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise RenderQueueFull("PDF render queue is full")
+
+        with self._lock:
+            # Another request may have started the same render while we waited
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._slots.release()
+                return future
+            executor = self._get_executor()
+            try:
+                future = executor.submit(render_summary_pdf, summary)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._drop_executor(executor)
+                self._slots.release()
+                raise
+            self._in_flight[key] = future
+
+        def _done(_future):
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if not _future.cancelled() and isinstance(_future.exception(), BrokenProcessPool):
+                    self._drop_executor(executor)
+            self._slots.release()
+
+        future.add_done_callback(_done)
+        return future
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_store = None
+_pool = None
+_init_lock = threading.Lock()
+
+
+def _get_renderer(config):
+    global _store, _pool
+    with _init_lock:
+        if _store is None:
+            _store = ReportArtifactStore(
+                config["REPORT_ARTIFACT_DIR"],
+                config["REPORT_ARTIFACT_MAX_BYTES"],
+            )
+        if _pool is None:
+            _pool = PdfRenderPool(
+                config["REPORT_RENDER_WORKERS"],
+                config["REPORT_RENDER_QUEUE_SIZE"],
+                config["REPORT_RENDER_START_METHOD"],
+            )
+    return _store, _pool
+
+
+def get_report_pdf(summary, config):
+    """
+    Return ``(key, path)`` of a rendered PDF for ``summary``, where ``key`` is
+    the summary's content hash (stable across requests, so usable as an ETag).
+
+    Serves an existing artifact when one matches; otherwise renders it in the
+    process pool and stores the result. Raises ``RenderQueueFull`` when the
+    pool backlog is full, ``concurrent.futures.TimeoutError`` if the render
+    takes longer than ``REPORT_RENDER_TIMEOUT`` seconds and
+    ``BrokenProcessPool`` if a render worker died (the pool is rebuilt for
+    the next export).
+    """
+    store, pool = _get_renderer(config)
+    key = summary_fingerprint(summary)
+
+    path = store.get(key)
+    if path:
+        return key, path
+
+    future = pool.submit(key, summary, config["REPORT_RENDER_QUEUE_WAIT"])
+    data = future.result(timeout=config["REPORT_RENDER_TIMEOUT"])
+
+    # Concurrent requests for the same summary share the future; the first to
+    # finish writes the artifact and the rest find it on disk.
+    path = store.get(key)
+    if path:
+        return key, path
+    return key, store.put(key, data)
+
+
+class ReportJobStore:
+    """
+    Progress records for long-running report jobs.
+
+    Each job is a small JSON file, so any worker process on the host can
+    answer a progress request for a job another worker is running.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def create(self, kind, total, **fields):
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "pending",
+            "total": total,
+            "completed": 0,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+            "error": None,
+        }
+        job.update(fields)
+        self._write(job)
+        return job
+
+    def update(self, job, **fields):
+        job.update(fields)
+        self._write(job)
+        return job
+
+    def get(self, job_id):
+        # Job ids are uuid4 hex; anything else cannot name a job file
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, job):
+        path = self._path(job["id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(job, handle)
+        os.replace(tmp_path, path)
+
+
+class _ZipChunkBuffer:
+    """Write-only sink for ZipFile whose contents are drained after each entry."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_transcript_zip(transcripts, job_store, job, workers, start_method="spawn", window=None):
+    """
+    Yield a ZIP archive of per-student result sheets chunk by chunk.
+
+    Transcripts are rendered in a process pool with at most ``window`` renders
+    in flight, and each PDF is written to the archive and yielded as soon as it
+    is ready, so memory use does not grow with the number of students.
+    """
+    window = window or workers * 2
+    sink = _ZipChunkBuffer()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+    pending = deque()
+    remaining = iter(transcripts)
+    completed = 0
+    finished = False
+
+    def submit_next():
+        transcript = next(remaining, None)
+        if transcript is not None:
+            pending.append((transcript["filename"], executor.submit(render_transcript_pdf, transcript)))
+
+    try:
+        job_store.update(job, status="running")
+        for _ in range(window):
+            submit_next()
+
+        while pending:
+            filename, future = pending.popleft()
+            data = future.result()
+            submit_next()
+
+            archive.writestr(filename, data)
+            completed += 1
+            # Progress writes are cheap but not free; batch them on large jobs
+            if completed == job["total"] or completed % 25 == 0:
+                job_store.update(job, completed=completed)
+            yield sink.drain()
+
+        archive.close()
+        job_store.update(job, status="completed", completed=completed, finished_at=datetime.utcnow().isoformat())
+        finished = True
+        yield sink.drain()
+    except GeneratorExit:
+        job_store.update(job, status="cancelled", completed=completed, finished_at=datetime.utcnow().isoformat())
+        raise
+    except Exception as exc:
+        job_store.update(job, status="failed", completed=completed, error=str(exc), finished_at=datetime.utcnow().isoformat())
+        raise
+    finally:
+        if not finished:
+            for _filename, future in pending:
+                future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
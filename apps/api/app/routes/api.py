@@ -1,17 +1,27 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, send_file, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
-from app.models.models import User, Student, Admin, StudyProgram, Project, Evaluation, EvaluationMark, UserRole, ProjectLevel, Deadline, EvaluationType, ProjectStatus, Notification, NotificationType, NotificationAudience
+from app.models.models import User, Student, Admin, StudyProgram, Project, ProjectStatusEvent, Evaluation, EvaluationMark, UserRole, ProjectLevel, Deadline, EvaluationType, ProjectStatus, Notification, NotificationType, NotificationAudience
 from marshmallow import Schema, fields, ValidationError
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, or_, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from functools import wraps
 from datetime import datetime, time
 import csv
-from io import StringIO, BytesIO
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib.utils import simpleSplit
+from io import StringIO
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from app.report_rendering import get_report_pdf, RenderQueueFull, ReportJobStore, stream_transcript_zip
+from app.deadlines import apply_submission_lateness, recompute_lateness
+from app import reference_cache as refdata
+from app.reference_cache import reference_cache
+from app.database import database_status, pool_metrics, use_read_engine, statement_timeout
+from app import student_dashboards
+from app import grading_queue
+from app.evaluation_drafts import draft_buffer, MAX_DRAFT_MARKS
+from app.rubrics import criteria
 
 api_bp = Blueprint('api', __name__)
 
@@ -68,9 +78,13 @@ class EvaluationSchema(Schema):
     comments = fields.Str(allow_none=True)
     marks = fields.List(fields.Dict(), required=True)
 
+class EvaluationBatchEntrySchema(EvaluationSchema):
+    project_id = fields.Int(required=True)
+
 course_schema = CourseSchema()
 project_schema = ProjectSchema()
 evaluation_schema = EvaluationSchema()
+evaluation_batch_entry_schema = EvaluationBatchEntrySchema()
 user_schema = UserSchema()
 
 def require_admin_role():
@@ -319,156 +333,26 @@ def _report_summary_to_csv(summary):
     return output.getvalue()
 
 
-def _report_summary_to_pdf(summary):
-    buffer = BytesIO()
-    pdf = Canvas(buffer, pagesize=LETTER)
-    width, height = LETTER
-    margin = 40
-    line_height = 14
-    y = height - margin
-
-    def ensure_space():
-        nonlocal y
-        if y <= margin:
-            pdf.showPage()
-            pdf.setFont("Helvetica", 10)
-            y = height - margin
-
-    def draw_heading(text, size=14):
-        nonlocal y
-        pdf.setFont("Helvetica-Bold", size)
-        pdf.drawString(margin, y, text)
-        y -= line_height + 4
-        ensure_space()
-        pdf.setFont("Helvetica", 10)
-
-    def draw_label_value(label, value):
-        nonlocal y
-        ensure_space()
-        pdf.setFont("Helvetica-Bold", 10)
-        pdf.drawString(margin, y, f"{label}:")
-        pdf.setFont("Helvetica", 10)
-        pdf.drawString(margin + 120, y, str(value))
-        y -= line_height
-
-    def draw_list(items, label_fields):
-        nonlocal y
-        for item in items:
-            ensure_space()
-            line = " • " + " | ".join(f"{label}: {item.get(field, '')}" for label, field in label_fields)
-            lines = simpleSplit(line, "Helvetica", 10, width - (margin * 2))
-            for part in lines:
-                pdf.drawString(margin, y, part)
-                y -= line_height
-                ensure_space()
-
-    draw_heading("Evaluation Summary Report")
-
-    meta = summary.get("meta", {})
-    filters = meta.get("filters", {})
-    draw_label_value("Generated At", meta.get("generated_at", ""))
-    draw_label_value("Level", filters.get("level") or "All")
-    draw_label_value("Start Date", filters.get("start_date") or "—")
-    draw_label_value("End Date", filters.get("end_date") or "—")
-    y -= line_height
-
-    draw_heading("Project Overview", 12)
-    overview = summary.get("project_overview", {})
-    draw_label_value("Total Projects", overview.get("total_projects", 0))
-    draw_label_value("Evaluated Projects", overview.get("evaluated_projects", 0))
-    draw_label_value("Pending Projects", overview.get("pending_projects", 0))
-    draw_label_value("Completed Projects", overview.get("completed_projects", 0))
-    draw_label_value("Completion Rate (%)", overview.get("completion_rate", 0))
-
-    if overview.get("status_breakdown"):
-        y -= line_height
-        pdf.setFont("Helvetica-Bold", 10)
-        pdf.drawString(margin, y, "Status Breakdown:")
-        y -= line_height
-        pdf.setFont("Helvetica", 10)
-        for status, count in overview["status_breakdown"].items():
-            ensure_space()
-            pdf.drawString(margin + 10, y, f"{status.title()}: {count}")
-            y -= line_height
-
-    y -= line_height
-    draw_heading("Performance", 12)
-    performance = summary.get("performance", {})
-    draw_label_value("Average Score", performance.get("average_score", 0))
-    draw_label_value("Evaluation Count", performance.get("evaluation_count", 0))
-
-    if performance.get("grade_distribution"):
-        y -= line_height
-        pdf.setFont("Helvetica-Bold", 10)
-        pdf.drawString(margin, y, "Grade Distribution:")
-        y -= line_height
-        pdf.setFont("Helvetica", 10)
-        for grade in performance["grade_distribution"]:
-            ensure_space()
-            pdf.drawString(margin + 10, y, f"{grade.get('grade')}: {grade.get('count')}")
-            y -= line_height
-
-    if summary.get("study_programs"):
-        y -= line_height
-        draw_heading("Study Program Performance", 12)
-        pdf.setFont("Helvetica", 10)
-        draw_list(
-            summary["study_programs"],
-            [
-                ("Program", "study_program_name"),
-                ("Projects", "project_count"),
-                ("Avg Score", "average_score"),
-            ],
-        )
-
-    if summary.get("top_projects"):
-        y -= line_height
-        draw_heading("Top Projects", 12)
-        pdf.setFont("Helvetica", 10)
-        draw_list(
-            summary["top_projects"],
-            [
-                ("Title", "title"),
-                ("Level", "level"),
-                ("Avg Score", "average_score"),
-            ],
-        )
-
-    if summary.get("recent_activity"):
-        y -= line_height
-        draw_heading("Recent Activity", 12)
-        pdf.setFont("Helvetica", 10)
-        for activity in summary["recent_activity"]:
-            ensure_space()
-            pdf.drawString(
-                margin,
-                y,
-                f"{activity.get('project_title')} • {activity.get('evaluated_by')} • {activity.get('score')}%",
-            )
-            y -= line_height
-            timestamp_text = activity.get('timestamp', '')
-            if timestamp_text:
-                pdf.drawString(margin + 10, y, timestamp_text)
-                y -= line_height
-
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
-    return buffer.getvalue()
-
 # Study Programs Routes
 @api_bp.route('/study-programs', methods=['GET'])
 @jwt_required()
+@use_read_engine()
 def get_courses():
-    courses = StudyProgram.query.all()
-    return jsonify([{
-        'id': course.id,
-        'code': course.code,
-        'name': course.name,
-        'description': course.description,
-        'created_at': course.created_at.isoformat(),
-        'project_count': course.projects.count()
-    } for course in courses]), 200
+    def build():
+        rows = db.session.query(StudyProgram, func.count(Project.id))\
+            .outerjoin(Project, Project.study_program_id == StudyProgram.id)\
+            .group_by(StudyProgram.id)\
+            .order_by(StudyProgram.id).all()
+        return [{
+            'id': course.id,
+            'code': course.code,
+            'name': course.name,
+            'description': course.description,
+            'created_at': course.created_at.isoformat(),
+            'project_count': project_count
+        } for course, project_count in rows]
+    
+    return reference_cache.respond(refdata.STUDY_PROGRAMS, build)
 
 @api_bp.route('/study-programs', methods=['POST'])
 @jwt_required()
@@ -493,6 +377,7 @@ def create_course():
     
     course = StudyProgram(**data)
     db.session.add(course)
+    reference_cache.bump(refdata.STUDY_PROGRAMS)
     db.session.commit()
     
     return jsonify({
@@ -529,6 +414,7 @@ def update_course(course_id):
         course.name = data['name']
         course.description = data.get('description', course.description)
         
+        reference_cache.bump(refdata.STUDY_PROGRAMS)
         db.session.commit()
         
         return jsonify({
@@ -569,6 +455,7 @@ def delete_course(course_id):
             }), 400
         
         db.session.delete(course)
+        reference_cache.bump(refdata.STUDY_PROGRAMS)
         db.session.commit()
         
         return jsonify({"message": "Study program deleted successfully"}), 200
@@ -584,36 +471,14 @@ def delete_course(course_id):
 @api_bp.route('/evaluation-templates', methods=['GET'])
 @jwt_required()
 def get_evaluation_templates():
-    """Get available evaluation templates with their criteria"""
-    templates = {
-        'project': {
-            'name': 'Project Evaluation',
-            'description': 'Evaluation of project work: Code Quality, Documentation, and Functionality',
-            'evaluation_type': 'PROJECT',
-            'criteria': [
-                {'criterion_name': 'Code Quality', 'max_score': 20, 'description': 'Code structure, organization, and adherence to best practices'},
-                {'criterion_name': 'Documentation', 'max_score': 20, 'description': 'Completeness and clarity of documentation'},
-                {'criterion_name': 'Functionality', 'max_score': 30, 'description': 'How well the project meets functional requirements'}
-            ]
-        },
-        'presentation': {
-            'name': 'Presentation Evaluation',
-            'description': 'Evaluation of presentation: Clarity & Communication, Visual Presentation, and Technical Explanation',
-            'evaluation_type': 'PRESENTATION',
-            'criteria': [
-                {'criterion_name': 'Clarity & Communication', 'max_score': 10, 'description': 'Clear communication of ideas and concepts'},
-                {'criterion_name': 'Visual Presentation', 'max_score': 10, 'description': 'Quality of visual materials and slides'},
-                {'criterion_name': 'Technical Explanation', 'max_score': 10, 'description': 'Ability to explain technical aspects clearly'}
-            ]
-        }
-    }
-    
-    return jsonify(templates), 200
+    """Get available evaluation templates (rubrics) with their criteria"""
+    return reference_cache.respond(refdata.EVALUATION_TEMPLATES, criteria.templates)
 
 # Projects Routes
 @api_bp.route('/projects', methods=['GET'])
 @jwt_required()
 @require_admin_role()
+@use_read_engine()
 def get_projects():
     try:
         # Get query parameters for filtering and search
@@ -697,6 +562,7 @@ def create_project():
     data['level'] = ProjectLevel(data['level'])
     project = Project(**data)
     db.session.add(project)
+    reference_cache.bump(refdata.STUDY_PROGRAMS)  # project_count changed
     db.session.commit()
     
     return jsonify(project.to_dict()), 201
@@ -768,6 +634,7 @@ def create_my_project():
             action_url=f"/projects/{project.id}"
         )
         
+        reference_cache.bump(refdata.STUDY_PROGRAMS)  # project_count changed
         db.session.commit()
         
         return jsonify({
@@ -799,6 +666,7 @@ def update_project(project_id):
         project.study_program_id = data.get('study_program_id', data.get('course_id', project.study_program_id))
         project.student_id = data['student_id']
         
+        reference_cache.bump(refdata.STUDY_PROGRAMS)  # project_count may have moved between programs
         db.session.commit()
         
         return jsonify({
@@ -825,6 +693,7 @@ def delete_project(project_id):
             return jsonify({"error": "Cannot delete project with existing evaluations"}), 400
         
         db.session.delete(project)
+        reference_cache.bump(refdata.STUDY_PROGRAMS)  # project_count changed
         db.session.commit()
         
         return jsonify({"message": "Project deleted successfully"}), 200
@@ -977,68 +846,95 @@ def get_project_evaluations(project_id):
     
     return jsonify(result), 200
 
-@api_bp.route('/projects/<int:project_id>/evaluations', methods=['POST'])
-@jwt_required()
-@require_admin_role()
-def create_evaluation(project_id):
-    # Eagerly load student and user relationships to ensure they're available
-    project = Project.query.options(
-        joinedload(Project.student).joinedload(Student.user)
-    ).get_or_404(project_id)
-    
-    try:
-        data = evaluation_schema.load(request.json)
-    except ValidationError as err:
-        return jsonify({"error": "Validation error", "details": err.messages}), 400
-    
-    identity = get_jwt_identity()
-    evaluation_type = EvaluationType(data['evaluation_type'])
-    
-    # Check if evaluation of this type already exists for this project
-    existing_evaluation = Evaluation.query.filter_by(
-        project_id=project_id,
-        evaluation_type=evaluation_type
-    ).first()
+def _grade_for(percentage):
+    """Letter grade for an overall percentage"""
+    if percentage >= 90:
+        return 'A'
+    if percentage >= 80:
+        return 'B'
+    if percentage >= 70:
+        return 'C'
+    if percentage >= 60:
+        return 'D'
+    return 'F'
+
+def _evaluation_marks_total(evaluation, mark_count, score_sum, max_sum):
+    """
+    (total marks, max marks) for one evaluation from its mark sums, falling back
+    to the stored totals (and 70/30 maximums) for evaluations without marks
+    """
+    if evaluation.evaluation_type == EvaluationType.PROJECT:
+        if mark_count:
+            return score_sum or 0, max_sum or 0
+        return evaluation.total_project_marks or 0, 70
+    if mark_count:
+        return score_sum or 0, max_sum or 0
+    return evaluation.total_presentation_marks or 0, 30
+
+def _evaluations_with_mark_sums(project_ids):
+    """Evaluations of the given projects with (mark count, score sum, max score sum) each, in one query"""
+    rows = db.session.query(
+        Evaluation,
+        func.count(EvaluationMark.id),
+        func.sum(EvaluationMark.score),
+        func.sum(EvaluationMark.max_score)
+    ).outerjoin(EvaluationMark, EvaluationMark.evaluation_id == Evaluation.id).filter(
+        Evaluation.project_id.in_(project_ids)
+    ).group_by(Evaluation.id).all()
+    return {evaluation: (count, score_sum, max_sum) for evaluation, count, score_sum, max_sum in rows}
+
+def _combine_evaluations(project_eval, presentation_eval, mark_sums):
+    """
+    Set overall percentage, grade and marks totals on both evaluations of a project
+    from already-known mark sums. Returns the overall percentage.
+    """
+    project_total, project_max = _evaluation_marks_total(project_eval, *mark_sums[project_eval])
+    presentation_total, presentation_max = _evaluation_marks_total(presentation_eval, *mark_sums[presentation_eval])
+    
+    total_marks = project_total + presentation_total
+    total_max_marks = project_max + presentation_max  # Should be 100 (70 + 30)
+    overall_percentage = round((total_marks / total_max_marks) * 100, 2) if total_max_marks > 0 else 0
+    grade = _grade_for(overall_percentage)
+    
+    project_eval.total_project_marks = project_total
+    presentation_eval.total_presentation_marks = presentation_total
+    for evaluation in (project_eval, presentation_eval):
+        evaluation.overall_percentage = overall_percentage
+        evaluation.grade = grade
+    return overall_percentage
+
+def _evaluation_fields(evaluation_type, marks_data):
+    """
+    Evaluation column values computed from submitted marks
     
-    if existing_evaluation:
-        return jsonify({
-            "error": f"{evaluation_type.value} evaluation already exists for this project. Use PATCH to update it."
-        }), 400
+    Raises:
+        KeyError, TypeError, ValueError: If a mark is missing fields or has non-numeric scores
     
+    Returns:
+        tuple: (column values dict, total score, total max score)
+    """
     # Calculate scores based on evaluation type
     total_score = 0
     total_max_score = 0
-    code_quality = None
-    documentation_score = None
-    functionality_score = None
-    clarity_communication = None
-    visual_presentation = None
-    technical_explanation = None
-    
-    # Process marks and extract scores based on type
-    for mark_data in data['marks']:
-        criterion_name = mark_data['criterion_name'].lower()
+    field_scores = {}
+    
+    # Each criterion knows which evaluation column its score counts towards
+    for mark_data in marks_data:
+        criterion = criteria.resolve(evaluation_type, mark_data['criterion_name'])
         score = float(mark_data['score'])
         max_score = float(mark_data['max_score'])
         
         total_score += score
         total_max_score += max_score
-        
-        # Map marks to specific fields based on evaluation type
-        if evaluation_type == EvaluationType.PROJECT:
-            if 'code quality' in criterion_name:
-                code_quality = score if code_quality is None else code_quality + score
-            elif 'documentation' in criterion_name:
-                documentation_score = score if documentation_score is None else documentation_score + score
-            elif 'functionality' in criterion_name:
-                functionality_score = score if functionality_score is None else functionality_score + score
-        elif evaluation_type == EvaluationType.PRESENTATION:
-            if 'clarity' in criterion_name or 'communication' in criterion_name:
-                clarity_communication = score if clarity_communication is None else clarity_communication + score
-            elif 'visual' in criterion_name or ('presentation' in criterion_name and 'visual' not in criterion_name):
-                visual_presentation = score if visual_presentation is None else visual_presentation + score
-            elif 'technical' in criterion_name or 'explanation' in criterion_name:
-                technical_explanation = score if technical_explanation is None else technical_explanation + score
+        if criterion.field:
+            field_scores[criterion.field] = field_scores.get(criterion.field, 0) + score
+    
+    code_quality = field_scores.get('code_quality')
+    documentation_score = field_scores.get('documentation_score')
+    functionality_score = field_scores.get('functionality_score')
+    clarity_communication = field_scores.get('clarity_communication')
+    visual_presentation = field_scores.get('visual_presentation')
+    technical_explanation = field_scores.get('technical_explanation')
     
     # Calculate totals
     total_project_marks = 0
@@ -1058,288 +954,592 @@ def create_evaluation(project_id):
     # Calculate percentage
     percentage = round((total_score / total_max_score) * 100, 2) if total_max_score > 0 else 0.0
     
+    return {
+        'evaluation_type': evaluation_type,
+        'total_score': percentage,
+        'code_quality': code_quality,
+        'documentation_score': documentation_score,
+        'functionality_score': functionality_score,
+        'clarity_communication': clarity_communication,
+        'visual_presentation': visual_presentation,
+        'technical_explanation': technical_explanation,
+        'total_project_marks': total_project_marks,
+        'total_presentation_marks': total_presentation_marks
+    }, total_score, total_max_score
+
+def _mark_rows(evaluation_id, evaluation_type, marks_data):
+    """Rows for a bulk EvaluationMark insert (criteria are already resolved by _evaluation_fields)"""
+    return [{
+        'evaluation_id': evaluation_id,
+        'criterion_id': criteria.resolve(evaluation_type, mark_data['criterion_name']).id,
+        'max_score': float(mark_data['max_score']),
+        'score': float(mark_data['score']),
+        'comments': mark_data.get('comments')
+    } for mark_data in marks_data]
+
+def _update_evaluated_project(project, mark_sums):
+    """
+    After evaluations were added to ``project``: combine scores once both types
+    exist and move the project to EVALUATED, otherwise to UNDER_REVIEW.
+    ``mark_sums`` maps each of the project's evaluations to its mark sums.
+    
+    Returns:
+        float or None: Overall percentage if both evaluations exist
+    """
+    evaluations = [e for e in mark_sums if e.project_id == project.id]
+    project_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
+    presentation_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
+    
+    if project_eval and presentation_eval:
+        overall_percentage = _combine_evaluations(project_eval, presentation_eval, mark_sums)
+        
+        # Automatic status transition: both evaluations exist -> EVALUATED
+        if project.status == ProjectStatus.SUBMITTED:
+            # Both evaluations arrived together: pass through UNDER_REVIEW
+            update_project_status(project, ProjectStatus.UNDER_REVIEW)
+        success, error = update_project_status(project, ProjectStatus.EVALUATED)
+        if not success:
+            # Log error but don't fail the request
+            print(f"Warning: Could not update project status: {error}")
+        return overall_percentage
+    
+    # First evaluation created -> transition to UNDER_REVIEW
+    if project.status == ProjectStatus.SUBMITTED:
+        success, error = update_project_status(project, ProjectStatus.UNDER_REVIEW)
+        if not success:
+            print(f"Warning: Could not update project status: {error}")
+    return None
+
+def _evaluation_notification(project, evaluation_type, percentage, overall_percentage):
+    """Notification fields telling the student their project was evaluated"""
+    if overall_percentage is not None:
+        # Both evaluations exist, use overall percentage
+        message = f"Your project '{project.title}' has been evaluated. Overall Score: {overall_percentage}%"
+    else:
+        # Only one evaluation exists, use individual percentage
+        message = f"Your project '{project.title}' has been evaluated ({evaluation_type.value.lower()}). Score: {percentage}%"
+    return {
+        'title': "Evaluation Released",
+        'message': message,
+        'notification_type': "success",
+        'action_label': "View evaluation",
+        'action_url': "/dashboard#evaluation"  # Link to student dashboard evaluation section
+    }
+
+@api_bp.route('/projects/<int:project_id>/evaluations', methods=['POST'])
+@jwt_required()
+@require_admin_role()
+def create_evaluation(project_id):
+    """
+    Create an evaluation with its marks in one transaction: the project (with
+    student and user) and its other evaluations (with mark sums) are read in two
+    queries, marks are inserted in one executemany, combined scores come from
+    the submitted values, and the student notification commits with the rest.
+    """
+    project = Project.query.options(
+        joinedload(Project.student).joinedload(Student.user)
+    ).get_or_404(project_id)
+    
+    try:
+        data = evaluation_schema.load(request.json)
+    except ValidationError as err:
+        return jsonify({"error": "Validation error", "details": err.messages}), 400
+    
+    identity = get_jwt_identity()
+    evaluation_type = EvaluationType(data['evaluation_type'])
+    
+    # Existing evaluations of this project, with their mark sums
+    mark_sums = _evaluations_with_mark_sums([project_id])
+    if any(e.evaluation_type == evaluation_type for e in mark_sums):
+        return jsonify({
+            "error": f"{evaluation_type.value} evaluation already exists for this project. Use PATCH to update it."
+        }), 400
+    
+    # Calculate scores based on evaluation type
+    fields, total_score, total_max_score = _evaluation_fields(evaluation_type, data['marks'])
+    
     # Create evaluation
     evaluation = Evaluation(
         project_id=project_id,
         admin_id=int(identity),
-        evaluation_type=evaluation_type,
-        total_score=percentage,
-        code_quality=code_quality,
-        documentation_score=documentation_score,
-        functionality_score=functionality_score,
-        clarity_communication=clarity_communication,
-        visual_presentation=visual_presentation,
-        technical_explanation=technical_explanation,
-        total_project_marks=total_project_marks,
-        total_presentation_marks=total_presentation_marks,
-        comments=data.get('comments')
+        comments=data.get('comments'),
+        **fields
     )
     db.session.add(evaluation)
-    db.session.flush()  # Get evaluation ID
-    
-    # Create marks
-    for mark_data in data['marks']:
-        mark = EvaluationMark(
-            evaluation_id=evaluation.id,
-            criterion_name=mark_data['criterion_name'],
-            max_score=float(mark_data['max_score']),
-            score=float(mark_data['score']),
-            comments=mark_data.get('comments')
-        )
-        db.session.add(mark)
+    mark_sums[evaluation] = (len(data['marks']), total_score, total_max_score)
     
     # Calculate overall percentage and grade for the project (combining both evaluations if they exist)
-    project_evaluations = Evaluation.query.filter_by(project_id=project_id).all()
-    project_eval = next((e for e in project_evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
-    presentation_eval = next((e for e in project_evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
+    overall_percentage = _update_evaluated_project(project, mark_sums)
     
-    # Store overall_percentage for notification
-    calculated_overall_percentage = None
+    # Notify the student in the same transaction
+    student_user = project.student.user if project.student else None
+    if student_user:
+        create_notification(
+            user_id=student_user.id,
+            commit=False,
+            **_evaluation_notification(project, evaluation_type, fields['total_score'], overall_percentage)
+        )
+    else:
+        print(f"Warning: Project {project_id} has no associated student user")
     
-    if project_eval and presentation_eval:
-        # Calculate actual total marks from the marks themselves
-        project_total = sum(mark.score for mark in project_eval.marks) if project_eval.marks.count() > 0 else (project_eval.total_project_marks or 0)
-        presentation_total = sum(mark.score for mark in presentation_eval.marks) if presentation_eval.marks.count() > 0 else (presentation_eval.total_presentation_marks or 0)
-        
-        # Calculate max possible marks
-        project_max = sum(mark.max_score for mark in project_eval.marks) if project_eval.marks.count() > 0 else 70
-        presentation_max = sum(mark.max_score for mark in presentation_eval.marks) if presentation_eval.marks.count() > 0 else 30
-        
-        total_marks = project_total + presentation_total
-        total_max_marks = project_max + presentation_max  # Should be 100 (70 + 30)
-        
-        # Calculate overall percentage correctly
-        overall_percentage = round((total_marks / total_max_marks) * 100, 2) if total_max_marks > 0 else 0
-        calculated_overall_percentage = overall_percentage  # Store for notification
-        
-        # Update total_project_marks and total_presentation_marks for consistency
-        project_eval.total_project_marks = project_total
-        presentation_eval.total_presentation_marks = presentation_total
-        
-        # Determine grade
-        grade = 'F'
-        if overall_percentage >= 90:
-            grade = 'A'
-        elif overall_percentage >= 80:
-            grade = 'B'
-        elif overall_percentage >= 70:
-            grade = 'C'
-        elif overall_percentage >= 60:
-            grade = 'D'
+    try:
+        db.session.flush()
         
-        # Update both evaluations with overall percentage and grade
-        project_eval.overall_percentage = overall_percentage
-        project_eval.grade = grade
-        presentation_eval.overall_percentage = overall_percentage
-        presentation_eval.grade = grade
+        # Insert all marks in one executemany, then read them back once for the response
+        if data['marks']:
+            db.session.execute(insert(EvaluationMark), _mark_rows(evaluation.id, evaluation_type, data['marks']))
+        marks = evaluation.marks.order_by(EvaluationMark.id).all()
         
-        # Automatic status transition: both evaluations exist -> EVALUATED
-        success, error = update_project_status(project, ProjectStatus.EVALUATED)
-        if not success:
-            # Log error but don't fail the request
-            print(f"Warning: Could not update project status: {error}")
-    else:
-        # First evaluation created -> transition to UNDER_REVIEW
-        if project.status == ProjectStatus.SUBMITTED:
-            success, error = update_project_status(project, ProjectStatus.UNDER_REVIEW)
-            if not success:
-                print(f"Warning: Could not update project status: {error}")
+        result = evaluation.to_dict(marks=marks)
+        db.session.commit()
+        draft_buffer.discard((project_id, evaluation_type, int(identity)))
+    except IntegrityError:
+        # Another request created this evaluation type first
+        db.session.rollback()
+        return jsonify({
+            "error": f"{evaluation_type.value} evaluation already exists for this project. Use PATCH to update it."
+        }), 400
+    except StaleDataError:
+        # The other evaluation's grade was recalculated from a version another request has since changed
+        db.session.rollback()
+        return jsonify({"error": "This project's other evaluation was changed by another request; try again"}), 409
     
-    db.session.commit()
+    return jsonify(result), 201
+
+@api_bp.route('/evaluations/batch', methods=['POST'])
+@jwt_required()
+@require_admin_role()
+def create_evaluations_batch():
+    """
+    Create many evaluations in one transaction (a marking session)
+    
+    Body: {"evaluations": [{"project_id", "evaluation_type", "marks", "comments"}, ...]}
+    
+    Every entry is validated before anything is written. If any entry is
+    invalid, nothing is saved and the 400 response reports each entry. Otherwise
+    all evaluations are written together: marks and student notifications
+    (one per project) each go in a single insert, and grades and statuses of
+    the affected projects are recomputed in memory from the submitted marks.
+    """
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get('evaluations')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "evaluations must be a non-empty list"}), 400
+    max_entries = current_app.config.get("EVALUATION_BATCH_MAX_ENTRIES", 200)
+    if len(entries) > max_entries:
+        return jsonify({"error": f"At most {max_entries} evaluations can be submitted in one batch"}), 400
+    
+    identity = int(get_jwt_identity())
+    results = [{"index": index} for index in range(len(entries))]
+    
+    # Validate each entry's shape and marks
+    valid = []
+    for index, entry in enumerate(entries):
+        try:
+            data = evaluation_batch_entry_schema.load(entry)
+        except ValidationError as err:
+            results[index].update(status="invalid", error="Validation error", details=err.messages)
+            continue
+        evaluation_type = EvaluationType(data['evaluation_type'])
+        results[index].update(project_id=data['project_id'], evaluation_type=evaluation_type.value)
+        try:
+            fields, total_score, total_max_score = _evaluation_fields(evaluation_type, data['marks'])
+            _mark_rows(None, evaluation_type, data['marks'])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            results[index].update(status="invalid", error=f"Invalid marks: {e}")
+            continue
+        valid.append((index, data, evaluation_type, fields, total_score, total_max_score))
+    
+    # Check projects and existing evaluations for all entries at once
+    project_ids = {data['project_id'] for _, data, *_ in valid}
+    projects = {}
+    mark_sums = {}
+    if project_ids:
+        projects = {project.id: project for project in Project.query.options(
+            joinedload(Project.student).joinedload(Student.user)
+        ).filter(Project.id.in_(project_ids)).all()}
+        mark_sums = _evaluations_with_mark_sums(list(project_ids))
+    existing = {(e.project_id, e.evaluation_type) for e in mark_sums}
+    seen = set()
+    for index, data, evaluation_type, *_ in valid:
+        key = (data['project_id'], evaluation_type)
+        if data['project_id'] not in projects:
+            results[index].update(status="invalid", error="Project not found")
+        elif key in existing:
+            results[index].update(status="invalid", error=f"{evaluation_type.value} evaluation already exists for this project. Use PATCH to update it.")
+        elif key in seen:
+            results[index].update(status="invalid", error=f"Duplicate {evaluation_type.value} evaluation for this project in the batch")
+        seen.add(key)
+    
+    invalid_count = sum(1 for result in results if result.get("status") == "invalid")
+    if invalid_count:
+        for result in results:
+            result.setdefault("status", "valid")
+        return jsonify({
+            "error": f"{invalid_count} of {len(entries)} evaluations are invalid; nothing was saved",
+            "results": results
+        }), 400
+    
+    # Create all evaluations
+    created = []
+    for index, data, evaluation_type, fields, total_score, total_max_score in valid:
+        evaluation = Evaluation(
+            project_id=data['project_id'],
+            admin_id=identity,
+            comments=data.get('comments'),
+            **fields
+        )
+        db.session.add(evaluation)
+        mark_sums[evaluation] = (len(data['marks']), total_score, total_max_score)
+        created.append((index, data, evaluation))
+    
+    # Grades, statuses and one notification per affected project
+    notification_rows = []
+    for project_id in sorted(project_ids):
+        project = projects[project_id]
+        overall_percentage = _update_evaluated_project(project, mark_sums)
+        student_user = project.student.user if project.student else None
+        if not student_user:
+            print(f"Warning: Project {project_id} has no associated student user")
+            continue
+        project_created = [evaluation for _, _, evaluation in created if evaluation.project_id == project_id]
+        notification = _evaluation_notification(
+            project, project_created[0].evaluation_type, project_created[0].total_score, overall_percentage
+        )
+        notification_rows.append({
+            'user_id': student_user.id,
+            'title': notification['title'],
+            'message': notification['message'],
+            'type': NotificationType(notification['notification_type']),
+            'action_label': notification['action_label'],
+            'action_url': notification['action_url']
+        })
     
-    # Create notification for student when evaluation is created
     try:
-        # Refresh project to ensure relationships are loaded
-        db.session.refresh(project)
-        # Access student relationship
-        student = project.student
-        if student:
-            # Access user relationship from student
-            student_user = student.user
-            if student_user:
-                # Use the calculated overall_percentage if both evaluations exist
-                if calculated_overall_percentage is not None:
-                    # Both evaluations exist, use overall percentage
-                    score_str = f"{calculated_overall_percentage}%"
-                    notification = create_notification(
-                        user_id=student_user.id,
-                        title="Evaluation Released",
-                        message=f"Your project '{project.title}' has been evaluated. Overall Score: {score_str}",
-                        notification_type="success",
-                        action_label="View evaluation",
-                        action_url="/dashboard#evaluation"  # Link to student dashboard evaluation section
-                    )
-                else:
-                    # Only one evaluation exists, use individual percentage
-                    eval_type_str = evaluation_type.value.lower()
-                    score_str = f"{percentage}%"
-                    notification = create_notification(
-                        user_id=student_user.id,
-                        title="Evaluation Released",
-                        message=f"Your project '{project.title}' has been evaluated ({eval_type_str}). Score: {score_str}",
-                        notification_type="success",
-                        action_label="View evaluation",
-                        action_url="/dashboard#evaluation"  # Link to student dashboard evaluation section
-                    )
-                if not notification:
-                    print(f"Warning: Failed to create notification for student {student_user.id} for evaluation {evaluation.id}")
-            else:
-                print(f"Warning: Student {student.id} has no associated user for project {project_id}")
-        else:
-            print(f"Warning: Project {project_id} has no associated student")
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Error creating notification for evaluation {evaluation.id}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        db.session.flush()
+        mark_rows = [row for _, data, evaluation in created for row in _mark_rows(evaluation.id, evaluation.evaluation_type, data['marks'])]
+        if mark_rows:
+            db.session.execute(insert(EvaluationMark), mark_rows)
+        if notification_rows:
+            db.session.execute(insert(Notification), notification_rows)
+        
+        for index, data, evaluation in created:
+            results[index].update(
+                status="created",
+                evaluation_id=evaluation.id,
+                total_score=evaluation.total_score,
+                overall_percentage=evaluation.overall_percentage,
+                grade=evaluation.grade
+            )
+        draft_keys = [(evaluation.project_id, evaluation.evaluation_type, identity) for _, _, evaluation in created]
+        db.session.commit()
+        draft_buffer.discard(*draft_keys)
+    except IntegrityError:
+        # Another request created one of these evaluations first
+        db.session.rollback()
+        return jsonify({"error": "One of these evaluations was created by another request; nothing was saved"}), 409
+    except StaleDataError:
+        # An existing evaluation being regraded was changed by another request
+        db.session.rollback()
+        return jsonify({"error": "An existing evaluation was changed by another request; nothing was saved"}), 409
     
-    return jsonify(evaluation.to_dict()), 201
+    return jsonify({"created": len(created), "results": results}), 201
 
 @api_bp.route('/evaluations/<int:evaluation_id>', methods=['PATCH'])
 @jwt_required()
 @require_admin_role()
 def update_evaluation(evaluation_id):
-    evaluation = Evaluation.query.get_or_404(evaluation_id)
+    """
+    Update an evaluation's comments and marks
+    
+    Submitted marks are matched to the stored ones by criterion, so only
+    changed marks are updated, new criteria inserted and dropped ones deleted.
+    Scores and the combined grade are recomputed only when a score or max
+    score changed.
+    
+    Clients send the version they edited as an If-Match ETag (or a "version"
+    field). A stale version is rejected with 409 instead of overwriting the
+    other grader's changes; the versioned UPDATE also catches writes that land
+    between the check and the commit.
+    """
+    # Load the student up front so no lazy load autoflushes outside the conflict check below
+    evaluation = Evaluation.query.options(
+        joinedload(Evaluation.project).joinedload(Project.student).joinedload(Student.user)
+    ).get_or_404(evaluation_id)
+    project = evaluation.project
     
     data = request.json
-    if 'comments' in data:
-        evaluation.comments = data['comments']
+    if request.if_match and not request.if_match.star_tag:
+        expected_versions = request.if_match.as_set(include_weak=True)
+    elif data.get('version') is not None:
+        expected_versions = {str(data['version'])}
+    else:
+        expected_versions = None
+    if expected_versions is not None and str(evaluation.version) not in expected_versions:
+        return _evaluation_conflict(evaluation)
     
-    # Update marks if provided
+    scores_changed = marks_changed = False
+    marks = None
     if 'marks' in data:
-        # Delete existing marks
-        EvaluationMark.query.filter_by(evaluation_id=evaluation_id).delete()
-        
-        # Create new marks
-        total_score = 0
-        total_max_score = 0
-        
-        for mark_data in data['marks']:
-            mark = EvaluationMark(
-                evaluation_id=evaluation.id,
-                criterion_name=mark_data['criterion_name'],
-                max_score=mark_data['max_score'],
-                score=mark_data['score'],
-                comments=mark_data.get('comments')
-            )
-            db.session.add(mark)
-            total_score += mark_data['score']
-            total_max_score += mark_data['max_score']
-        
-        # Recalculate total score (as percentage)
-        if total_max_score > 0:
-            evaluation.total_score = round((total_score / total_max_score) * 100, 2)
-        
-        # Update total_project_marks or total_presentation_marks based on evaluation type
-        if evaluation.evaluation_type == EvaluationType.PROJECT:
-            evaluation.total_project_marks = total_score
-        elif evaluation.evaluation_type == EvaluationType.PRESENTATION:
-            evaluation.total_presentation_marks = total_score
-    
-    db.session.commit()
+        # Resolve criteria before changing anything: adding a new criterion flushes the session
+        try:
+            submitted = [{
+                'criterion_name': mark_data['criterion_name'],
+                'max_score': float(mark_data['max_score']),
+                'score': float(mark_data['score']),
+                'comments': mark_data.get('comments')
+            } for mark_data in data['marks']]
+            criterion_ids = [criteria.resolve(evaluation.evaluation_type, mark_data['criterion_name']).id for mark_data in submitted]
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid marks: {e}"}), 400
+        
+        # Stored marks by criterion; repeated criteria are matched in order
+        stored = {}
+        for mark in evaluation.marks.order_by(EvaluationMark.id).all():
+            stored.setdefault(mark.criterion_id, []).append(mark)
+        
+        marks = []
+        for criterion_id, mark_data in zip(criterion_ids, submitted):
+            candidates = stored.get(criterion_id)
+            if candidates:
+                mark = candidates.pop(0)
+                if mark.score != mark_data['score'] or mark.max_score != mark_data['max_score']:
+                    mark.score = mark_data['score']
+                    mark.max_score = mark_data['max_score']
+                    scores_changed = True
+                if mark.comments != mark_data['comments']:
+                    mark.comments = mark_data['comments']
+                    marks_changed = True
+            else:
+                mark = EvaluationMark(
+                    evaluation_id=evaluation.id,
+                    criterion_id=criterion_id,
+                    max_score=mark_data['max_score'],
+                    score=mark_data['score'],
+                    comments=mark_data['comments']
+                )
+                db.session.add(mark)
+                scores_changed = True
+            marks.append(mark)
+        
+        # Criteria no longer submitted
+        for leftover in stored.values():
+            for mark in leftover:
+                db.session.delete(mark)
+                scores_changed = True
     
-    # Recalculate overall percentage and grade if both evaluations exist
-    project = evaluation.project
-    project_evaluations = Evaluation.query.filter_by(project_id=project.id).all()
-    project_eval = next((e for e in project_evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
-    presentation_eval = next((e for e in project_evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
+    if 'comments' in data:
+        evaluation.comments = data['comments']
     
-    # Store overall_percentage for notification
-    calculated_overall_percentage = None
+    if scores_changed or marks_changed:
+        # Mark edits alone do not touch the evaluation row; bump its version anyway
+        evaluation.updated_at = datetime.utcnow()
+    
+    overall_percentage = None
+    if scores_changed:
+        # Recalculate this evaluation's scores from the submitted marks
+        fields, _, _ = _evaluation_fields(evaluation.evaluation_type, submitted)
+        for name, value in fields.items():
+            setattr(evaluation, name, value)
+        
+        # Recalculate overall percentage and grade if both evaluations exist; this
+        # evaluation's sums come from the submitted marks so the changes flush once
+        with db.session.no_autoflush:
+            mark_sums = _evaluations_with_mark_sums([project.id])
+        mark_sums[evaluation] = (
+            len(submitted),
+            sum(mark_data['score'] for mark_data in submitted),
+            sum(mark_data['max_score'] for mark_data in submitted)
+        )
+        project_eval = next((e for e in mark_sums if e.evaluation_type == EvaluationType.PROJECT), None)
+        presentation_eval = next((e for e in mark_sums if e.evaluation_type == EvaluationType.PRESENTATION), None)
+        if project_eval and presentation_eval:
+            overall_percentage = _combine_evaluations(project_eval, presentation_eval, mark_sums)
+    elif evaluation.grade is not None:
+        # Unchanged scores: the grade is only set once both evaluations are combined
+        overall_percentage = evaluation.overall_percentage
+    
+    # Notify the student in the same transaction
+    student_user = project.student.user if project.student else None
+    if student_user:
+        if overall_percentage is not None:
+            message = f"Your project '{project.title}' evaluation has been updated. Overall Score: {overall_percentage}%"
+        else:
+            message = f"Your project '{project.title}' evaluation ({evaluation.evaluation_type.value.lower()}) has been updated. Score: {evaluation.total_score}%"
+        create_notification(
+            user_id=student_user.id,
+            title="Evaluation Updated",
+            message=message,
+            notification_type="info",
+            action_label="View evaluation",
+            action_url="/dashboard#evaluation",  # Link to student dashboard evaluation section
+            commit=False
+        )
+    else:
+        print(f"Warning: Project {project.id} has no associated student user")
     
-    if project_eval and presentation_eval:
-        # Calculate actual total marks from the marks themselves
-        project_total = sum(mark.score for mark in project_eval.marks) if project_eval.marks.count() > 0 else (project_eval.total_project_marks or 0)
-        presentation_total = sum(mark.score for mark in presentation_eval.marks) if presentation_eval.marks.count() > 0 else (presentation_eval.total_presentation_marks or 0)
-        
-        # Calculate max possible marks
-        project_max = sum(mark.max_score for mark in project_eval.marks) if project_eval.marks.count() > 0 else 70
-        presentation_max = sum(mark.max_score for mark in presentation_eval.marks) if presentation_eval.marks.count() > 0 else 30
-        
-        total_marks = project_total + presentation_total
-        total_max_marks = project_max + presentation_max  # Should be 100 (70 + 30)
-        
-        # Calculate overall percentage correctly
-        overall_percentage = round((total_marks / total_max_marks) * 100, 2) if total_max_marks > 0 else 0
-        calculated_overall_percentage = overall_percentage  # Store for notification
-        
-        # Determine grade
-        grade = 'F'
-        if overall_percentage >= 90:
-            grade = 'A'
-        elif overall_percentage >= 80:
-            grade = 'B'
-        elif overall_percentage >= 70:
-            grade = 'C'
-        elif overall_percentage >= 60:
-            grade = 'D'
-        
-        # Update both evaluations with overall percentage and grade
-        project_eval.overall_percentage = overall_percentage
-        project_eval.grade = grade
-        project_eval.total_project_marks = project_total
-        presentation_eval.overall_percentage = overall_percentage
-        presentation_eval.grade = grade
-        presentation_eval.total_presentation_marks = presentation_total
-        
+    try:
+        db.session.flush()
+        result = evaluation.to_dict(marks=marks)
+        draft_key = (project.id, evaluation.evaluation_type, int(get_jwt_identity()))
         db.session.commit()
+        draft_buffer.discard(draft_key)
+    except StaleDataError:
+        db.session.rollback()
+        return _evaluation_conflict(Evaluation.query.get_or_404(evaluation_id))
+    
+    response = jsonify(result)
+    response.set_etag(str(evaluation.version))
+    return response, 200
+
+def _evaluation_conflict(evaluation):
+    """409 for an update made against an old version, with the current one to merge with"""
+    response = jsonify({
+        "error": "This evaluation was changed by another grader. Reload it and apply your changes again.",
+        "current_version": evaluation.version,
+        "evaluation": evaluation.to_dict()
+    })
+    response.set_etag(str(evaluation.version))
+    return response, 409
+
+def _grading_type_param():
+    """EvaluationType from ?type=, or None if missing or unknown"""
+    try:
+        return EvaluationType(request.args.get('type', '').upper())
+    except ValueError:
+        return None
+
+@api_bp.route('/grading/next', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+def get_next_grading_work():
+    """
+    Lease the next projects needing an evaluation of ?type=PROJECT|PRESENTATION
     
-    # Refresh evaluation object to ensure we have the latest data
-    db.session.refresh(evaluation)
-    
-    # Create notification for student when evaluation is updated
+    Returns up to ?n= (default 1) of the oldest submitted projects missing that
+    evaluation, leased to the caller for GRADING_LEASE_SECONDS so other admins
+    are not handed them. Calling again renews the caller's own leases.
+    """
+    evaluation_type = _grading_type_param()
+    if evaluation_type is None:
+        return jsonify({"error": "type must be PROJECT or PRESENTATION"}), 400
+    max_claim = current_app.config.get("GRADING_QUEUE_MAX_CLAIM", 20)
     try:
-        # Refresh project to ensure relationships are loaded
-        project = evaluation.project
-        db.session.refresh(project)
-        # Access student relationship
-        student = project.student
-        if student:
-            # Access user relationship from student
-            student_user = student.user
-            if student_user:
-                # Use the calculated overall_percentage if both evaluations exist
-                if calculated_overall_percentage is not None:
-                    # Both evaluations exist, use overall percentage
-                    score_str = f"{calculated_overall_percentage}%"
-                    notification = create_notification(
-                        user_id=student_user.id,
-                        title="Evaluation Updated",
-                        message=f"Your project '{project.title}' evaluation has been updated. Overall Score: {score_str}",
-                        notification_type="info",
-                        action_label="View evaluation",
-                        action_url="/dashboard#evaluation"  # Link to student dashboard evaluation section
-                    )
-                else:
-                    # Only one evaluation exists, use individual percentage
-                    eval_type_str = evaluation.evaluation_type.value.lower()
-                    score_str = f"{evaluation.total_score}%"
-                    notification = create_notification(
-                        user_id=student_user.id,
-                        title="Evaluation Updated",
-                        message=f"Your project '{project.title}' evaluation ({eval_type_str}) has been updated. Score: {score_str}",
-                        notification_type="info",
-                        action_label="View evaluation",
-                        action_url="/dashboard#evaluation"  # Link to student dashboard evaluation section
-                    )
-                if not notification:
-                    print(f"Warning: Failed to create notification for student {student_user.id} for evaluation {evaluation.id}")
-            else:
-                print(f"Warning: Student {student.id} has no associated user for project {project.id}")
-        else:
-            print(f"Warning: Project {project.id} has no associated student")
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Error creating notification for evaluation update {evaluation.id}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        count = int(request.args.get('n', 1))
+    except ValueError:
+        return jsonify({"error": "n must be an integer"}), 400
+    if not 1 <= count <= max_claim:
+        return jsonify({"error": f"n must be between 1 and {max_claim}"}), 400
+    
+    leased_until, projects = grading_queue.claim(
+        int(get_jwt_identity()),
+        evaluation_type,
+        count,
+        current_app.config.get("GRADING_LEASE_SECONDS", 1800)
+    )
+    response = jsonify({
+        "evaluation_type": evaluation_type.value,
+        "leased_until": leased_until.isoformat(),
+        "projects": projects
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200
+
+@api_bp.route('/grading/leases/<int:project_id>', methods=['DELETE'])
+@jwt_required()
+@require_admin_role()
+def release_grading_lease(project_id):
+    """Hand a leased project back to the queue before the lease expires"""
+    evaluation_type = _grading_type_param()
+    if evaluation_type is None:
+        return jsonify({"error": "type must be PROJECT or PRESENTATION"}), 400
+    if not grading_queue.release(int(get_jwt_identity()), project_id, evaluation_type):
+        return jsonify({"error": "You hold no lease on this project"}), 404
+    return jsonify({"message": "Lease released"}), 200
+
+def _draft_marks(marks):
+    """Validated draft marks (scores may still be blank), or raise ValueError"""
+    if not isinstance(marks, list) or len(marks) > MAX_DRAFT_MARKS:
+        raise ValueError(f"marks must be a list of at most {MAX_DRAFT_MARKS} criteria")
+    cleaned = []
+    for mark in marks:
+        name = mark.get('criterion_name') if isinstance(mark, dict) else None
+        if not isinstance(name, str) or not name.strip() or len(name) > 100:
+            raise ValueError("Each mark needs a criterion_name of at most 100 characters")
+        entry = {'criterion_name': name}
+        for key in ('score', 'max_score'):
+            if key in mark:
+                value = mark[key]
+                if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                    raise ValueError(f"{key} of {name} must be a number")
+                entry[key] = value
+        if 'comments' in mark:
+            if mark['comments'] is not None and not isinstance(mark['comments'], str):
+                raise ValueError(f"comments of {name} must be text")
+            entry['comments'] = mark['comments']
+        cleaned.append(entry)
+    return cleaned
+
+@api_bp.route('/grading/drafts/<int:project_id>', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+def get_evaluation_draft(project_id):
+    """The caller's autosaved draft for ?type= of this project"""
+    evaluation_type = _grading_type_param()
+    if evaluation_type is None:
+        return jsonify({"error": "type must be PROJECT or PRESENTATION"}), 400
+    draft = draft_buffer.get((project_id, evaluation_type, int(get_jwt_identity())))
+    if draft is None:
+        return jsonify({"error": "No draft saved"}), 404
+    return jsonify(draft), 200
+
+@api_bp.route('/grading/drafts/<int:project_id>', methods=['PUT'])
+@jwt_required()
+@require_admin_role()
+def save_evaluation_draft(project_id):
+    """
+    Autosave marks for ?type= of this project
     
-    return jsonify(evaluation.to_dict()), 200
+    Marks are merged into the caller's draft by criterion_name (send
+    "replace": true to replace the whole list) and buffered; they reach the
+    database within DRAFT_FLUSH_SECONDS, so frequent saves stay cheap.
+    """
+    evaluation_type = _grading_type_param()
+    if evaluation_type is None:
+        return jsonify({"error": "type must be PROJECT or PRESENTATION"}), 400
+    data = request.get_json(silent=True) or {}
+    try:
+        marks = _draft_marks(data.get('marks', []))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    comments = data.get('comments')
+    if comments is not None and not isinstance(comments, str):
+        return jsonify({"error": "comments must be text"}), 400
+    
+    draft = draft_buffer.save(
+        (project_id, evaluation_type, int(get_jwt_identity())),
+        marks, comments, replace=bool(data.get('replace'))
+    )
+    if draft is None:
+        return jsonify({"error": "Project not found"}), 404
+    return jsonify(draft), 202
+
+@api_bp.route('/grading/drafts/<int:project_id>', methods=['DELETE'])
+@jwt_required()
+@require_admin_role()
+def discard_evaluation_draft(project_id):
+    """Throw away the caller's draft for ?type= of this project"""
+    evaluation_type = _grading_type_param()
+    if evaluation_type is None:
+        return jsonify({"error": "type must be PROJECT or PRESENTATION"}), 400
+    draft_buffer.discard((project_id, evaluation_type, int(get_jwt_identity())))
+    return jsonify({"message": "Draft discarded"}), 200
 
 # User Management Routes (Admin Only)
 @api_bp.route('/users', methods=['GET'])
 @jwt_required()
 @require_admin_role()
+@use_read_engine()
 def get_users():
     try:
         users = User.query.all()
@@ -1586,15 +1786,27 @@ def delete_user(user_id):
         error_details = traceback.format_exc()
         print(f"Error deleting user: {error_details}")  # Log for debugging
         return jsonify({"error": "Failed to delete user", "details": str(e)}), 500
-@api_bp.route('/analytics/averages', methods=['GET'])
-@jwt_required()
-@require_admin_role()
-def get_average_scores():
-    # Get level from query parameter
-    level_param = request.args.get('level')
-    
-    if level_param:
-        level = ProjectLevel(int(level_param))
+def _analytics_level(level_param):
+    return ProjectLevel(int(level_param)) if level_param else None
+
+
+def _analytics_response(section, builder):
+    """Serve an analytics section from the shared cache, keyed by section and ``level``."""
+    level_param = request.args.get('level') or None
+    try:
+        level = _analytics_level(level_param)
+    except ValueError:
+        return jsonify({"error": "Invalid level parameter. Accepted values: 200 or 400."}), 400
+    return reference_cache.respond(
+        refdata.ANALYTICS,
+        lambda: builder(level),
+        key=(section, level_param),
+        max_age=current_app.config.get("ANALYTICS_CACHE_MAX_AGE", 0),
+    )
+
+
+def _average_scores(level):
+    if level:
         # Filter by project level
         avg_score = db.session.query(
             func.avg(Evaluation.total_score)
@@ -1610,20 +1822,14 @@ def get_average_scores():
         avg_score = db.session.query(func.avg(Evaluation.total_score)).scalar() or 0
         total_evaluations = Evaluation.query.count()
     
-    return jsonify({
+    return {
         'average_score': round(avg_score, 2),
         'total_evaluations': total_evaluations
-    }), 200
+    }
 
-@api_bp.route('/analytics/completion-rate', methods=['GET'])
-@jwt_required()
-@require_admin_role()
-def get_completion_rate():
-    # Get level from query parameter
-    level_param = request.args.get('level')
-    
-    if level_param:
-        level = ProjectLevel(int(level_param))
+
+def _completion_rate(level):
+    if level:
         # Filter by project level
         total_projects = Project.query.filter(Project.level == level).count()
         evaluated_projects = Project.query.filter(
@@ -1635,19 +1841,14 @@ def get_completion_rate():
     
     completion_rate = (evaluated_projects / total_projects * 100) if total_projects > 0 else 0
     
-    return jsonify({
+    return {
         'completion_rate': round(completion_rate, 2),
         'total_projects': total_projects,
         'evaluated_projects': evaluated_projects
-    }), 200
+    }
 
-@api_bp.route('/analytics/performance-by-study-program', methods=['GET'])
-@jwt_required()
-@require_admin_role()
-def get_performance_by_course():
-    # Get level from query parameter
-    level_param = request.args.get('level')
-    
+
+def _performance_by_study_program(level):
     query = db.session.query(
         StudyProgram.name,
         Project.level,
@@ -1658,89 +1859,76 @@ def get_performance_by_course():
     )
     
     # Filter by level if provided
-    if level_param:
-        level = ProjectLevel(int(level_param))
+    if level:
         query = query.filter(Project.level == level)
     
     results = query.group_by(StudyProgram.id, Project.level).all()
     
-    return jsonify([{
+    return [{
         'study_program_name': result.name,
         'level': result.level.value if isinstance(result.level, ProjectLevel) else result.level,
         'average_score': round(result.avg_score, 2),
         'evaluation_count': result.evaluation_count
-    } for result in results]), 200
+    } for result in results]
 
-@api_bp.route('/analytics/pipeline', methods=['GET'])
-@jwt_required()
-@require_admin_role()
-def get_pipeline_data():
-    # Get level from query parameter
-    level_param = request.args.get('level')
+
+def _pipeline_status_value(status_obj):
+    """Convert a project status from a grouped query to its string value"""
+    # SQLAlchemy may return enum in different formats, so we handle all cases
+    status_str = None
+    try:
+        # Method 1: If it's already a ProjectStatus enum, get its value
+        if isinstance(status_obj, ProjectStatus):
+            status_str = status_obj.value
+        # Method 2: If it has a value attribute (enum-like object)
+        elif hasattr(status_obj, 'value'):
+            val = status_obj.value
+            # If value is still an enum, get its value recursively
+            if isinstance(val, ProjectStatus):
+                status_str = val.value
+            else:
+                status_str = str(val)
+        # Method 3: Try to normalize and get value
+        else:
+            normalized = _normalize_status(status_obj)
+            status_str = normalized.value if isinstance(normalized, ProjectStatus) else str(normalized)
+    except Exception:
+        # Ultimate fallback: convert to string
+        status_str = str(status_obj) if status_obj else ''
+        # If string representation looks like enum, try to extract value
+        if status_str.startswith('ProjectStatus.'):
+            try:
+                enum_name = status_str.split('.')[-1]
+                status_str = ProjectStatus[enum_name].value
+            except (KeyError, AttributeError):
+                pass
     
+    # Ensure we have a string, not an enum
+    if not isinstance(status_str, str):
+        status_str = str(status_str)
+    return status_str
+
+
+def _pipeline(level):
     query = db.session.query(
         Project.status,
         func.count(Project.id).label('count')
     )
     
     # Filter by level if provided
-    if level_param:
-        level = ProjectLevel(int(level_param))
+    if level:
         query = query.filter(Project.level == level)
     
     pipeline_data = query.group_by(Project.status).all()
     
     # Convert ProjectStatus enum to string value for JSON serialization
-    # SQLAlchemy may return enum in different formats, so we handle all cases
-    result = []
-    for status_obj, count in pipeline_data:
-        # Convert enum to string - handle all possible representations
-        status_str = None
-        try:
-            # Method 1: If it's already a ProjectStatus enum, get its value
-            if isinstance(status_obj, ProjectStatus):
-                status_str = status_obj.value
-            # Method 2: If it has a value attribute (enum-like object)
-            elif hasattr(status_obj, 'value'):
-                val = status_obj.value
-                # If value is still an enum, get its value recursively
-                if isinstance(val, ProjectStatus):
-                    status_str = val.value
-                else:
-                    status_str = str(val)
-            # Method 3: Try to normalize and get value
-            else:
-                normalized = _normalize_status(status_obj)
-                status_str = normalized.value if isinstance(normalized, ProjectStatus) else str(normalized)
-        except Exception:
-            # Ultimate fallback: convert to string
-            status_str = str(status_obj) if status_obj else ''
-            # If string representation looks like enum, try to extract value
-            if status_str.startswith('ProjectStatus.'):
-                try:
-                    enum_name = status_str.split('.')[-1]
-                    status_str = ProjectStatus[enum_name].value
-                except (KeyError, AttributeError):
-                    pass
-        
-        # Ensure we have a string, not an enum
-        if not isinstance(status_str, str):
-            status_str = str(status_str)
-        
-        result.append({
-            'status': status_str,
-            'count': int(count) if count is not None else 0
-        })
-    
-    return jsonify(result), 200
+    return [{
+        'status': _pipeline_status_value(status_obj),
+        'count': int(count) if count is not None else 0
+    } for status_obj, count in pipeline_data]
 
-@api_bp.route('/analytics/top-projects', methods=['GET'])
-@jwt_required()
-@require_admin_role()
-def get_top_projects():
-    # Get level from query parameter
-    level_param = request.args.get('level')
-    
+
+def _top_projects_query(level):
     query = db.session.query(
         Project.title,
         Project.level,
@@ -1748,22 +1936,373 @@ def get_top_projects():
     ).join(Evaluation).group_by(Project.id)
     
     # Filter by level if provided
-    if level_param:
-        level = ProjectLevel(int(level_param))
+    if level:
         query = query.filter(Project.level == level)
     
-    top_projects = query.order_by(desc('avg_score')).limit(10).all()
-    
-    return jsonify([{
+    return query.order_by(desc('avg_score')).limit(10).all()
+
+
+def _top_projects(level):
+    return [{
         'title': project.title,
         'level': project.level.value,
         'average_score': round(project.avg_score, 2)
-    } for project in top_projects]), 200
+    } for project in _top_projects_query(level)]
+
+
+def _analytics_dashboard(level):
+    """
+    All five analytics sections from two queries: one aggregate grouped by
+    study program, level and status (averages, completion, per-program
+    performance and pipeline are all sums over its rows) plus top projects.
+    """
+    query = db.session.query(
+        Project.study_program_id,
+        StudyProgram.name,
+        Project.level,
+        Project.status,
+        func.count(func.distinct(Project.id)).label('project_count'),
+        func.count(func.distinct(Evaluation.project_id)).label('evaluated_count'),
+        func.count(Evaluation.id).label('evaluation_count'),
+        func.count(Evaluation.total_score).label('scored_count'),
+        func.sum(Evaluation.total_score).label('score_sum'),
+    ).select_from(Project).outerjoin(
+        StudyProgram, StudyProgram.id == Project.study_program_id
+    ).outerjoin(Evaluation, Evaluation.project_id == Project.id)
+    if level:
+        query = query.filter(Project.level == level)
+    groups = query.group_by(Project.study_program_id, StudyProgram.name, Project.level, Project.status).all()
+
+    total_projects = sum(row.project_count for row in groups)
+    evaluated_projects = sum(row.evaluated_count for row in groups)
+    total_evaluations = sum(row.evaluation_count for row in groups)
+    scored = sum(row.scored_count for row in groups)
+    score_sum = sum(row.score_sum or 0 for row in groups)
+
+    pipeline = {}
+    programs = {}
+    for row in groups:
+        status = _pipeline_status_value(row.status)
+        pipeline[status] = pipeline.get(status, 0) + row.project_count
+        if row.study_program_id is None or not row.evaluation_count:
+            continue
+        program = programs.setdefault((row.study_program_id, row.level), {
+            'name': row.name, 'evaluation_count': 0, 'scored_count': 0, 'score_sum': 0
+        })
+        program['evaluation_count'] += row.evaluation_count
+        program['scored_count'] += row.scored_count
+        program['score_sum'] += row.score_sum or 0
+
+    return {
+        'averages': {
+            'average_score': round(score_sum / scored, 2) if scored else 0,
+            'total_evaluations': total_evaluations
+        },
+        'completion_rate': {
+            'completion_rate': round(evaluated_projects / total_projects * 100, 2) if total_projects else 0,
+            'total_projects': total_projects,
+            'evaluated_projects': evaluated_projects
+        },
+        'performance_by_study_program': [{
+            'study_program_name': program['name'],
+            'level': program_level.value if isinstance(program_level, ProjectLevel) else program_level,
+            'average_score': round(program['score_sum'] / program['scored_count'], 2) if program['scored_count'] else None,
+            'evaluation_count': program['evaluation_count']
+        } for (_, program_level), program in programs.items()],
+        'pipeline': [{'status': status, 'count': count} for status, count in pipeline.items()],
+        'top_projects': _top_projects(level),
+    }
+
+
+THROUGHPUT_STAGES = (ProjectStatus.PENDING_APPROVAL, ProjectStatus.SUBMITTED, ProjectStatus.UNDER_REVIEW)
+
+
+def _percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _stage_summary(hours, open_count=0, oldest_open_since=None):
+    hours.sort()
+    return {
+        'completed_count': len(hours),
+        'p50_hours': round(_percentile(hours, 0.5), 2) if hours else None,
+        'p90_hours': round(_percentile(hours, 0.9), 2) if hours else None,
+        'max_hours': round(hours[-1], 2) if hours else None,
+        'open_count': open_count,
+        'oldest_open_since': oldest_open_since.isoformat() if oldest_open_since else None
+    }
+
+
+def _throughput(level):
+    """
+    Time spent in each review stage and grading throughput per evaluator.
+    
+    Stage durations come from project_status_events: LAG over each project's
+    events gives when the project entered the stage it is leaving (its
+    creation for the first event). Projects still in a stage are counted as
+    open with the oldest entry time, so the cached response does not age.
+    """
+    entered_at = func.lag(ProjectStatusEvent.created_at, type_=db.DateTime).over(
+        partition_by=ProjectStatusEvent.project_id,
+        order_by=(ProjectStatusEvent.created_at, ProjectStatusEvent.id)
+    )
+    transitions = db.session.query(
+        ProjectStatusEvent.from_status,
+        ProjectStatusEvent.created_at,
+        entered_at.label('entered_at'),
+        Project.created_at.label('project_created_at'),
+        Project.level,
+        StudyProgram.name
+    ).join(Project, Project.id == ProjectStatusEvent.project_id).outerjoin(
+        StudyProgram, StudyProgram.id == Project.study_program_id
+    )
+    if level:
+        transitions = transitions.filter(Project.level == level)
+    
+    last_change = db.session.query(
+        ProjectStatusEvent.project_id,
+        func.max(ProjectStatusEvent.created_at).label('changed_at')
+    ).group_by(ProjectStatusEvent.project_id).subquery()
+    open_query = db.session.query(
+        Project.status,
+        Project.level,
+        StudyProgram.name,
+        func.count(Project.id),
+        func.min(func.coalesce(last_change.c.changed_at, Project.created_at))
+    ).outerjoin(last_change, last_change.c.project_id == Project.id).outerjoin(
+        StudyProgram, StudyProgram.id == Project.study_program_id
+    ).filter(Project.status.in_(THROUGHPUT_STAGES))
+    if level:
+        open_query = open_query.filter(Project.level == level)
+    
+    # Durations in hours, per (stage, level, program) and per stage
+    groups = {}
+    totals = {stage: [] for stage in THROUGHPUT_STAGES}
+    for row in transitions.all():
+        if row.from_status not in totals:
+            continue
+        started = row.entered_at or row.project_created_at
+        if not started:
+            continue
+        hours = max((row.created_at - started).total_seconds(), 0) / 3600
+        groups.setdefault((row.from_status, row.level, row.name), []).append(hours)
+        totals[row.from_status].append(hours)
+    
+    open_groups = {}
+    open_totals = {}
+    for status, project_level, program_name, count, oldest in open_query.group_by(
+        Project.status, Project.level, StudyProgram.name
+    ).all():
+        open_groups[(status, project_level, program_name)] = (count, oldest)
+        total_count, total_oldest = open_totals.get(status, (0, None))
+        open_totals[status] = (total_count + count, min(filter(None, (total_oldest, oldest)), default=None))
+    
+    stages = []
+    for key in sorted(set(groups) | set(open_groups), key=lambda k: (THROUGHPUT_STAGES.index(k[0]), k[1].value, k[2] or '')):
+        stage, project_level, program_name = key
+        stages.append({
+            'stage': stage.value,
+            'level': project_level.value,
+            'study_program_name': program_name,
+            **_stage_summary(groups.get(key, []), *open_groups.get(key, (0, None)))
+        })
+    
+    # Grading throughput per evaluator per day
+    day = func.date(Evaluation.created_at)
+    grading = db.session.query(
+        Evaluation.admin_id,
+        User.name,
+        day.label('day'),
+        func.count(Evaluation.id),
+        func.count(func.distinct(Evaluation.project_id))
+    ).join(User, User.id == Evaluation.admin_id)
+    if level:
+        grading = grading.join(Project, Project.id == Evaluation.project_id).filter(Project.level == level)
+    grading = grading.group_by(Evaluation.admin_id, User.name, day).order_by(day, Evaluation.admin_id).all()
+    
+    evaluators = {}
+    for admin_id, name, _, evaluation_count, _ in grading:
+        evaluator = evaluators.setdefault(admin_id, {'evaluator_id': admin_id, 'evaluator_name': name, 'evaluations': 0, 'active_days': 0})
+        evaluator['evaluations'] += evaluation_count
+        evaluator['active_days'] += 1
+    for evaluator in evaluators.values():
+        evaluator['evaluations_per_active_day'] = round(evaluator['evaluations'] / evaluator['active_days'], 2)
+    
+    return {
+        'stages': stages,
+        'stage_totals': [{
+            'stage': stage.value,
+            **_stage_summary(totals[stage], *open_totals.get(stage, (0, None)))
+        } for stage in THROUGHPUT_STAGES],
+        'grading_by_day': [{
+            'evaluator_id': admin_id,
+            'evaluator_name': name,
+            'date': str(graded_on),
+            'evaluations': evaluation_count,
+            'projects': project_count
+        } for admin_id, name, graded_on, evaluation_count, project_count in grading],
+        'evaluators': sorted(evaluators.values(), key=lambda e: -e['evaluations'])
+    }
+
+
+# Equal-width histogram bins over score / max_score; the last bin includes 1.0
+CRITERIA_HISTOGRAM_BINS = 10
+
+
+def _weighted_percentile(frequencies, total, fraction):
+    """_percentile over sorted (value, count) pairs, without expanding them"""
+    position = (total - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, total - 1)
+    seen = 0
+    lower_value = upper_value = None
+    for value, count in frequencies:
+        seen += count
+        if lower_value is None and lower < seen:
+            lower_value = value
+        if upper < seen:
+            upper_value = value
+            break
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+
+def _criteria_analytics(level):
+    """
+    Score distribution of every criterion per study program and level.
+
+    One query groups marks by criterion, program, level and (score,
+    max_score); rubric scores take few distinct values, so this returns a
+    small frequency table rather than one row per mark. Mean, median,
+    standard deviation and the histogram of score / max_score are all exact
+    over that table.
+    """
+    query = db.session.query(
+        EvaluationMark.criterion_id,
+        Project.study_program_id,
+        StudyProgram.name,
+        Project.level,
+        EvaluationMark.score,
+        EvaluationMark.max_score,
+        func.count().label('count')
+    ).select_from(EvaluationMark).join(
+        Evaluation, Evaluation.id == EvaluationMark.evaluation_id
+    ).join(Project, Project.id == Evaluation.project_id).outerjoin(
+        StudyProgram, StudyProgram.id == Project.study_program_id
+    ).filter(EvaluationMark.max_score > 0)
+    if level:
+        query = query.filter(Project.level == level)
+    rows = query.group_by(
+        EvaluationMark.criterion_id, Project.study_program_id, StudyProgram.name, Project.level,
+        EvaluationMark.score, EvaluationMark.max_score
+    ).all()
+
+    groups = {}
+    for criterion_id, program_id, program_name, project_level, score, max_score, count in rows:
+        groups.setdefault((criterion_id, program_id, program_name, project_level), []).append((score / max_score, count))
+
+    results = []
+    for (criterion_id, program_id, program_name, project_level), frequencies in groups.items():
+        frequencies.sort()
+        total = sum(count for _, count in frequencies)
+        mean = sum(ratio * count for ratio, count in frequencies) / total
+        variance = sum((ratio - mean) ** 2 * count for ratio, count in frequencies) / total
+        histogram = [0] * CRITERIA_HISTOGRAM_BINS
+        for ratio, count in frequencies:
+            # Rounded first so a ratio on a bin edge (e.g. 3/10) is not floored into the bin below
+            histogram[min(max(int(round(ratio * CRITERIA_HISTOGRAM_BINS, 9)), 0), CRITERIA_HISTOGRAM_BINS - 1)] += count
+        criterion = criteria.by_id(criterion_id)
+        results.append({
+            'criterion_id': criterion_id,
+            'criterion_name': criterion.name if criterion else None,
+            'evaluation_type': criterion.evaluation_type.value if criterion else None,
+            'study_program_id': program_id,
+            'study_program_name': program_name,
+            'level': project_level.value,
+            'count': total,
+            'mean': round(mean, 4),
+            'median': round(_weighted_percentile(frequencies, total, 0.5), 4),
+            'std_dev': round(variance ** 0.5, 4),
+            'histogram': histogram
+        })
+
+    results.sort(key=lambda r: (r['study_program_name'] or '', r['level'], r['evaluation_type'] or '', r['criterion_name'] or ''))
+    return {
+        'bins': [round(edge / CRITERIA_HISTOGRAM_BINS, 2) for edge in range(CRITERIA_HISTOGRAM_BINS + 1)],
+        'criteria': results
+    }
+
+
+@api_bp.route('/analytics/averages', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_average_scores():
+    return _analytics_response('averages', _average_scores)
+
+@api_bp.route('/analytics/completion-rate', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_completion_rate():
+    return _analytics_response('completion-rate', _completion_rate)
+
+@api_bp.route('/analytics/performance-by-study-program', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_performance_by_course():
+    return _analytics_response('performance-by-study-program', _performance_by_study_program)
+
+@api_bp.route('/analytics/pipeline', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_pipeline_data():
+    return _analytics_response('pipeline', _pipeline)
+
+@api_bp.route('/analytics/top-projects', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_top_projects():
+    return _analytics_response('top-projects', _top_projects)
+
+@api_bp.route('/analytics/dashboard', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_analytics_dashboard():
+    """Averages, completion rate, per-program performance, pipeline and top projects in one response"""
+    return _analytics_response('dashboard', _analytics_dashboard)
+
+@api_bp.route('/analytics/throughput', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_throughput():
+    """Percentile time-in-stage per level/program and grading throughput per evaluator per day"""
+    return _analytics_response('throughput', _throughput)
+
+@api_bp.route('/analytics/criteria', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+def get_criteria_analytics():
+    """Mean, median, standard deviation and histogram of score / max_score per criterion per program and level"""
+    return _analytics_response('criteria', _criteria_analytics)
 
 
 @api_bp.route('/reports/summary', methods=['GET'])
 @jwt_required()
 @require_admin_role()
+@use_read_engine()
+@statement_timeout("DB_REPORT_STATEMENT_TIMEOUT_MS")
 def get_report_summary():
     level_param = request.args.get('level')
     start_date = request.args.get('start_date')
@@ -1780,6 +2319,8 @@ def get_report_summary():
 @api_bp.route('/reports/export', methods=['GET'])
 @jwt_required()
 @require_admin_role()
+@use_read_engine()
+@statement_timeout("DB_REPORT_STATEMENT_TIMEOUT_MS")
 def export_report():
     level_param = request.args.get('level')
     start_date = request.args.get('start_date')
@@ -1795,12 +2336,24 @@ def export_report():
             response.headers['Content-Type'] = 'text/csv'
             return response
         elif export_format == 'pdf':
-            pdf_payload = _report_summary_to_pdf(summary)
-            response = make_response(pdf_payload)
+            try:
+                pdf_key, pdf_path = get_report_pdf(summary, current_app.config)
+            except RenderQueueFull:
+                return jsonify({"error": "Report renderer is busy. Please try again shortly."}), 503
+            except FutureTimeoutError:
+                return jsonify({"error": "Report rendering timed out"}), 504
+            except BrokenProcessPool:
+                print("Warning: A PDF render worker died; the render pool will be rebuilt")
+                return jsonify({"error": "Report renderer restarted. Please try again shortly."}), 503
             timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-            response.headers['Content-Disposition'] = f'attachment; filename=evaluation-report-{timestamp}.pdf'
-            response.headers['Content-Type'] = 'application/pdf'
-            return response
+            return send_file(
+                pdf_path,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=f'evaluation-report-{timestamp}.pdf',
+                # The mtime changes on every cache hit (LRU touch); the content hash does not
+                etag=pdf_key
+            )
         elif export_format == 'json':
             return jsonify(summary), 200
         else:
@@ -1810,12 +2363,146 @@ def export_report():
     except Exception:
         return jsonify({"error": "Failed to export report"}), 500
 
+def _load_transcripts(level=None, study_program_id=None):
+    """
+    Load everything needed for per-student result sheets in three queries
+    (projects with student/user/program, their evaluations, and their marks)
+    and return plain dicts that can be sent to worker processes.
+    """
+    conditions = []
+    if level:
+        conditions.append(Project.level == level)
+    if study_program_id:
+        conditions.append(Project.study_program_id == study_program_id)
+
+    rows = db.session.query(Project, Student, User, StudyProgram)\
+        .join(Student, Project.student_id == Student.id)\
+        .join(User, Student.user_id == User.id)\
+        .join(StudyProgram, Project.study_program_id == StudyProgram.id)\
+        .filter(*conditions)\
+        .order_by(StudyProgram.code, User.name, Project.id).all()
+
+    evaluations_by_project = {}
+    evaluations = Evaluation.query.join(Project, Evaluation.project_id == Project.id)\
+        .filter(*conditions)\
+        .order_by(Evaluation.created_at.desc()).all()
+    for evaluation in evaluations:
+        evaluations_by_project.setdefault(evaluation.project_id, []).append(evaluation)
+
+    marks_by_evaluation = {}
+    marks = EvaluationMark.query.join(Evaluation, EvaluationMark.evaluation_id == Evaluation.id)\
+        .join(Project, Evaluation.project_id == Project.id)\
+        .filter(*conditions)\
+        .order_by(EvaluationMark.id).all()
+    for mark in marks:
+        marks_by_evaluation.setdefault(mark.evaluation_id, []).append(mark)
+
+    transcripts = []
+    for project, student, user, study_program in rows:
+        registration = student.student_id or f"student-{student.id}"
+        transcripts.append({
+            "filename": f"{study_program.code}/{registration}-project-{project.id}.pdf",
+            "student_name": user.name,
+            "student_registration": student.student_id,
+            "study_program": study_program.name,
+            "level": project.level.value,
+            "project_title": project.title,
+            "status": project.status_value,
+            "evaluation": build_evaluation_details(
+                evaluations_by_project.get(project.id, []),
+                marks_by_evaluation
+            )
+        })
+    return transcripts
+
+
+@api_bp.route('/reports/transcripts', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+@use_read_engine()
+@statement_timeout("DB_REPORT_STATEMENT_TIMEOUT_MS")
+def export_transcripts():
+    """Stream a ZIP of per-student result sheets, optionally filtered by level and study program"""
+    level = None
+    level_param = request.args.get('level')
+    if level_param:
+        try:
+            level = ProjectLevel(int(level_param))
+        except ValueError:
+            return jsonify({"error": "Invalid level parameter. Accepted values: 200 or 400."}), 400
+
+    study_program_id = request.args.get('study_program_id', type=int)
+    if study_program_id and not StudyProgram.query.get(study_program_id):
+        return jsonify({"error": "Study program not found"}), 404
+
+    try:
+        transcripts = _load_transcripts(level, study_program_id)
+    except Exception:
+        return jsonify({"error": "Failed to load transcripts"}), 500
+
+    config = current_app.config
+    job_store = ReportJobStore(config["REPORT_JOB_DIR"])
+    job = job_store.create(
+        "transcripts",
+        len(transcripts),
+        started_by=int(get_jwt_identity()),
+        filters={"level": level.value if level else None, "study_program_id": study_program_id}
+    )
+
+    timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    response = Response(
+        stream_transcript_zip(
+            transcripts,
+            job_store,
+            job,
+            config["REPORT_TRANSCRIPT_WORKERS"],
+            config["REPORT_RENDER_START_METHOD"]
+        ),
+        mimetype='application/zip'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=result-sheets-{timestamp}.zip'
+    response.headers['X-Job-Id'] = job["id"]
+    return response
+
+
+@api_bp.route('/reports/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+def get_report_job(job_id):
+    """Get progress of a report job such as a transcript export"""
+    job = ReportJobStore(current_app.config["REPORT_JOB_DIR"]).get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+# Health Details Routes (Admin Only)
+@api_bp.route('/health/details', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+def get_health_details():
+    """Effective database settings and startup phase timings (the public /api/health only says ok)"""
+    try:
+        database = database_status()
+    except Exception as e:
+        database = {"error": str(e)}
+    return jsonify({"status": "ok", "database": database, "startup": current_app.extensions.get("startup_timings")}), 200
+
+@api_bp.route('/health/pool', methods=['GET'])
+@jwt_required()
+@require_admin_role()
+def get_pool_health():
+    """Connection pool checkout waits and saturation, per engine"""
+    return jsonify(pool_metrics()), 200
+
 # Deadline Management Routes
 @api_bp.route('/deadlines', methods=['GET'])
 def get_deadlines():
     try:
-        deadlines = Deadline.query.all()
-        return jsonify([deadline.to_dict() for deadline in deadlines]), 200
+        return reference_cache.respond(
+            refdata.DEADLINES,
+            lambda: [deadline.to_dict() for deadline in Deadline.query.order_by(Deadline.id).all()],
+            public=True
+        )
     except Exception as e:
         return jsonify({"error": "Failed to fetch deadlines"}), 500
 
@@ -1842,6 +2529,9 @@ def create_deadline():
             # Update existing deadline
             existing.deadline = datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
             existing.updated_at = datetime.utcnow()
+            db.session.flush()
+            recompute_lateness(level)
+            reference_cache.bump(refdata.DEADLINES)
             db.session.commit()
             return jsonify(existing.to_dict()), 200
         
@@ -1851,6 +2541,9 @@ def create_deadline():
             deadline=datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
         )
         db.session.add(deadline)
+        db.session.flush()
+        recompute_lateness(level)
+        reference_cache.bump(refdata.DEADLINES)
         db.session.commit()
         return jsonify(deadline.to_dict()), 201
     except Exception as e:
@@ -1865,6 +2558,9 @@ def update_deadline(deadline_id):
         
         deadline.deadline = datetime.fromisoformat(data['deadline'].replace('Z', '+00:00'))
         deadline.updated_at = datetime.utcnow()
+        db.session.flush()
+        recompute_lateness(deadline.level)
+        reference_cache.bump(refdata.DEADLINES)
         db.session.commit()
         
         return jsonify(deadline.to_dict()), 200
@@ -1872,83 +2568,126 @@ def update_deadline(deadline_id):
         db.session.rollback()
         return jsonify({"error": "Failed to update deadline"}), 500
 
+def _missed_deadlines_query(now, level=None):
+    """
+    Projects whose level deadline has passed and that were never submitted or
+    were submitted late, with student and program columns joined in. Lateness
+    comes from the stored is_late flag rather than a per-row comparison.
+    """
+    query = db.session.query(
+        Project.id.label('project_id'),
+        Project.title.label('project_title'),
+        Project.level,
+        Project.submitted_at,
+        User.id.label('student_id'),
+        User.name.label('student_name'),
+        User.email.label('student_email'),
+        Student.student_id.label('student_registration'),
+        StudyProgram.name.label('study_program'),
+        Deadline.deadline
+    ).join(Deadline, Deadline.level == Project.level)\
+        .join(Student, Project.student_id == Student.id)\
+        .join(User, Student.user_id == User.id)\
+        .outerjoin(StudyProgram, Project.study_program_id == StudyProgram.id)\
+        .filter(
+            Deadline.deadline < now,
+            or_(Project.submitted_at.is_(None), Project.is_late.is_(True))
+        )
+
+    if level:
+        query = query.filter(Project.level == level)
+
+    return query.order_by(Project.level, Project.id)
+
+
+def _missed_deadline_row(row, now):
+    return {
+        'project_id': row.project_id,
+        'project_title': row.project_title,
+        'student_id': row.student_id,
+        'student_name': row.student_name,
+        'student_email': row.student_email,
+        'student_registration': row.student_registration,
+        'study_program': row.study_program,
+        'submitted_at': row.submitted_at.isoformat() if row.submitted_at else None,
+        'deadline': row.deadline.isoformat(),
+        'days_overdue': (now - row.deadline).days
+    }
+
+
 @api_bp.route('/deadlines/missed', methods=['GET'])
 @jwt_required()
 @require_admin_role()
+@use_read_engine()
 def get_missed_deadlines():
-    """Get list of students who missed deadlines for each level"""
+    """
+    Get list of students who missed deadlines for each level
+    
+    Query params:
+        level: optional 200 or 400
+        page, per_page: optional pagination over the combined list
+        format: 'json' (default) or 'csv' for a streamed CSV export
+    """
     try:
         now = datetime.utcnow()
+        
+        level = None
+        level_param = request.args.get('level')
+        if level_param:
+            try:
+                level = ProjectLevel(int(level_param))
+            except ValueError:
+                return jsonify({"error": "Invalid level parameter. Accepted values: 200 or 400."}), 400
+        
+        query = _missed_deadlines_query(now, level)
+        
+        if (request.args.get('format') or 'json').lower() == 'csv':
+            def generate():
+                output = StringIO()
+                writer = csv.writer(output)
+                writer.writerow([
+                    'Level', 'Project ID', 'Project Title', 'Student Name', 'Student Email',
+                    'Registration Number', 'Study Program', 'Submitted At', 'Deadline', 'Days Overdue'
+                ])
+                for row in query.yield_per(500):
+                    item = _missed_deadline_row(row, now)
+                    writer.writerow([
+                        row.level.value, item['project_id'], item['project_title'], item['student_name'],
+                        item['student_email'], item['student_registration'] or '', item['study_program'] or '',
+                        item['submitted_at'] or '', item['deadline'], item['days_overdue']
+                    ])
+                    if output.tell() > 64 * 1024:
+                        yield output.getvalue()
+                        output.seek(0)
+                        output.truncate(0)
+                yield output.getvalue()
+            
+            response = Response(stream_with_context(generate()), mimetype='text/csv')
+            timestamp = now.strftime('%Y%m%d%H%M%S')
+            response.headers['Content-Disposition'] = f'attachment; filename=missed-deadlines-{timestamp}.csv'
+            return response
+        
         result = {
             'level_200': [],
             'level_400': []
         }
         
-        # Get deadlines for each level
-        deadline_200 = Deadline.query.filter_by(level=ProjectLevel.LEVEL_200).first()
-        deadline_400 = Deadline.query.filter_by(level=ProjectLevel.LEVEL_400).first()
-        
-        # Check Level 200 projects
-        if deadline_200 and deadline_200.deadline < now:
-            # Get all projects at level 200
-            projects_200 = Project.query.filter_by(level=ProjectLevel.LEVEL_200).all()
-            for project in projects_200:
-                student = project.student
-                student_user = getattr(student, 'user', None)
-                
-                # Student missed deadline if:
-                # 1. They haven't submitted (submitted_at is None), OR
-                # 2. They submitted after the deadline
-                missed = False
-                if not project.submitted_at:
-                    missed = True
-                elif project.submitted_at > deadline_200.deadline:
-                    missed = True
-                
-                if missed and student_user:
-                    result['level_200'].append({
-                        'project_id': project.id,
-                        'project_title': project.title,
-                        'student_id': student_user.id,
-                        'student_name': student_user.name,
-                        'student_email': student_user.email,
-                        'student_registration': student.student_id if student else None,
-                        'study_program': project.study_program.name if project.study_program else None,
-                        'submitted_at': project.submitted_at.isoformat() if project.submitted_at else None,
-                        'deadline': deadline_200.deadline.isoformat(),
-                        'days_overdue': (now - deadline_200.deadline).days
-                    })
-        
-        # Check Level 400 projects
-        if deadline_400 and deadline_400.deadline < now:
-            # Get all projects at level 400
-            projects_400 = Project.query.filter_by(level=ProjectLevel.LEVEL_400).all()
-            for project in projects_400:
-                student = project.student
-                student_user = getattr(student, 'user', None)
-                
-                # Student missed deadline if:
-                # 1. They haven't submitted (submitted_at is None), OR
-                # 2. They submitted after the deadline
-                missed = False
-                if not project.submitted_at:
-                    missed = True
-                elif project.submitted_at > deadline_400.deadline:
-                    missed = True
-                
-                if missed and student_user:
-                    result['level_400'].append({
-                        'project_id': project.id,
-                        'project_title': project.title,
-                        'student_id': student_user.id,
-                        'student_name': student_user.name,
-                        'student_email': student_user.email,
-                        'student_registration': student.student_id if student else None,
-                        'study_program': project.study_program.name if project.study_program else None,
-                        'submitted_at': project.submitted_at.isoformat() if project.submitted_at else None,
-                        'deadline': deadline_400.deadline.isoformat(),
-                        'days_overdue': (now - deadline_400.deadline).days
-                    })
+        if 'page' in request.args or 'per_page' in request.args:
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+            total = query.order_by(None).count()
+            rows = query.limit(per_page).offset((page - 1) * per_page).all()
+            result.update({
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'current_page': page,
+                'per_page': per_page
+            })
+        else:
+            rows = query.all()
+        
+        for row in rows:
+            result[f'level_{row.level.value}'].append(_missed_deadline_row(row, now))
         
         return jsonify(result), 200
         
@@ -1960,8 +2699,8 @@ def get_missed_deadlines():
         return jsonify({"error": "Failed to fetch missed deadlines", "details": str(e)}), 500
 
 # Notification Helper Functions
-def create_notification(user_id=None, audience=None, title="", message="", notification_type="info", action_label=None, action_url=None):
-    """Helper function to create a notification"""
+def create_notification(user_id=None, audience=None, title="", message="", notification_type="info", action_label=None, action_url=None, commit=True):
+    """Helper function to create a notification (commit=False adds it to the caller's transaction)"""
     try:
         notification = Notification(
             user_id=user_id,
@@ -1973,10 +2712,12 @@ def create_notification(user_id=None, audience=None, title="", message="", notif
             action_url=action_url
         )
         db.session.add(notification)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return notification
     except Exception as e:
-        db.session.rollback()
+        if commit:
+            db.session.rollback()
         print(f"Error creating notification: {str(e)}")
         return None
 
@@ -2190,6 +2931,7 @@ def submit_project(project_id):
         if 'documentation_link' in data:
             project.documentation_link = data.get('documentation_link')
         project.submitted_at = datetime.utcnow()
+        apply_submission_lateness(project)
         success, error = update_project_status(project, ProjectStatus.SUBMITTED)
         if not success:
             db.session.rollback()
@@ -2275,21 +3017,64 @@ def create_detailed_evaluation():
 # Student Dashboard Endpoints
 # ============================================================================
 
-def get_current_student():
-    """Helper function to get current student profile from JWT token"""
-    current_user_id = get_jwt_identity()
+def get_current_student(user_id=None):
+    """Helper function to get current student profile from JWT token (or the given user id)"""
+    current_user_id = user_id if user_id is not None else get_jwt_identity()
     try:
         current_user_id = int(current_user_id)
     except (ValueError, TypeError):
         return None, None
     
-    current_user = User.query.get(current_user_id)
-    if not current_user or current_user.role != UserRole.STUDENT:
+    # User and student profile in one query
+    row = db.session.query(User, Student).outerjoin(
+        Student, Student.user_id == User.id
+    ).filter(User.id == current_user_id).first()
+    if not row or row[0].role != UserRole.STUDENT:
         return None, None
     
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    current_user, student = row
     return current_user, student
 
+def load_student_project(student_id, project_id=None):
+    """
+    Load a student's project with everything the student pages show, in two queries:
+    the project joined with its study program and level deadline, then its
+    evaluations outer-joined with their marks.
+    
+    Args:
+        student_id: Student profile id (ownership filter)
+        project_id: Specific project, or None for the student's project
+    
+    Returns:
+        tuple: (project, deadline, evaluations newest first, marks_by_evaluation),
+        or (None, None, [], {}) if the student has no such project
+    """
+    query = db.session.query(Project, Deadline).outerjoin(
+        Deadline, Deadline.level == Project.level
+    ).options(joinedload(Project.study_program)).filter(Project.student_id == student_id)
+    if project_id is not None:
+        query = query.filter(Project.id == project_id)
+    row = query.first()
+    if not row:
+        return None, None, [], {}
+    project, deadline = row
+    
+    rows = db.session.query(Evaluation, EvaluationMark).outerjoin(
+        EvaluationMark, EvaluationMark.evaluation_id == Evaluation.id
+    ).filter(Evaluation.project_id == project.id).order_by(
+        Evaluation.created_at.desc(), EvaluationMark.id
+    ).all()
+    evaluations = []
+    marks_by_evaluation = {}
+    for evaluation, mark in rows:
+        if evaluation.id not in marks_by_evaluation:
+            evaluations.append(evaluation)
+            marks_by_evaluation[evaluation.id] = []
+        if mark is not None:
+            marks_by_evaluation[evaluation.id].append(mark)
+    
+    return project, deadline, evaluations, marks_by_evaluation
+
 def verify_project_ownership(project_id, student_id):
     """Verify that a project belongs to a student"""
     project = Project.query.get(project_id)
@@ -2361,16 +3146,58 @@ def update_project_status(project, new_status):
     if new_status not in valid_transitions.get(current_status, []):
         return False, f"Invalid status transition from {current_status.value} to {new_status.value}"
     
-    # Update status
+    # Update status and record the change
+    changed_at = datetime.utcnow()
     project.status = new_status
-    project.updated_at = datetime.utcnow()
+    project.updated_at = changed_at
+    db.session.add(ProjectStatusEvent(
+        project=project,
+        from_status=current_status,
+        to_status=new_status,
+        created_at=changed_at
+    ))
     
     return True, None
 
-def calculate_status_timeline(project):
+def project_status_history(project_id):
+    """
+    When a project last entered each status, from project_status_events
+    
+    Returns:
+        dict: ProjectStatus -> datetime
+    """
+    rows = db.session.query(
+        ProjectStatusEvent.to_status, func.max(ProjectStatusEvent.created_at)
+    ).filter(ProjectStatusEvent.project_id == project_id).group_by(ProjectStatusEvent.to_status).all()
+    return {status: changed_at for status, changed_at in rows}
+
+def derived_status_history(project):
+    """
+    Status history of a project with no status events (changed before they
+    were recorded, on a database whose events were never backfilled):
+    submitted at submitted_at, under review at the first evaluation and
+    evaluated once both evaluation types exist
+    """
+    history = {ProjectStatus.SUBMITTED: project.submitted_at}
+    first_at, last_at, type_count = db.session.query(
+        func.min(Evaluation.created_at),
+        func.max(Evaluation.created_at),
+        func.count(func.distinct(Evaluation.evaluation_type))
+    ).filter(Evaluation.project_id == project.id).one()
+    if first_at:
+        history[ProjectStatus.UNDER_REVIEW] = first_at
+    if type_count == 2:
+        history[ProjectStatus.EVALUATED] = last_at
+    return history
+
+def calculate_status_timeline(project, history=None):
     """
     Calculate project status timeline in the new format
     
+    Args:
+        project: Project instance
+        history: project_status_history(project.id) if already loaded (queried otherwise)
+    
     Returns:
         dict: Timeline with submitted, under_review, and evaluated stages
     """
@@ -2383,6 +3210,11 @@ def calculate_status_timeline(project):
         except (ValueError, AttributeError):
             current_status = ProjectStatus.DRAFT
     
+    if history is None:
+        history = project_status_history(project.id)
+    if not history and project.submitted_at:
+        history = derived_status_history(project)
+    
     timeline = {
         "submitted": {"status": "pending", "date": None},
         "under_review": {"status": "pending", "date": None},
@@ -2390,56 +3222,62 @@ def calculate_status_timeline(project):
     }
     
     # Submitted stage
-    if project.submitted_at:
+    submitted_at = history.get(ProjectStatus.SUBMITTED)
+    if submitted_at:
         timeline["submitted"] = {
             "status": "completed",
-            "date": project.submitted_at.isoformat()
+            "date": submitted_at.isoformat()
         }
     
-    # Under review stage - triggered when first evaluation is created
-    evaluations = project.evaluations.all()
-    if evaluations:
-        first_eval = min(evaluations, key=lambda e: e.created_at)
-        if current_status == ProjectStatus.UNDER_REVIEW:
-            timeline["under_review"] = {
-                "status": "current",
-                "date": first_eval.created_at.isoformat()
-            }
-        elif current_status in [ProjectStatus.EVALUATED, ProjectStatus.REJECTED]:
-            timeline["under_review"] = {
-                "status": "completed",
-                "date": first_eval.created_at.isoformat()
-            }
-        else:
-            # If evaluations exist but status is still submitted, mark as current
-            timeline["under_review"] = {
-                "status": "current",
-                "date": first_eval.created_at.isoformat()
-            }
-    
-    # Evaluated stage - both PROJECT and PRESENTATION evaluations must exist
-    project_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
-    pres_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
+    # Under review stage - entered when the first evaluation is created
+    under_review_at = history.get(ProjectStatus.UNDER_REVIEW)
+    if under_review_at:
+        timeline["under_review"] = {
+            "status": "completed" if current_status in [ProjectStatus.EVALUATED, ProjectStatus.REJECTED] else "current",
+            "date": under_review_at.isoformat()
+        }
     
-    if project_eval and pres_eval:
-        latest_eval = max(project_eval, pres_eval, key=lambda e: e.created_at)
+    # Evaluated stage - entered once both PROJECT and PRESENTATION evaluations exist
+    evaluated_at = history.get(ProjectStatus.EVALUATED)
+    if evaluated_at:
         timeline["evaluated"] = {
             "status": "completed",
-            "date": latest_eval.created_at.isoformat()
+            "date": evaluated_at.isoformat()
         }
-    elif project_eval or pres_eval:
+    elif under_review_at and current_status == ProjectStatus.UNDER_REVIEW:
         # One evaluation exists but not both
-        existing_eval = project_eval or pres_eval
         timeline["evaluated"] = {
             "status": "current",
-            "date": existing_eval.created_at.isoformat()
+            "date": under_review_at.isoformat()
         }
     
     return timeline
 
-def get_project_evaluation_details(project):
-    """Get detailed evaluation breakdown for a project"""
-    evaluations = project.evaluations.order_by(Evaluation.created_at.desc()).all()
+def timeline_progress(timeline):
+    """
+    Summarize a status timeline
+    
+    Returns:
+        tuple: (current_stage: str or None, progress_percentage: int)
+    """
+    stages = list(timeline)
+    completed = [stage for stage in stages if timeline[stage]["status"] == "completed"]
+    current = next((stage for stage in stages if timeline[stage]["status"] == "current"), None)
+    if current is None and completed:
+        current = completed[-1]
+    return current, round(len(completed) * 100 / len(stages))
+
+def build_evaluation_details(evaluations, marks_by_evaluation):
+    """
+    Build the evaluation breakdown from already-loaded rows
+    
+    Args:
+        evaluations: Evaluation instances for one project, newest first
+        marks_by_evaluation: dict mapping evaluation id to its list of EvaluationMark rows
+    
+    Returns:
+        dict or None: Evaluation breakdown for the student project pages
+    """
     if not evaluations:
         return None
     
@@ -2452,7 +3290,9 @@ def get_project_evaluation_details(project):
     if not primary_eval:
         return None
     
-    evaluator = User.query.get(primary_eval.admin_id)
+    project_eval_marks = marks_by_evaluation.get(project_eval.id, []) if project_eval else []
+    presentation_eval_marks = marks_by_evaluation.get(presentation_eval.id, []) if presentation_eval else []
+    primary_eval_marks = project_eval_marks if primary_eval is project_eval else presentation_eval_marks
     
     # Build marks breakdown
     marks = {
@@ -2462,7 +3302,7 @@ def get_project_evaluation_details(project):
     
     if project_eval:
         # Get marks from EvaluationMark for project evaluation
-        for mark in project_eval.marks:
+        for mark in project_eval_marks:
             criterion_key = mark.criterion_name.lower().replace(' ', '_').replace('&', '').replace('-', '_')
             marks["project_marks"][criterion_key] = {
                 "score": mark.score,
@@ -2493,7 +3333,7 @@ def get_project_evaluation_details(project):
     
     if presentation_eval:
         # Get marks from EvaluationMark for presentation evaluation
-        for mark in presentation_eval.marks:
+        for mark in presentation_eval_marks:
             criterion_key = mark.criterion_name.lower().replace(' ', '_').replace('&', '').replace('-', '_')
             marks["presentation_marks"][criterion_key] = {
                 "score": mark.score,
@@ -2529,17 +3369,17 @@ def get_project_evaluation_details(project):
     presentation_max = 0
     
     if project_eval:
-        if project_eval.marks.count() > 0:
-            project_total = sum(mark.score for mark in project_eval.marks)
-            project_max = sum(mark.max_score for mark in project_eval.marks)
+        if project_eval_marks:
+            project_total = sum(mark.score for mark in project_eval_marks)
+            project_max = sum(mark.max_score for mark in project_eval_marks)
         else:
             project_total = project_eval.total_project_marks or 0
             project_max = 70  # Default max for project evaluation
     
     if presentation_eval:
-        if presentation_eval.marks.count() > 0:
-            presentation_total = sum(mark.score for mark in presentation_eval.marks)
-            presentation_max = sum(mark.max_score for mark in presentation_eval.marks)
+        if presentation_eval_marks:
+            presentation_total = sum(mark.score for mark in presentation_eval_marks)
+            presentation_max = sum(mark.max_score for mark in presentation_eval_marks)
         else:
             presentation_total = presentation_eval.total_presentation_marks or 0
             presentation_max = 30  # Default max for presentation evaluation
@@ -2565,7 +3405,7 @@ def get_project_evaluation_details(project):
         
         # Calculate percentage from total_score (which is stored as percentage in the DB)
         # But we want to use actual marks if available
-        if primary_eval.marks.count() > 0:
+        if primary_eval_marks:
             percentage = round((total_score / max_score) * 100, 2) if max_score > 0 else 0
         else:
             # Fallback to stored percentage
@@ -2636,78 +3476,90 @@ def get_my_projects():
 def get_my_dashboard():
     """Get comprehensive dashboard summary for the current student (single project)"""
     try:
-        current_user, student = get_current_student()
-        
-        if not current_user or not student:
+        try:
+            user_id = int(get_jwt_identity())
+        except (ValueError, TypeError):
             return jsonify({"error": "Access denied"}), 403
         
-        # Get student's single project
-        project = Project.query.filter_by(student_id=student.id).first()
-        
-        # Calculate timeline
-        timeline = calculate_status_timeline(project) if project else None
-        
-        # Get evaluation details if project exists
-        has_evaluation = False
-        total_score = None
-        if project:
-            evaluations = project.evaluations.all()
-            has_evaluation = len(evaluations) > 0
-            if has_evaluation:
-                # Get overall percentage if both evaluations exist
-                project_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
-                pres_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
-                if project_eval and pres_eval and project_eval.overall_percentage:
-                    total_score = project_eval.overall_percentage
-                elif project_eval:
-                    total_score = project_eval.total_score
-                elif pres_eval:
-                    total_score = pres_eval.total_score
-        
-        # Build project summary
-        project_data = None
-        if project:
-            project_data = {
-                "id": project.id,
-                "title": project.title,
-                "status": project.status.value if isinstance(project.status, ProjectStatus) else project.status,
-                "level": project.level.value,
-                "submitted_at": project.submitted_at.isoformat() if project.submitted_at else None,
-                "status_timeline": timeline,
-                "has_evaluation": has_evaluation,
-                "total_score": total_score
-            }
-        
-        # Get deadlines for project's level
-        deadlines = []
-        if project:
-            deadline_obj = Deadline.query.filter_by(level=project.level).first()
-            if deadline_obj:
-                now = datetime.utcnow()
-                is_passed = deadline_obj.deadline < now
-                days_remaining = (deadline_obj.deadline - now).days if not is_passed else 0
-                
-                deadlines.append({
-                    "level": project.level.value,
-                    "deadline": deadline_obj.deadline.isoformat(),
-                    "is_passed": is_passed,
-                    "days_remaining": days_remaining
-                })
-        
-        return jsonify({
-            "student": {
-                "id": current_user.id,
-                "name": current_user.name,
-                "email": current_user.email,
-                "student_id": student.student_id
-            },
-            "project": project_data,
-            "deadlines": deadlines
-        }), 200
+        # Served from the materialized read model; rebuilt after writes
+        response = student_dashboards.respond(user_id, build_student_dashboard)
+        if response is None:
+            return jsonify({"error": "Access denied"}), 403
+        return response
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": "Failed to fetch dashboard data", "details": str(e)}), 500
 
+def build_student_dashboard(user_id):
+    """
+    Build the student dashboard document from live data
+    
+    The clock-dependent deadline fields (is_passed, days_remaining) are left
+    out; student_dashboards.add_deadline_status fills them in when serving.
+    
+    Returns:
+        dict or None: Dashboard document, or None if the user is not a student
+    """
+    current_user, student = get_current_student(user_id)
+    if not current_user or not student:
+        return None
+    
+    # Get student's single project, with its deadline and evaluations
+    project, deadline_obj, evaluations, _ = load_student_project(student.id)
+    
+    # Calculate timeline
+    timeline = calculate_status_timeline(project) if project else None
+    
+    # Get evaluation details if project exists
+    has_evaluation = False
+    total_score = None
+    if project:
+        has_evaluation = len(evaluations) > 0
+        if has_evaluation:
+            # Get overall percentage if both evaluations exist
+            project_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PROJECT), None)
+            pres_eval = next((e for e in evaluations if e.evaluation_type == EvaluationType.PRESENTATION), None)
+            if project_eval and pres_eval and project_eval.overall_percentage:
+                total_score = project_eval.overall_percentage
+            elif project_eval:
+                total_score = project_eval.total_score
+            elif pres_eval:
+                total_score = pres_eval.total_score
+    
+    # Build project summary
+    project_data = None
+    if project:
+        project_data = {
+            "id": project.id,
+            "title": project.title,
+            "status": project.status.value if isinstance(project.status, ProjectStatus) else project.status,
+            "level": project.level.value,
+            "submitted_at": project.submitted_at.isoformat() if project.submitted_at else None,
+            "status_timeline": timeline,
+            "has_evaluation": has_evaluation,
+            "total_score": total_score
+        }
+    
+    # Get deadlines for project's level
+    deadlines = []
+    if project and deadline_obj:
+        deadlines.append({
+            "level": project.level.value,
+            "deadline": deadline_obj.deadline.isoformat()
+        })
+    
+    return {
+        "student": {
+            "id": current_user.id,
+            "name": current_user.name,
+            "email": current_user.email,
+            "student_id": student.student_id
+        },
+        "project": project_data,
+        "deadlines": deadlines
+    }
+
 @api_bp.route('/students/me/projects/<int:project_id>', methods=['GET'])
 @jwt_required()
 def get_my_project(project_id):
@@ -2718,13 +3570,13 @@ def get_my_project(project_id):
         if not current_user or not student:
             return jsonify({"error": "Access denied"}), 403
         
-        # Verify project ownership
-        project, error = verify_project_ownership(project_id, student.id)
-        if error:
-            return jsonify({"error": error}), 404
+        # Load the project (ownership checked by the query) with its evaluations and marks
+        project, _, evaluations, marks_by_evaluation = load_student_project(student.id, project_id)
+        if not project:
+            return jsonify({"error": "Project not found"}), 404
         
         # Get evaluation details
-        evaluation_details = get_project_evaluation_details(project)
+        evaluation_details = build_evaluation_details(evaluations, marks_by_evaluation)
         
         # Get timeline
         timeline = calculate_status_timeline(project)
@@ -2804,6 +3656,7 @@ def update_my_project_submission(project_id):
         # If first submission, set submitted_at and trigger status transition
         if not project.submitted_at:
             project.submitted_at = datetime.utcnow()
+            apply_submission_lateness(project)
             # Automatic status transition: draft -> submitted
             success, error = update_project_status(project, ProjectStatus.SUBMITTED)
             if not success:
@@ -2840,7 +3693,8 @@ def get_my_project_timeline(project_id):
             return jsonify({"error": error}), 404
         
         # Calculate timeline
-        timeline, current_stage, progress_percentage = calculate_status_timeline(project)
+        timeline = calculate_status_timeline(project)
+        current_stage, progress_percentage = timeline_progress(timeline)
         
         return jsonify({
             "project_id": project_id,
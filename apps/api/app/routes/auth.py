@@ -4,8 +4,7 @@ from app.extensions import db
 from app.models.models import User, UserRole
 from marshmallow import Schema, fields, ValidationError
 from datetime import timedelta
-from google.oauth2 import id_token as google_id_token
-from google.auth.transport import requests as google_requests
+from app.google_auth import get_google_verifier, GoogleCertsUnavailable
 import uuid
 
 auth_bp = Blueprint('auth', __name__)
@@ -249,14 +248,17 @@ def google_login():
     if not google_client_id:
         return jsonify({"error": {"message": "Google OAuth not configured", "code": "OAUTH_NOT_CONFIGURED"}}), 503
 
+    verifier = get_google_verifier(current_app.config)
     try:
-        id_info = google_id_token.verify_oauth2_token(
+        id_info = verifier.verify(
             credential,
-            google_requests.Request(),
-            google_client_id
+            google_client_id,
+            clock_skew_in_seconds=current_app.config.get("GOOGLE_TOKEN_CLOCK_SKEW", 0)
         )
     except ValueError:
         return jsonify({"error": {"message": "Invalid Google credential", "code": "INVALID_CREDENTIAL"}}), 401
+    except GoogleCertsUnavailable:
+        return jsonify({"error": {"message": "Google sign-in is temporarily unavailable", "code": "OAUTH_UNAVAILABLE"}}), 503
 
     email = (id_info.get("email") or "").lower()
     if not email:
@@ -0,0 +1,250 @@
+"""
+Rubrics, criteria and the criterion resolver.
+
+Evaluation marks reference their criterion by id. Graders still submit
+criterion names, so every worker keeps an index of all rubrics and criteria
+in memory, loaded once at startup. Resolving a name or an id is a
+dictionary lookup; the database is only read again on a miss (a criterion
+another worker added), and criteria are never renamed or removed, so a
+loaded entry never goes stale.
+
+Which evaluation column (``code_quality``, ``clarity_communication``, ...)
+a criterion's score counts towards is stored on the criterion. For names
+outside the templates it is worked out once, with the keyword rules
+grading has always used, when the name is first seen and added to the
+rubric.
+
+A criterion added while grading only enters the shared index once the
+request that added it commits; until then it is only visible to that
+request's session.
+"""
+
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.models import Criterion, EvaluationType, Rubric
+
+rubrics = Rubric.__table__
+criteria_table = Criterion.__table__
+
+CriterionInfo = namedtuple(
+    'CriterionInfo',
+    'id rubric_id evaluation_type name key max_score description field position in_template'
+)
+
+# Seeded into an empty database (the migration seeds the same rubrics)
+DEFAULT_RUBRICS = [
+    {
+        'key': 'project',
+        'name': 'Project Evaluation',
+        'description': 'Evaluation of project work: Code Quality, Documentation, and Functionality',
+        'evaluation_type': EvaluationType.PROJECT,
+        'criteria': [
+            ('Code Quality', 20, 'Code structure, organization, and adherence to best practices', 'code_quality'),
+            ('Documentation', 20, 'Completeness and clarity of documentation', 'documentation_score'),
+            ('Functionality', 30, 'How well the project meets functional requirements', 'functionality_score'),
+        ]
+    },
+    {
+        'key': 'presentation',
+        'name': 'Presentation Evaluation',
+        'description': 'Evaluation of presentation: Clarity & Communication, Visual Presentation, and Technical Explanation',
+        'evaluation_type': EvaluationType.PRESENTATION,
+        'criteria': [
+            ('Clarity & Communication', 10, 'Clear communication of ideas and concepts', 'clarity_communication'),
+            ('Visual Presentation', 10, 'Quality of visual materials and slides', 'visual_presentation'),
+            ('Technical Explanation', 10, 'Ability to explain technical aspects clearly', 'technical_explanation'),
+        ]
+    }
+]
+
+
+def criterion_key(name):
+    """Lookup key for a submitted criterion name"""
+    if not isinstance(name, str):
+        raise TypeError("criterion_name must be text")
+    key = name.strip().lower()
+    if not key or len(key) > 100:
+        raise ValueError("criterion_name must be 1 to 100 characters")
+    return key
+
+
+def legacy_field(evaluation_type, key):
+    """Evaluation column a free-text criterion counts towards, by the original keyword rules"""
+    if evaluation_type == EvaluationType.PROJECT:
+        if 'code quality' in key:
+            return 'code_quality'
+        if 'documentation' in key:
+            return 'documentation_score'
+        if 'functionality' in key:
+            return 'functionality_score'
+    elif evaluation_type == EvaluationType.PRESENTATION:
+        if 'clarity' in key or 'communication' in key:
+            return 'clarity_communication'
+        if 'visual' in key or 'presentation' in key:
+            return 'visual_presentation'
+        if 'technical' in key or 'explanation' in key:
+            return 'technical_explanation'
+    return None
+
+
+def _seed_defaults(connection):
+    now = datetime.utcnow()
+    for rubric in DEFAULT_RUBRICS:
+        rubric_id = connection.execute(insert(rubrics).values(
+            key=rubric['key'], name=rubric['name'], description=rubric['description'],
+            evaluation_type=rubric['evaluation_type'], created_at=now
+        )).inserted_primary_key[0]
+        connection.execute(insert(criteria_table), [{
+            'rubric_id': rubric_id, 'name': name, 'key': name.lower(), 'max_score': max_score,
+            'description': description, 'field': field, 'position': position,
+            'in_template': True, 'created_at': now
+        } for position, (name, max_score, description, field) in enumerate(rubric['criteria'])])
+
+
+class CriterionResolver:
+    def __init__(self):
+        self._by_id = {}
+        self._by_key = {}
+        self._rubric_ids = {}
+        self._templates = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """(Re)build the index from the primary database, seeding the default rubrics if there are none."""
+        with db.engine.connect() as connection:
+            rubric_rows = connection.execute(select(rubrics).order_by(rubrics.c.id)).all()
+        if not rubric_rows:
+            try:
+                with db.engine.begin() as connection:
+                    _seed_defaults(connection)
+            except IntegrityError:
+                pass  # Another worker seeded them first
+            with db.engine.connect() as connection:
+                rubric_rows = connection.execute(select(rubrics).order_by(rubrics.c.id)).all()
+        with db.engine.connect() as connection:
+            criterion_rows = connection.execute(
+                select(criteria_table).order_by(criteria_table.c.rubric_id, criteria_table.c.position, criteria_table.c.id)
+            ).all()
+
+        types = {row.id: row.evaluation_type for row in rubric_rows}
+        by_id, by_key = {}, {}
+        templates = {row.key: {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'evaluation_type': row.evaluation_type.value,
+            'criteria': []
+        } for row in rubric_rows}
+        template_by_rubric = {row.id: templates[row.key] for row in rubric_rows}
+        for row in criterion_rows:
+            info = CriterionInfo(
+                row.id, row.rubric_id, types[row.rubric_id], row.name, row.key,
+                row.max_score, row.description, row.field, row.position, row.in_template
+            )
+            by_id[info.id] = info
+            by_key[(info.evaluation_type, info.key)] = info
+            if info.in_template:
+                template_by_rubric[info.rubric_id]['criteria'].append({
+                    'id': info.id,
+                    'criterion_name': info.name,
+                    'max_score': info.max_score,
+                    'description': info.description
+                })
+
+        with self._lock:
+            self._by_id, self._by_key = by_id, by_key
+            self._rubric_ids = {evaluation_type: rubric_id for rubric_id, evaluation_type in types.items()}
+            self._templates = templates
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _pending(self):
+        # Criteria this session added and has not committed yet
+        return db.session.info.get('pending_criteria', {})
+
+    def by_id(self, criterion_id):
+        """CriterionInfo for an id, or None"""
+        if criterion_id is None:
+            return None
+        self._ensure_loaded()
+        info = self._by_id.get(criterion_id) or self._pending().get(criterion_id)
+        if info is None:
+            self.load()
+            info = self._by_id.get(criterion_id)
+        return info
+
+    def resolve(self, evaluation_type, name):
+        """
+        CriterionInfo for a submitted criterion name, adding the name to the
+        rubric of ``evaluation_type`` (in the current transaction) if it is new.
+
+        Raises:
+            TypeError, ValueError: If the name is not text of 1 to 100 characters
+        """
+        key = criterion_key(name)
+        self._ensure_loaded()
+        info = self._by_key.get((evaluation_type, key)) or self._pending().get((evaluation_type, key))
+        if info is not None:
+            return info
+        # Another worker may have added it since we loaded
+        self.load()
+        info = self._by_key.get((evaluation_type, key))
+        if info is not None:
+            return info
+        return self._add(evaluation_type, name.strip(), key)
+
+    def _add(self, evaluation_type, name, key):
+        rubric_id = self._rubric_ids.get(evaluation_type)
+        if rubric_id is None:
+            raise ValueError(f"No rubric for {evaluation_type.value} evaluations")
+        field = legacy_field(evaluation_type, key)
+        try:
+            with db.session.begin_nested():
+                criterion_id = db.session.execute(insert(criteria_table).values(
+                    rubric_id=rubric_id, name=name, key=key, field=field,
+                    in_template=False, created_at=datetime.utcnow()
+                )).inserted_primary_key[0]
+        except IntegrityError:
+            # Another request added it and has committed
+            self.load()
+            return self._by_key[(evaluation_type, key)]
+
+        info = CriterionInfo(criterion_id, rubric_id, evaluation_type, name, key, None, None, field, None, False)
+        pending = db.session.info.setdefault('pending_criteria', {})
+        pending[criterion_id] = info
+        pending[(evaluation_type, key)] = info
+        return info
+
+    def templates(self):
+        """Evaluation templates (rubrics with their template criteria), keyed by rubric key"""
+        self._ensure_loaded()
+        return self._templates
+
+
+criteria = CriterionResolver()
+
+
+@event.listens_for(db.session, "after_commit")
+def _publish_committed_criteria(session):
+    pending = session.info.pop('pending_criteria', None)
+    if pending:
+        with criteria._lock:
+            for info in pending.values():
+                criteria._by_id[info.id] = info
+                criteria._by_key[(info.evaluation_type, info.key)] = info
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _drop_uncommitted_criteria(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('pending_criteria', None)
@@ -0,0 +1,116 @@
+"""
+Cheap schema check for application startup.
+
+A fingerprint of the model metadata is stored in ``schema_state`` once the
+tables match the models. Boots whose fingerprint matches skip
+``db.create_all()`` (one query per table) and read a single row instead.
+
+``create_all()`` only creates missing tables; it never adds columns to
+existing ones. The fingerprint is therefore only stored after
+``schema_drift()`` finds every column the models declare.
+"""
+
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import inspect, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.models import SchemaState
+
+SCHEMA = "schema"
+
+# Bump to make every database re-check its schema once. 2: fingerprints
+# stored by earlier versions could mark tables create_all() never
+# migrated as current.
+FINGERPRINT_FORMAT = 2
+
+# Core table rather than the ORM class, so startup does not trigger mapper configuration
+schema_state = SchemaState.__table__
+
+
+def schema_fingerprint(metadata=None):
+    """Hash of every table, column and index the models declare."""
+    metadata = metadata if metadata is not None else db.metadata
+    digest = hashlib.sha256(f"format:{FINGERPRINT_FORMAT}".encode())
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}".encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(f"|ix:{index.name}:{','.join(c.name for c in index.columns)}".encode())
+    return digest.hexdigest()
+
+
+def stored_fingerprint(engine, name):
+    """Fingerprint last recorded under ``name``, or None if there is none (or no table yet)."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                select(schema_state.c.fingerprint).where(schema_state.c.name == name)
+            ).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def store_fingerprint(connection, name, fingerprint):
+    updated = connection.execute(
+        update(schema_state)
+        .where(schema_state.c.name == name)
+        .values(fingerprint=fingerprint, updated_at=datetime.utcnow())
+    ).rowcount
+    if not updated:
+        connection.execute(
+            insert(schema_state).values(name=name, fingerprint=fingerprint, updated_at=datetime.utcnow())
+        )
+
+
+def schema_drift(engine, metadata=None):
+    """
+    Differences between the database and the models that would break
+    queries or inserts: missing tables, missing columns, and NOT NULL
+    columns without a default that the models no longer write. Empty when
+    the database matches.
+    """
+    metadata = metadata if metadata is not None else db.metadata
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    drift = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        if table.name not in existing_tables:
+            drift.append(f"table {table.name} is missing")
+            continue
+        columns = {column['name']: column for column in inspector.get_columns(table.name)}
+        drift.extend(
+            f"column {table.name}.{column.name} is missing"
+            for column in table.columns if column.name not in columns
+        )
+        drift.extend(
+            f"column {table.name}.{name} is not in the models but is NOT NULL"
+            for name, column in columns.items()
+            if name not in table.columns and not column['nullable'] and column.get('default') is None
+        )
+    return drift
+
+
+def ensure_schema():
+    """
+    Create missing tables unless the stored fingerprint is current, and
+    store the fingerprint once the tables match the models. Returns True if
+    create_all ran.
+    """
+    fingerprint = schema_fingerprint()
+    if stored_fingerprint(db.engine, SCHEMA) == fingerprint:
+        return False
+
+    db.create_all()
+    drift = schema_drift(db.engine)
+    if drift:
+        # Existing tables need migrating; check again on the next start
+        print("Warning: Database schema does not match the models, run `flask db upgrade` "
+              f"or comprehensive_migration_script.py: {'; '.join(drift)}")
+        return True
+    with db.engine.begin() as connection:
+        store_fingerprint(connection, SCHEMA, fingerprint)
+    return True
@@ -0,0 +1,28 @@
+"""Phase timings for ``create_app``, to keep cold starts visible."""
+
+import time
+
+
+class StartupTimer:
+    """Records how long each phase of application startup takes."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.phases = []
+
+    def mark(self, phase):
+        """Close the current phase under ``phase`` and start the next one."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self):
+        return {
+            "total_ms": round(sum(ms for _, ms in self.phases), 2),
+            "phases": {phase: round(ms, 2) for phase, ms in self.phases},
+        }
+
+    def format(self):
+        report = self.report()
+        phases = ", ".join(f"{phase} {ms:.1f}ms" for phase, ms in report["phases"].items())
+        return f"App startup {report['total_ms']:.1f}ms ({phases})"
@@ -0,0 +1,196 @@
+"""
+Materialized student dashboards.
+
+/api/students/me/dashboard only changes when the student's profile, their
+project, its evaluations or the deadline for their level change, but
+students reload it constantly around deadlines and result releases. Each
+student's dashboard document is stored as JSON in ``student_dashboards``,
+keyed by user id, so serving it is one primary-key fetch.
+
+A flush hook clears the stored document and bumps the row version in the
+same transaction as any write to that data; the next read rebuilds it. A
+rebuild only stores its document if the version has not moved since it
+started, so a write racing with a rebuild is never hidden behind an older
+document.
+
+Whether the deadline has passed and the days remaining depend on the
+clock, so they are added when serving, not stored.
+check_student_dashboards.py compares stored documents with a live build.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+from flask import jsonify, request
+from sqlalchemy import delete, event, insert, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models.models import Deadline, Evaluation, Project, Student, StudentDashboard, User
+
+dashboards = StudentDashboard.__table__
+
+
+def _dumps(document):
+    return json.dumps(document, sort_keys=True, separators=(',', ':'))
+
+
+def add_deadline_status(document, now=None):
+    """Fill in the clock-dependent deadline fields (is_passed, days_remaining) on a document."""
+    now = now or datetime.utcnow()
+    for deadline in document.get("deadlines") or []:
+        due = datetime.fromisoformat(deadline["deadline"])
+        is_passed = due < now
+        deadline["is_passed"] = is_passed
+        deadline["days_remaining"] = (due - now).days if not is_passed else 0
+    return document
+
+
+def load(user_id, build):
+    """
+    Return ``(document, etag)`` for ``user_id``, rebuilding with ``build(user_id)``
+    if the stored copy was cleared. ``build`` returns None when the user has no
+    student profile, in which case ``(None, None)`` is returned.
+    """
+    try:
+        row = db.session.execute(
+            select(dashboards.c.version, dashboards.c.document, dashboards.c.etag).where(dashboards.c.user_id == user_id)
+        ).first()
+    except SQLAlchemyError:
+        # Table not created yet (e.g. migrations pending): serve live
+        db.session.rollback()
+        document = build(user_id)
+        return document, hashlib.sha1(_dumps(document).encode()).hexdigest() if document is not None else None
+
+    if row and row.document is not None:
+        return json.loads(row.document), row.etag
+
+    if row is None:
+        # Claim the row before reading the data, so writes from here on bump its version
+        try:
+            db.session.execute(insert(dashboards).values(user_id=user_id, version=1))
+            db.session.commit()
+            version = 1
+        except IntegrityError:
+            db.session.rollback()
+            version = db.session.execute(select(dashboards.c.version).where(dashboards.c.user_id == user_id)).scalar()
+    else:
+        version = row.version
+
+    document = build(user_id)
+    if document is None:
+        db.session.execute(delete(dashboards).where(dashboards.c.user_id == user_id))
+        db.session.commit()
+        return None, None
+
+    body = _dumps(document)
+    etag = hashlib.sha1(body.encode()).hexdigest()
+    try:
+        db.session.execute(
+            update(dashboards)
+            .where(dashboards.c.user_id == user_id, dashboards.c.version == version)
+            .values(document=body, etag=etag, built_at=datetime.utcnow())
+        )
+        db.session.commit()
+    except SQLAlchemyError as e:
+        # A concurrent write won; the next read rebuilds
+        db.session.rollback()
+        print(f"Warning: Could not store dashboard for user {user_id}: {e}")
+    return document, etag
+
+
+def respond(user_id, build):
+    """Dashboard response with an ETag, 304 if the client copy is current, or None for non-students."""
+    document, etag = load(user_id, build)
+    if document is None:
+        return None
+
+    add_deadline_status(document)
+    clock = ",".join(f"{d['is_passed']:d}{d['days_remaining']}" for d in document.get("deadlines") or [])
+    response = jsonify(document)
+    response.set_etag(f"{etag}-{clock}" if clock else etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def invalidate(*conditions):
+    """Clear the stored documents matching any of ``conditions`` (all of them if none are given)."""
+    statement = update(dashboards).values(version=dashboards.c.version + 1, document=None, etag=None)
+    if conditions:
+        statement = statement.where(or_(*conditions))
+    return db.session.execute(statement).rowcount
+
+
+def find_stale(build):
+    """User ids whose stored document differs from a live ``build(user_id)``."""
+    stale = []
+    rows = db.session.execute(
+        select(dashboards.c.user_id, dashboards.c.document).where(dashboards.c.document.isnot(None))
+    ).all()
+    for user_id, stored in rows:
+        live = build(user_id)
+        if live is None or _dumps(live) != _dumps(json.loads(stored)):
+            stale.append(user_id)
+    return stale
+
+
+def _changed(session):
+    for obj in session.new:
+        yield obj
+    for obj in session.deleted:
+        yield obj
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            yield obj
+
+
+@event.listens_for(db.session, "before_flush")
+def _invalidate_on_flush(session, flush_context, instances):
+    user_ids, deleted_user_ids, student_ids, project_ids, levels = set(), set(), set(), set(), set()
+    for obj in _changed(session):
+        if isinstance(obj, User):
+            if obj in session.deleted:
+                deleted_user_ids.add(obj.id)
+            user_ids.add(obj.id)
+        elif isinstance(obj, Student):
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, Project):
+            student_ids.add(obj.student_id)
+            # A reassigned project also leaves its previous owner's dashboard; assigned through
+            # the relationship, student_id still holds the old owner until the flush
+            state = inspect(obj)
+            student_ids.update(state.attrs.student_id.history.deleted)
+            moved = state.attrs.student.history
+            student_ids.update(student.id for student in (*moved.added, *moved.deleted) if student is not None)
+        elif isinstance(obj, Evaluation):
+            # Pending evaluations may only be linked through the relationship
+            project_ids.add(obj.project_id if obj.project_id is not None else getattr(obj.project, 'id', None))
+        elif isinstance(obj, Deadline):
+            levels.add(obj.level)
+
+    user_ids.discard(None)
+    student_ids.discard(None)
+    project_ids.discard(None)
+    levels.discard(None)
+    if not (user_ids or student_ids or project_ids or levels):
+        return
+
+    # Runs inside the flush, before the rows it depends on are written
+    if deleted_user_ids - {None}:
+        session.execute(delete(dashboards).where(dashboards.c.user_id.in_(deleted_user_ids - {None})))
+
+    students = []
+    if student_ids:
+        students.append(Student.id.in_(student_ids))
+    if project_ids:
+        students.append(Student.id.in_(select(Project.student_id).where(Project.id.in_(project_ids))))
+    if levels:
+        students.append(Student.id.in_(select(Project.student_id).where(Project.level.in_(levels))))
+
+    conditions = []
+    if user_ids:
+        conditions.append(dashboards.c.user_id.in_(user_ids))
+    if students:
+        conditions.append(dashboards.c.user_id.in_(select(Student.user_id).where(or_(*students))))
+    invalidate(*conditions)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Check and time Google ID-token verification against a local stand-in for
+Google's certificate endpoint.
+
+Generates an RSA key, serves its public key from a local HTTP server with a
+Cache-Control max-age, signs Google-shaped ID tokens with it, and verifies
+them both through google-auth's per-call fetch (verify_token) and through
+the cached GoogleTokenVerifier. Reports latency and how many certificate
+fetches each path made, and checks that bad tokens are rejected.
+
+Usage:
+    python bench_google_login.py
+    python bench_google_login.py --logins 500 --max-age 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import rsa
+from google.auth import crypt, jwt
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token as google_id_token
+
+from app.google_auth import GoogleTokenVerifier
+
+CLIENT_ID = "local-client.apps.googleusercontent.com"
+KEY_ID = "local-key-1"
+
+
+def start_cert_server(public_pem, max_age):
+    hits = {"count": 0}
+    body = json.dumps({KEY_ID: public_pem}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits["count"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", f"public, max-age={max_age}, must-revalidate, no-transform")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+
+def make_token(signer, **claims):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "student@hit.ac.zw",
+        "name": "Local Student",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(claims)
+    return jwt.encode(signer, payload, key_id=KEY_ID).decode()
+
+
+def time_logins(verify, token, logins):
+    latencies = []
+    for _ in range(logins):
+        started = time.perf_counter()
+        verify(token)
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1000, max(latencies) * 1000
+
+
+def expect_rejected(verifier, token, label):
+    try:
+        verifier.verify(token, CLIENT_ID)
+    except ValueError as e:
+        print(f"  rejected {label}: {e}")
+        return True
+    print(f"  ACCEPTED {label} (should have been rejected)")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--max-age", type=int, default=3600, help="Cache-Control max-age served by the stand-in")
+    args = parser.parse_args()
+
+    public_key, private_key = rsa.newkeys(2048)
+    signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id=KEY_ID)
+    server, hits = start_cert_server(public_key.save_pkcs1().decode(), args.max_age)
+    certs_url = f"http://127.0.0.1:{server.server_port}/oauth2/v1/certs"
+    token = make_token(signer)
+
+    hits["count"] = 0
+    request = google_requests.Request()
+    p50, worst = time_logins(
+        lambda t: google_id_token.verify_token(t, request, audience=CLIENT_ID, certs_url=certs_url), token, args.logins
+    )
+    print(f"google-auth verify_token: p50 {p50:.2f}ms, max {worst:.2f}ms, {hits['count']} certificate fetches")
+
+    hits["count"] = 0
+    verifier = GoogleTokenVerifier(certs_url)
+    p50, worst = time_logins(lambda t: verifier.verify(t, CLIENT_ID), token, args.logins)
+    print(f"cached GoogleTokenVerifier: p50 {p50:.2f}ms, max {worst:.2f}ms, {hits['count']} certificate fetches")
+
+    _, other_key = rsa.newkeys(1024)
+    other_signer = crypt.RSASigner.from_string(other_key.save_pkcs1().decode(), key_id=KEY_ID)
+    checks = [
+        expect_rejected(verifier, make_token(signer, aud="someone-else"), "wrong audience"),
+        expect_rejected(verifier, make_token(signer, iss="evil.example.com"), "wrong issuer"),
+        expect_rejected(verifier, make_token(signer, exp=int(time.time()) - 60), "expired token"),
+        expect_rejected(verifier, make_token(other_signer), "foreign signature"),
+        expect_rejected(verifier, token[:-4] + "AAAA", "tampered signature"),
+    ]
+    server.shutdown()
+    sys.exit(0 if all(checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare requests per second between the development server and Gunicorn.
+
+Starts each server as a subprocess on its own port against the configured
+database, waits for /api/health, then fires a fixed number of GET requests
+from a pool of client threads and reports throughput and latency.
+
+Usage:
+    python bench_serving.py
+    python bench_serving.py --requests 5000 --concurrency 32 --path /api/deadlines
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1).read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load(port, path, total, concurrency):
+    url = f"http://127.0.0.1:{port}{path}"
+
+    def one(_):
+        started = time.perf_counter()
+        try:
+            urllib.request.urlopen(url, timeout=30).read()
+            ok = True
+        except OSError:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        "errors": errors,
+    }
+
+
+def start_server(kind, port):
+    env = dict(os.environ, API_PORT=str(port), API_HOST="127.0.0.1")
+    if kind == "dev":
+        env["APP_SERVER"] = "dev"
+        env["FLASK_DEBUG"] = "False"
+    else:
+        env["APP_SERVER"] = "gunicorn"
+        env.setdefault("API_ACCESS_LOG", "/dev/null")
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "serve.py")],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--path", action="append", help="path to request (repeatable, default /api/health and /api/deadlines)")
+    args = parser.parse_args()
+    paths = args.path or ["/api/health", "/api/deadlines"]
+
+    results = []
+    for kind, port in (("dev", 5101), ("gunicorn", 5102)):
+        process = start_server(kind, port)
+        try:
+            if not wait_until_up(port):
+                print(f"{kind}: server did not start")
+                continue
+            for path in paths:
+                run_load(port, path, min(200, args.requests), args.concurrency)  # warm up
+                results.append((kind, path, run_load(port, path, args.requests, args.concurrency)))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(f"\n{'server':<10} {'path':<24} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errors':>8}")
+    for kind, path, stats in results:
+        print(f"{kind:<10} {path:<24} {stats['rps']:>10.1f} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
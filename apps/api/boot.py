@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Single container boot command: prepare the database, then start the server.
+
+Migrations run only when the model schema fingerprint differs from the one
+stored in ``schema_state``, and seed.py runs only when its own fingerprint
+changes. Databases not managed by Alembic (made by ``db.create_all()``) are
+brought up to the models by app/legacy_schema.py and stamped at the Alembic
+head. The fingerprint is only stored once the tables match the models. Both
+steps run under a lock (a PostgreSQL advisory lock, otherwise a file lock
+next to the instance data) so replicas starting together do not race;
+whoever waits re-checks the fingerprints and usually finds nothing left
+to do.
+
+Usage: python boot.py            prepare and start the server (see serve.py)
+       python boot.py --no-serve prepare only
+"""
+
+import hashlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+# boot.py owns schema creation; create_app must not run its own check first
+os.environ.setdefault("SKIP_TABLE_CREATION", "True")
+
+from sqlalchemy import inspect
+
+from app import create_app
+from app.extensions import db
+from app.schema import SCHEMA, schema_drift, schema_fingerprint, stored_fingerprint, store_fingerprint
+
+SEED = "seed"
+SEED_SOURCES = [os.path.join(BASE_DIR, "seed.py")]
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "migrations")
+# Arbitrary application-wide key for pg_advisory_lock
+ADVISORY_LOCK_KEY = 72_410_036
+# How long a file lock waits for another replica's migrations before giving up
+LOCK_TIMEOUT = float(os.getenv("BOOT_LOCK_TIMEOUT", "300"))
+
+
+def seed_fingerprint():
+    digest = hashlib.sha256()
+    for path in SEED_SOURCES:
+        with open(path, "rb") as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()
+
+
+@contextmanager
+def _file_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+") as fh:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for boot lock {path}")
+                time.sleep(0.2)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                import msvcrt
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def boot_lock(app):
+    """Serialize database preparation across processes and replicas."""
+    engine = db.engine
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            connection.exec_driver_sql(f"SELECT pg_advisory_lock({ADVISORY_LOCK_KEY})")
+            try:
+                yield
+            finally:
+                connection.exec_driver_sql(f"SELECT pg_advisory_unlock({ADVISORY_LOCK_KEY})")
+                connection.commit()
+    else:
+        with _file_lock(os.path.join(app.instance_path, "boot.lock")):
+            yield
+
+
+def check_schema():
+    """Raise if the tables still do not match the models."""
+    drift = schema_drift(db.engine)
+    if drift:
+        raise RuntimeError(f"Database schema does not match the models after migrating: {'; '.join(drift)}")
+
+
+def migrate_schema():
+    """
+    Upgrade Alembic-managed databases. Anything else was made by
+    db.create_all(): upgrade it in place and stamp it at the Alembic head,
+    so later boots upgrade it like any other.
+    """
+    from flask_migrate import stamp, upgrade
+    if inspect(db.engine).has_table("alembic_version"):
+        upgrade(directory=MIGRATIONS_DIR)
+    else:
+        from app.legacy_schema import upgrade_unmanaged
+        upgrade_unmanaged()
+        check_schema()
+        stamp(directory=MIGRATIONS_DIR)
+
+    # create_app indexed the rubrics before they were migrated, if it could at all
+    from app.rubrics import criteria
+    criteria.load()
+
+
+def prepare_database(app):
+    """Run migrations and seeding if their fingerprints changed. Returns the steps that ran."""
+    schema = schema_fingerprint()
+    seed = seed_fingerprint()
+    with app.app_context():
+        engine = db.engine
+        if stored_fingerprint(engine, SCHEMA) == schema and stored_fingerprint(engine, SEED) == seed:
+            return []
+
+        ran = []
+        with boot_lock(app):
+            # Another replica may have finished while we waited for the lock
+            if stored_fingerprint(engine, SCHEMA) != schema:
+                migrate_schema()
+                check_schema()
+                with engine.begin() as connection:
+                    store_fingerprint(connection, SCHEMA, schema)
+                ran.append("schema")
+
+            if stored_fingerprint(engine, SEED) != seed:
+                from seed import seed_database
+                seed_database(app)
+                with engine.begin() as connection:
+                    store_fingerprint(connection, SEED, seed)
+                ran.append("seed")
+        return ran
+
+
+def main():
+    started = time.perf_counter()
+    app = create_app()
+    ran = prepare_database(app)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"📦 Database {'prepared: ' + ', '.join(ran) if ran else 'up to date'} ({elapsed:.0f}ms)")
+
+    if "--no-serve" in sys.argv[1:]:
+        return
+
+    import serve
+    serve.main(app)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Check that buffered evaluation drafts survive flushes.
+
+Builds a throwaway SQLite database with one admin, one student and a
+submitted project, then drives DraftBuffer directly (two buffers stand in
+for two workers). Fails if a draft ends up stored without marks that were
+saved, or if a discard is undone.
+
+Usage:
+    python check_draft_flush.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="draft-flush-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/check.db"
+os.environ["DRAFT_FLUSH_SECONDS"] = "3600"  # Flushes below are explicit
+
+from datetime import datetime
+
+from app import create_app
+from app.evaluation_drafts import DraftBuffer
+from app.extensions import db
+from app.models.models import (
+    Admin, EvaluationType, Project, ProjectLevel, ProjectStatus, Student, StudyProgram, User, UserRole
+)
+
+
+def seed(app):
+    with app.app_context():
+        db.create_all()
+        admin = User(name="Admin", email="admin@hit.ac.zw", role=UserRole.ADMIN)
+        admin.set_password("Admin123!")
+        student_user = User(name="Student", email="student@hit.ac.zw", role=UserRole.STUDENT)
+        student_user.set_password("Student123!")
+        program = StudyProgram(code="CS400", name="Computer Science")
+        db.session.add_all([admin, student_user, program])
+        db.session.flush()
+        student = Student(user_id=student_user.id, student_id="H230001A")
+        db.session.add_all([Admin(user_id=admin.id), student])
+        db.session.flush()
+        project = Project(
+            title="Draft flush project", description="d" * 60, level=ProjectLevel.LEVEL_400,
+            study_program_id=program.id, student_id=student.id,
+            status=ProjectStatus.SUBMITTED, submitted_at=datetime.utcnow()
+        )
+        db.session.add(project)
+        db.session.commit()
+        return (project.id, EvaluationType.PROJECT, admin.id)
+
+
+def worker(app):
+    buffer = DraftBuffer()
+    buffer._app = app
+    return buffer
+
+
+def mark(name):
+    return [{"criterion_name": name, "score": 1, "max_score": 10}]
+
+
+def stored_marks(buffer, key):
+    draft = buffer._load(key)[1]
+    return sorted(m["criterion_name"] for m in draft["marks"]) if draft else None
+
+
+def save_during_flush(app, key):
+    """A save that lands while a flush is writing keeps the marks being written"""
+    buffer = worker(app)
+    buffer.save(key, mark("Code Quality"))
+
+    write = buffer._write
+    def write_with_concurrent_save(pending):
+        def save():
+            with app.app_context():
+                buffer.save(key, mark("Documentation"))
+        thread = threading.Thread(target=save)
+        thread.start()
+        thread.join()
+        return write(pending)
+    buffer._write = write_with_concurrent_save
+    buffer.flush()
+    buffer._write = write
+    buffer.flush()
+    return stored_marks(buffer, key) == ["Code Quality", "Documentation"], stored_marks(buffer, key)
+
+
+def discard_on_other_worker(app, key):
+    """An older autosave buffered by one worker does not undo another worker's discard"""
+    first, second = worker(app), worker(app)
+    second.save(key, mark("Functionality"))
+    time.sleep(0.01)
+    first.discard(key)
+    first.flush()
+    second.flush()
+    return stored_marks(second, key) is None and second.get(key) is None, stored_marks(second, key)
+
+
+def main():
+    app = create_app()
+    app.config["TESTING"] = True
+    key = seed(app)
+
+    failures = 0
+    with app.app_context():
+        for check in (save_during_flush, discard_on_other_worker):
+            ok, stored = check(app, key)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {check.__doc__}: stored {stored}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Check that write endpoints run a fixed number of SQL statements.
+
+Builds a throwaway SQLite database with one admin, one student and a
+few submitted projects, calls each endpoint below through the Flask test client
+and counts the statements it executes (connection PRAGMAs and background
+threads such as the draft flusher excluded). Fails
+if any endpoint goes over its budget or returns an unexpected status, and
+prints the statements it ran.
+
+Usage:
+    python check_query_counts.py
+    python check_query_counts.py --verbose    # print every statement
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="query-counts-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/check.db"
+os.environ["REPORT_ARTIFACT_DIR"] = f"{_tmp}/artifacts"
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models.models import (
+    Admin, Project, ProjectLevel, ProjectStatus, Student, StudyProgram, User, UserRole
+)
+
+PROJECT_MARKS = [
+    {"criterion_name": "Code Quality", "max_score": 20, "score": 15},
+    {"criterion_name": "Documentation", "max_score": 20, "score": 14},
+    {"criterion_name": "Functionality", "max_score": 30, "score": 25},
+]
+PRESENTATION_MARKS = [
+    {"criterion_name": "Clarity & Communication", "max_score": 10, "score": 8},
+    {"criterion_name": "Visual Presentation", "max_score": 10, "score": 7},
+    {"criterion_name": "Technical Explanation", "max_score": 10, "score": 9},
+]
+
+# Projects graded by the batch case (both evaluation types each). SQLite cannot
+# return primary keys from a multi-row INSERT in order, so evaluations and
+# status events still insert one row per statement there; marks and
+# notifications are one executemany each.
+BATCH_PROJECTS = 5
+BATCH_BUDGET = 8 + 4 * BATCH_PROJECTS
+
+
+
+def cases(project_ids):
+    """(label, method, url, json body, expected status, statement budget) for each check"""
+    first, *batch_projects = project_ids
+    batch = [
+        {"project_id": project_id, "evaluation_type": evaluation_type, "marks": marks}
+        for project_id in batch_projects
+        for evaluation_type, marks in (("PROJECT", PROJECT_MARKS), ("PRESENTATION", PRESENTATION_MARKS))
+    ]
+    return [
+        ("create first evaluation", "post", f"/api/projects/{first}/evaluations",
+         {"evaluation_type": "PROJECT", "marks": PROJECT_MARKS}, 201, 12),
+        ("create second evaluation", "post", f"/api/projects/{first}/evaluations",
+         {"evaluation_type": "PRESENTATION", "marks": PRESENTATION_MARKS}, 201, 12),
+        (f"batch of {len(batch)} evaluations", "post", "/api/evaluations/batch",
+         {"evaluations": batch}, 201, BATCH_BUDGET),
+        # The first evaluation created above has id 1
+        ("update one mark comment", "patch", "/api/evaluations/1",
+         {"marks": [dict(PROJECT_MARKS[0], comments="Tidy"), *PROJECT_MARKS[1:]]}, 200, 9),
+        ("update one mark score", "patch", "/api/evaluations/1",
+         {"marks": [dict(PROJECT_MARKS[0], score=18, comments="Tidy"), *PROJECT_MARKS[1:]]}, 200, 11),
+    ]
+
+
+def seed(app):
+    with app.app_context():
+        db.create_all()
+        admin = User(name="Admin", email="admin@hit.ac.zw", role=UserRole.ADMIN)
+        admin.set_password("Admin123!")
+        student_user = User(name="Student", email="student@hit.ac.zw", role=UserRole.STUDENT)
+        student_user.set_password("Student123!")
+        program = StudyProgram(code="CS400", name="Computer Science")
+        db.session.add_all([admin, student_user, program])
+        db.session.flush()
+        student = Student(user_id=student_user.id, student_id="H230001A")
+        db.session.add_all([Admin(user_id=admin.id), student])
+        db.session.flush()
+        projects = [Project(
+            title=f"Query budget project {number}", description="d" * 60, level=ProjectLevel.LEVEL_400,
+            study_program_id=program.id, student_id=student.id,
+            status=ProjectStatus.SUBMITTED, submitted_at=datetime.utcnow()
+        ) for number in range(1 + BATCH_PROJECTS)]
+        db.session.add_all(projects)
+        db.session.commit()
+        return [project.id for project in projects]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["TESTING"] = True
+    project_ids = seed(app)
+
+    statements = []
+    request_thread = threading.get_ident()
+    with app.app_context():
+        for engine in db.engines.values():
+            @event.listens_for(engine, "before_cursor_execute")
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if threading.get_ident() == request_thread and not statement.lstrip().upper().startswith("PRAGMA"):
+                    statements.append(statement)
+
+    client = app.test_client()
+    response = client.post("/api/auth/login", json={"email": "admin@hit.ac.zw", "password": "Admin123!"})
+    headers = {"Authorization": "Bearer " + response.json["accessToken"]}
+
+    failures = 0
+    for label, method, url, body, expected_status, budget in cases(project_ids):
+        statements.clear()
+        response = getattr(client, method)(url, json=body, headers=headers)
+        count = len(statements)
+        ok = response.status_code == expected_status and count <= budget
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {count} statements (budget {budget}), status {response.status_code}")
+        if args.verbose or not ok:
+            for statement in statements:
+                print("       " + " ".join(statement.split())[:140])
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
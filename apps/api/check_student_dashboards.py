@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Check the materialized student dashboards against a live build.
+
+Every stored document in student_dashboards is rebuilt from the live
+tables and compared. Mismatches mean some write path changed dashboard
+data without going through the ORM flush that clears the stored copy.
+
+Usage:
+    python check_student_dashboards.py          # report mismatches (exit 1 if any)
+    python check_student_dashboards.py --fix    # also clear them so the next read rebuilds
+"""
+
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app import student_dashboards
+from app.routes.api import build_student_dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Clear mismatched documents")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        stored = db.session.query(student_dashboards.dashboards).filter(
+            student_dashboards.dashboards.c.document.isnot(None)
+        ).count()
+        stale = student_dashboards.find_stale(build_student_dashboard)
+        print(f"Checked {stored} stored dashboard(s): {len(stale)} out of date")
+        for user_id in stale:
+            print(f"   user {user_id}")
+
+        if stale and args.fix:
+            student_dashboards.invalidate(student_dashboards.dashboards.c.user_id.in_(stale))
+            db.session.commit()
+            print(f"Cleared {len(stale)} dashboard(s); they rebuild on next read")
+
+    sys.exit(1 if stale and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
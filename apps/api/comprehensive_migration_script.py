@@ -7,7 +7,8 @@ This script consolidates all database migration operations:
 1. Schema creation (if database doesn't exist)
 2. Column additions (for existing databases)
 3. Status enum migration
-4. Data validation
+4. Missing tables, columns and data from later releases (app/legacy_schema.py)
+5. Data validation
 
 Usage:
     python comprehensive_migration_script.py
@@ -21,6 +22,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
 from app.extensions import db
+from app.legacy_schema import upgrade_unmanaged
+from app.schema import schema_drift
 from app.models.models import (
     User, Student, Admin, StudyProgram, Project, Evaluation, 
     EvaluationMark, Deadline, Notification,
@@ -93,6 +96,21 @@ def migrate_schema(cursor, conn):
         if not check_column_exists(cursor, 'projects', 'documentation_link'):
             print("Adding documentation_link column to projects table...")
             cursor.execute("ALTER TABLE projects ADD COLUMN documentation_link VARCHAR(500)")
+        
+        if not check_column_exists(cursor, 'projects', 'is_late'):
+            print("Adding is_late and late_by_seconds columns to projects table...")
+            cursor.execute("ALTER TABLE projects ADD COLUMN is_late BOOLEAN NOT NULL DEFAULT 0")
+            cursor.execute("ALTER TABLE projects ADD COLUMN late_by_seconds INTEGER")
+            cursor.execute("""
+                UPDATE projects SET late_by_seconds = (
+                    SELECT CAST((julianday(projects.submitted_at) - julianday(d.deadline)) * 86400 AS INTEGER)
+                    FROM deadlines d
+                    WHERE d.level = projects.level AND projects.submitted_at > d.deadline
+                )
+            """)
+            cursor.execute("UPDATE projects SET is_late = (late_by_seconds IS NOT NULL)")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_projects_level_is_late ON projects (level, is_late)")
     else:
         print("Projects table does not exist. Please run Flask-Migrate first.")
         return False
@@ -201,12 +219,37 @@ def migrate_status_to_enum(cursor, conn):
     return True
 
 
+def migrate_to_models(cursor):
+    """
+    Create missing tables and apply the column and data changes that
+    db.create_all() cannot make to existing tables (the same upgrade boot.py
+    runs for databases not managed by Alembic).
+    """
+    print("\n" + "="*60)
+    print("STEP 3: Bringing tables up to the current models...")
+    print("="*60)
+    
+    if check_table_exists(cursor, 'alembic_version'):
+        print("Database is managed by Alembic. Run 'flask db upgrade' instead.")
+        return True
+    
+    upgrade_unmanaged()
+    drift = schema_drift(db.engine)
+    if drift:
+        for problem in drift:
+            print(f"  ✗ {problem}")
+        return False
+    
+    print("\n✓ Tables match the current models!")
+    return True
+
+
 def validate_database(cursor):
     """
     Validate database integrity and provide summary.
     """
     print("\n" + "="*60)
-    print("STEP 3: Validating database...")
+    print("STEP 4: Validating database...")
     print("="*60)
     
     tables = [
@@ -250,7 +293,7 @@ def validate_database(cursor):
         required_eval_cols = [
             'code_quality', 'documentation_score', 'functionality_score',
             'clarity_communication', 'visual_presentation', 'technical_explanation',
-            'total_project_marks', 'total_presentation_marks', 'overall_percentage', 'grade'
+            'total_project_marks', 'total_presentation_marks', 'overall_percentage', 'grade', 'version'
         ]
         for col in required_eval_cols:
             if check_column_exists(cursor, 'evaluations', col):
@@ -258,6 +301,13 @@ def validate_database(cursor):
             else:
                 print(f"  ✗ evaluations.{col}: Missing")
     
+    # Evaluation marks table
+    if check_table_exists(cursor, 'evaluation_marks'):
+        if check_column_exists(cursor, 'evaluation_marks', 'criterion_id'):
+            print(f"  ✓ evaluation_marks.criterion_id")
+        else:
+            print(f"  ✗ evaluation_marks.criterion_id: Missing")
+    
     print("\n✓ Database validation completed!")
 
 
@@ -313,7 +363,12 @@ def run_comprehensive_migration():
                 print("\n⚠ Status migration failed. Please check the errors above.")
                 return False
             
-            # Step 3: Validate database
+            # Step 3: Later releases' tables, columns and data
+            if not migrate_to_models(cursor):
+                print("\n⚠ Tables still differ from the models. Please check the errors above.")
+                return False
+            
+            # Step 4: Validate database
             validate_database(cursor)
             
             print("\n" + "="*60)
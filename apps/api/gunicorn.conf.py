@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for the API.
+
+Everything is driven by environment variables so the same file serves local
+production-like runs and containers:
+
+    API_HOST / API_PORT        bind address (default 0.0.0.0:5000)
+    API_WORKERS                worker processes (default 2 * CPUs + 1)
+    API_THREADS                threads per worker (default 4, gthread workers)
+    API_WORKER_CLASS           gunicorn worker class (default gthread)
+    API_PRELOAD                import the app once in the master before forking (default true)
+    API_TIMEOUT                worker timeout in seconds (default 60)
+    API_GRACEFUL_TIMEOUT       seconds workers get to finish on reload/stop (default 30)
+    API_MAX_REQUESTS           recycle workers after this many requests, 0 disables (default 1000)
+
+Send SIGHUP to the master for a graceful reload: new workers are started
+with the new config and old ones finish their in-flight requests. With
+API_PRELOAD on, the workers are forked from the app the master already
+imported, so a reload does not pick up code changes; restart the master
+for those (or set API_PRELOAD=false).
+"""
+
+import multiprocessing
+import os
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '5000')}"
+workers = int(os.getenv("API_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("API_THREADS", "4"))
+worker_class = os.getenv("API_WORKER_CLASS", "gthread")
+preload_app = _env_bool("API_PRELOAD", True)
+timeout = int(os.getenv("API_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("API_KEEPALIVE", "5"))
+max_requests = int(os.getenv("API_MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("API_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def post_fork(server, worker):
+    """
+    Drop database connections inherited from the master.
+
+    With preload_app the master imports the app (and may touch the database
+    while doing so); sharing those sockets or SQLite handles across processes
+    corrupts them. Each worker opens its own connections on first use.
+    """
+    from app.extensions import db
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    """Write out autosaved evaluation drafts still buffered in the worker (recycling, reload, stop)."""
+    from app.evaluation_drafts import draft_buffer
+
+    draft_buffer.flush()
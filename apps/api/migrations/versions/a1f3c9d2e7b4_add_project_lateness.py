@@ -0,0 +1,49 @@
+"""Add persisted submission lateness to projects
+
+Revision ID: a1f3c9d2e7b4
+Revises: comprehensive_001
+Create Date: 2026-10-19
+
+Adds projects.is_late and projects.late_by_seconds, an index on
+(level, is_late) for deadline compliance reports, and backfills both
+columns from submitted_at and the deadlines table.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c9d2e7b4'
+down_revision = 'comprehensive_001'
+branch_labels = None
+depends_on = None
+
+
+def _late_seconds_sql(dialect):
+    if dialect == 'sqlite':
+        return "CAST((julianday(projects.submitted_at) - julianday(d.deadline)) * 86400 AS INTEGER)"
+    return "CAST(EXTRACT(EPOCH FROM projects.submitted_at - d.deadline) AS INTEGER)"
+
+
+def upgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('is_late', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('late_by_seconds', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_projects_level_is_late', ['level', 'is_late'])
+
+    # Backfill from existing submissions
+    seconds = _late_seconds_sql(op.get_bind().dialect.name)
+    op.execute(f"""
+        UPDATE projects SET late_by_seconds = (
+            SELECT {seconds} FROM deadlines d
+            WHERE d.level = projects.level AND projects.submitted_at > d.deadline
+        )
+    """)
+    op.execute("UPDATE projects SET is_late = (late_by_seconds IS NOT NULL)")
+
+
+def downgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_index('ix_projects_level_is_late')
+        batch_op.drop_column('late_by_seconds')
+        batch_op.drop_column('is_late')
@@ -0,0 +1,54 @@
+"""Add grading_leases and a partial index for the grading queue
+
+Revision ID: a8d3e6f1c2b9
+Revises: f7c2a9e4b8d1
+Create Date: 2026-10-19
+
+grading_leases records which admin /api/grading/next handed each
+(project, evaluation type) to, and until when. ix_projects_grading_queue
+covers only projects waiting for grading, in submission order, so the
+queue scan stays small as evaluated projects accumulate.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e6f1c2b9'
+down_revision = 'f7c2a9e4b8d1'
+branch_labels = None
+depends_on = None
+
+QUEUE_WHERE = sa.text("status IN ('submitted', 'under_review')")
+
+
+def _evaluation_type():
+    # evaluations.evaluation_type already created the PostgreSQL type
+    return sa.Enum('PROJECT', 'PRESENTATION', name='evaluationtype').with_variant(
+        postgresql.ENUM('PROJECT', 'PRESENTATION', name='evaluationtype', create_type=False), 'postgresql'
+    )
+
+
+def upgrade():
+    op.create_table('grading_leases',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('evaluation_type', _evaluation_type(), nullable=False),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.Column('leased_until', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'evaluation_type')
+    )
+    op.create_index('ix_grading_leases_leased_until', 'grading_leases', ['leased_until'])
+    op.create_index(
+        'ix_projects_grading_queue', 'projects', ['submitted_at', 'id'],
+        sqlite_where=QUEUE_WHERE, postgresql_where=QUEUE_WHERE
+    )
+
+
+def downgrade():
+    op.drop_index('ix_projects_grading_queue', table_name='projects')
+    op.drop_index('ix_grading_leases_leased_until', table_name='grading_leases')
+    op.drop_table('grading_leases')
@@ -0,0 +1,44 @@
+"""Add evaluation_drafts for autosaved grading forms
+
+Revision ID: b4e7d2a9f6c3
+Revises: a8d3e6f1c2b9
+Create Date: 2026-10-19
+
+One row per (project, evaluation type, admin) holding the unsubmitted
+marks as JSON. Rows are written behind by app/evaluation_drafts.py and
+deleted when the evaluation is submitted.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e7d2a9f6c3'
+down_revision = 'a8d3e6f1c2b9'
+branch_labels = None
+depends_on = None
+
+
+def _evaluation_type():
+    # evaluations.evaluation_type already created the PostgreSQL type
+    return sa.Enum('PROJECT', 'PRESENTATION', name='evaluationtype').with_variant(
+        postgresql.ENUM('PROJECT', 'PRESENTATION', name='evaluationtype', create_type=False), 'postgresql'
+    )
+
+
+def upgrade():
+    op.create_table('evaluation_drafts',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('evaluation_type', _evaluation_type(), nullable=False),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.Column('document', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'evaluation_type', 'admin_id')
+    )
+
+
+def downgrade():
+    op.drop_table('evaluation_drafts')
@@ -0,0 +1,29 @@
+"""Add schema_state table for the startup schema fingerprint check
+
+Revision ID: c3e8f5a1b6d2
+Revises: b7d41e8c2a90
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8f5a1b6d2'
+down_revision = 'b7d41e8c2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('schema_state',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('schema_state')
@@ -0,0 +1,149 @@
+"""Add rubrics and criteria; evaluation marks reference criteria by id
+
+Revision ID: c6f1a3d8e2b5
+Revises: b4e7d2a9f6c3
+Create Date: 2026-10-19
+
+Seeds the project and presentation rubrics with the criteria of the
+former hard-coded evaluation templates. Every other criterion name found
+in evaluation_marks (compared trimmed and lowercased) becomes a
+non-template criterion of its evaluation type's rubric, with the
+evaluation column it counts towards worked out by the same keyword rules
+create_evaluation applied. evaluation_marks.criterion_name is then
+replaced by criterion_id.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1a3d8e2b5'
+down_revision = 'b4e7d2a9f6c3'
+branch_labels = None
+depends_on = None
+
+RUBRICS = [
+    ('project', 'Project Evaluation', 'Evaluation of project work: Code Quality, Documentation, and Functionality', 'PROJECT', [
+        ('Code Quality', 20, 'Code structure, organization, and adherence to best practices', 'code_quality'),
+        ('Documentation', 20, 'Completeness and clarity of documentation', 'documentation_score'),
+        ('Functionality', 30, 'How well the project meets functional requirements', 'functionality_score'),
+    ]),
+    ('presentation', 'Presentation Evaluation', 'Evaluation of presentation: Clarity & Communication, Visual Presentation, and Technical Explanation', 'PRESENTATION', [
+        ('Clarity & Communication', 10, 'Clear communication of ideas and concepts', 'clarity_communication'),
+        ('Visual Presentation', 10, 'Quality of visual materials and slides', 'visual_presentation'),
+        ('Technical Explanation', 10, 'Ability to explain technical aspects clearly', 'technical_explanation'),
+    ]),
+]
+
+
+def _evaluation_type():
+    # evaluations.evaluation_type already created the PostgreSQL type
+    return sa.Enum('PROJECT', 'PRESENTATION', name='evaluationtype').with_variant(
+        postgresql.ENUM('PROJECT', 'PRESENTATION', name='evaluationtype', create_type=False), 'postgresql'
+    )
+
+
+def upgrade():
+    op.create_table('rubrics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('evaluation_type', _evaluation_type(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key'),
+    sa.UniqueConstraint('evaluation_type')
+    )
+    op.create_table('criteria',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rubric_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('max_score', sa.Float(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('field', sa.String(length=50), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('in_template', sa.Boolean(), nullable=False, server_default=sa.false()),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['rubric_id'], ['rubrics.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('rubric_id', 'key', name='uq_criteria_rubric_key')
+    )
+
+    # Template rubrics and criteria
+    bind = op.get_bind()
+    for key, name, description, evaluation_type, criteria in RUBRICS:
+        bind.execute(sa.text("""
+            INSERT INTO rubrics (key, name, description, evaluation_type, created_at)
+            VALUES (:key, :name, :description, :evaluation_type, CURRENT_TIMESTAMP)
+        """), {'key': key, 'name': name, 'description': description, 'evaluation_type': evaluation_type})
+        for position, (criterion, max_score, criterion_description, field) in enumerate(criteria):
+            bind.execute(sa.text("""
+                INSERT INTO criteria (rubric_id, name, key, max_score, description, field, position, in_template, created_at)
+                SELECT id, :name, :key, :max_score, :description, :field, :position, :in_template, CURRENT_TIMESTAMP
+                FROM rubrics WHERE key = :rubric
+            """), {
+                'name': criterion, 'key': criterion.lower(), 'max_score': max_score, 'description': criterion_description,
+                'field': field, 'position': position, 'in_template': True, 'rubric': key
+            })
+
+    # Every other criterion name graders have used
+    bind.execute(sa.text("""
+        INSERT INTO criteria (rubric_id, name, key, in_template, created_at)
+        SELECT r.id, MIN(TRIM(m.criterion_name)), LOWER(TRIM(m.criterion_name)), :in_template, CURRENT_TIMESTAMP
+        FROM evaluation_marks m
+        JOIN evaluations e ON e.id = m.evaluation_id
+        JOIN rubrics r ON r.evaluation_type = e.evaluation_type
+        WHERE NOT EXISTS (
+            SELECT 1 FROM criteria c WHERE c.rubric_id = r.id AND c.key = LOWER(TRIM(m.criterion_name))
+        )
+        GROUP BY r.id, LOWER(TRIM(m.criterion_name))
+    """), {'in_template': False})
+    op.execute("""
+        UPDATE criteria SET field = CASE
+            WHEN rubric_id = (SELECT id FROM rubrics WHERE key = 'project') THEN CASE
+                WHEN key LIKE '%code quality%' THEN 'code_quality'
+                WHEN key LIKE '%documentation%' THEN 'documentation_score'
+                WHEN key LIKE '%functionality%' THEN 'functionality_score'
+            END
+            ELSE CASE
+                WHEN key LIKE '%clarity%' OR key LIKE '%communication%' THEN 'clarity_communication'
+                WHEN key LIKE '%visual%' OR key LIKE '%presentation%' THEN 'visual_presentation'
+                WHEN key LIKE '%technical%' OR key LIKE '%explanation%' THEN 'technical_explanation'
+            END
+        END
+        WHERE NOT in_template
+    """)
+
+    # Point marks at their criteria
+    op.add_column('evaluation_marks', sa.Column('criterion_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE evaluation_marks SET criterion_id = (
+            SELECT c.id FROM criteria c
+            JOIN rubrics r ON r.id = c.rubric_id
+            JOIN evaluations e ON e.evaluation_type = r.evaluation_type
+            WHERE e.id = evaluation_marks.evaluation_id
+              AND c.key = LOWER(TRIM(evaluation_marks.criterion_name))
+        )
+    """)
+    with op.batch_alter_table('evaluation_marks') as batch_op:
+        batch_op.alter_column('criterion_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_evaluation_marks_criterion_id', 'criteria', ['criterion_id'], ['id'])
+        batch_op.drop_column('criterion_name')
+
+
+def downgrade():
+    op.add_column('evaluation_marks', sa.Column('criterion_name', sa.String(length=100), nullable=True))
+    op.execute("""
+        UPDATE evaluation_marks SET criterion_name = (
+            SELECT name FROM criteria WHERE criteria.id = evaluation_marks.criterion_id
+        )
+    """)
+    with op.batch_alter_table('evaluation_marks') as batch_op:
+        batch_op.alter_column('criterion_name', existing_type=sa.String(length=100), nullable=False)
+        batch_op.drop_constraint('fk_evaluation_marks_criterion_id', type_='foreignkey')
+        batch_op.drop_column('criterion_id')
+    op.drop_table('criteria')
+    op.drop_table('rubrics')
@@ -0,0 +1,32 @@
+"""Add student_dashboards table for the materialized student dashboard
+
+Revision ID: d9f2a6c4e1b7
+Revises: c3e8f5a1b6d2
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f2a6c4e1b7'
+down_revision = 'c3e8f5a1b6d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_dashboards',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('document', sa.Text(), nullable=True),
+    sa.Column('etag', sa.String(length=40), nullable=True),
+    sa.Column('built_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('student_dashboards')
@@ -0,0 +1,73 @@
+"""Add project_status_events and backfill it from existing projects
+
+Revision ID: e5b8c1d7f3a9
+Revises: d9f2a6c4e1b7
+Create Date: 2026-10-19
+
+Status changes are recorded by update_project_status from now on. Existing
+projects get the events their timelines were derived from before:
+submitted at submitted_at, under review at the first evaluation, evaluated
+once both evaluation types exist (at the later one), and rejected at the
+project's last update. Approvals (pending_approval -> draft) left no
+timestamp and are not backfilled.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c1d7f3a9'
+down_revision = 'd9f2a6c4e1b7'
+branch_labels = None
+depends_on = None
+
+STATUSES = ('pending_approval', 'draft', 'submitted', 'under_review', 'evaluated', 'rejected')
+
+
+def _status_type():
+    # projects.status already created the PostgreSQL type
+    return sa.Enum(*STATUSES, name='projectstatus').with_variant(
+        postgresql.ENUM(*STATUSES, name='projectstatus', create_type=False), 'postgresql'
+    )
+
+
+def upgrade():
+    op.create_table('project_status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', _status_type(), nullable=True),
+    sa.Column('to_status', _status_type(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_project_status_events_project_created', 'project_status_events', ['project_id', 'created_at'])
+
+    # Backfill from existing submissions and evaluations
+    op.execute("""
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT id, 'draft', 'submitted', submitted_at FROM projects
+        WHERE submitted_at IS NOT NULL
+    """)
+    op.execute("""
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT project_id, 'submitted', 'under_review', MIN(created_at) FROM evaluations
+        GROUP BY project_id
+    """)
+    op.execute("""
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT project_id, 'under_review', 'evaluated', MAX(created_at) FROM evaluations
+        GROUP BY project_id
+        HAVING COUNT(DISTINCT evaluation_type) = 2
+    """)
+    op.execute("""
+        INSERT INTO project_status_events (project_id, from_status, to_status, created_at)
+        SELECT id, NULL, 'rejected', COALESCE(updated_at, created_at) FROM projects
+        WHERE status = 'rejected'
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_project_status_events_project_created', table_name='project_status_events')
+    op.drop_table('project_status_events')
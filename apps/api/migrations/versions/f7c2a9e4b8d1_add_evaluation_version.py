@@ -0,0 +1,29 @@
+"""Add a row version to evaluations for optimistic concurrency
+
+Revision ID: f7c2a9e4b8d1
+Revises: e5b8c1d7f3a9
+Create Date: 2026-10-19
+
+evaluations.version is the mapper's version_id_col: every UPDATE checks
+and bumps it, and PATCH /api/evaluations/<id> compares it with the
+client's If-Match header. Existing rows start at version 1.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c2a9e4b8d1'
+down_revision = 'e5b8c1d7f3a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('evaluations') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('evaluations') as batch_op:
+        batch_op.drop_column('version')
@@ -13,8 +13,9 @@ from app.extensions import db
 from app.models.models import User, UserRole, StudyProgram, Project, ProjectLevel, Student, Admin, Deadline, ProjectStatus
 from datetime import datetime, timedelta
 
-def seed_database():
-    app = create_app()
+def seed_database(app=None):
+    # boot.py passes the app it already created, avoiding a second app initialization
+    app = app or create_app()
     
     with app.app_context():
         # Create tables
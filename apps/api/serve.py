@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Start the API server.
+
+APP_SERVER selects the server:
+    gunicorn  pre-fork Gunicorn using gunicorn.conf.py (default when FLASK_ENV=production)
+    dev       Werkzeug development server (default otherwise)
+"""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(app=None):
+    """Start the selected server. The dev server reuses ``app`` when the caller already built one."""
+    server = os.getenv("APP_SERVER") or ("gunicorn" if os.getenv("FLASK_ENV") == "production" else "dev")
+
+    if server == "gunicorn":
+        config_path = os.path.join(BASE_DIR, "gunicorn.conf.py")
+        # exec so Gunicorn becomes PID 1 in containers and receives signals (SIGHUP reload, SIGTERM stop)
+        os.execvp("gunicorn", ["gunicorn", "--config", config_path, "--chdir", BASE_DIR, "wsgi:app"])
+
+    if server != "dev":
+        print(f"Unknown APP_SERVER '{server}'. Use 'gunicorn' or 'dev'.", file=sys.stderr)
+        sys.exit(2)
+
+    if app is None:
+        sys.path.insert(0, BASE_DIR)
+        from wsgi import app
+
+    app.run(
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "5000")),
+        debug=os.getenv("FLASK_DEBUG", "False").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main()
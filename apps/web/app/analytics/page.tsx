@@ -1,7 +1,7 @@
 'use client'
 
 import React, { useState } from 'react'
-import { useAnalyticsAverages, useAnalyticsCompletionRate, useAnalyticsPerformanceByStudyProgram, useAnalyticsPipeline, useAnalyticsTopProjects } from '../../lib/hooks'
+import { useAnalyticsDashboard } from '../../lib/hooks'
 import { useThemeStore } from '../../lib/stores'
 import {
   Chart as ChartJS,
@@ -30,19 +30,16 @@ export default function AnalyticsPage() {
   const [timeRange, setTimeRange] = useState('current')
   const { isDarkMode } = useThemeStore()
   
-  const averagesQuery = useAnalyticsAverages(selectedLevel)
-  const completionRateQuery = useAnalyticsCompletionRate(selectedLevel)
-  const performanceQuery = useAnalyticsPerformanceByStudyProgram(selectedLevel)
-  const pipelineQuery = useAnalyticsPipeline(selectedLevel)
-  const topProjectsQuery = useAnalyticsTopProjects(selectedLevel)
+  const dashboardQuery = useAnalyticsDashboard(selectedLevel)
   
-  const averages = averagesQuery.data
-  const completionRate = completionRateQuery.data
-  const performanceByStudyProgram = performanceQuery.data || []
-  const pipeline = pipelineQuery.data || []
-  const topProjects = topProjectsQuery.data || []
-  const isLoading = averagesQuery.isLoading || completionRateQuery.isLoading || performanceQuery.isLoading || pipelineQuery.isLoading || topProjectsQuery.isLoading
-  const error = averagesQuery.error || completionRateQuery.error || performanceQuery.error || pipelineQuery.error || topProjectsQuery.error
+  const dashboard = dashboardQuery.data
+  const averages = dashboard?.averages
+  const completionRate = dashboard?.completion_rate
+  const performanceByStudyProgram = dashboard?.performance_by_study_program || []
+  const pipeline = dashboard?.pipeline || []
+  const topProjects = dashboard?.top_projects || []
+  const isLoading = dashboardQuery.isLoading
+  const error = dashboardQuery.error
 
   if (error) {
     return (
@@ -204,6 +204,7 @@ export default function ProjectDetailPage() {
         await updateEvaluationMutation.mutateAsync({
           evaluationId: editingEvaluation.id,
           projectId: projectId, // Pass projectId explicitly
+          version: editingEvaluation.version,
           data: {
             comments: pendingAction.comments || '',
             marks: formattedMarks,
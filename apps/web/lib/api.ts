@@ -220,6 +220,17 @@ export const evaluationsAPI = {
     return response.data
   },
 
+  // Many evaluations in one transaction; nothing is saved if any entry is invalid
+  createBatch: async (evaluations: Array<{
+    project_id: number
+    evaluation_type: 'PROJECT' | 'PRESENTATION'
+    marks: any[]
+    comments?: string
+  }>) => {
+    const response = await apiClient.post('/evaluations/batch', { evaluations })
+    return response.data
+  },
+
   getTemplates: async () => {
     const response = await apiClient.get('/evaluation-templates')
     return response.data
@@ -230,8 +241,11 @@ export const evaluationsAPI = {
     return response.data
   },
 
-  update: async (id: number, evaluationData: any) => {
-    const response = await apiClient.patch(`/evaluations/${id}`, evaluationData)
+  // Pass the version being edited; the API answers 409 if another grader saved first
+  update: async (id: number, evaluationData: any, version?: number) => {
+    const response = await apiClient.patch(`/evaluations/${id}`, evaluationData, {
+      headers: version !== undefined ? { 'If-Match': `"${version}"` } : undefined,
+    })
     return response.data
   },
 
@@ -241,6 +255,39 @@ export const evaluationsAPI = {
   }
 }
 
+// Grading queue: projects are leased to one admin at a time
+export const gradingAPI = {
+  next: async (type: 'PROJECT' | 'PRESENTATION', n: number = 1) => {
+    const response = await apiClient.get('/grading/next', { params: { type, n } })
+    return response.data
+  },
+
+  release: async (projectId: number, type: 'PROJECT' | 'PRESENTATION') => {
+    const response = await apiClient.delete(`/grading/leases/${projectId}`, { params: { type } })
+    return response.data
+  },
+
+  // Autosaved marks; saves are merged by criterion_name unless replace is set
+  getDraft: async (projectId: number, type: 'PROJECT' | 'PRESENTATION') => {
+    const response = await apiClient.get(`/grading/drafts/${projectId}`, { params: { type } })
+    return response.data
+  },
+
+  saveDraft: async (projectId: number, type: 'PROJECT' | 'PRESENTATION', draft: {
+    marks: Array<{ criterion_name: string; score?: number | null; max_score?: number | null; comments?: string | null }>
+    comments?: string
+    replace?: boolean
+  }) => {
+    const response = await apiClient.put(`/grading/drafts/${projectId}`, draft, { params: { type } })
+    return response.data
+  },
+
+  discardDraft: async (projectId: number, type: 'PROJECT' | 'PRESENTATION') => {
+    const response = await apiClient.delete(`/grading/drafts/${projectId}`, { params: { type } })
+    return response.data
+  }
+}
+
 export const studyProgramsAPI = {
   getAll: async () => {
     const response = await apiClient.get('/study-programs')
@@ -321,6 +368,30 @@ export const analyticsAPI = {
     return response.data
   },
 
+  // All five sections above in one response
+  getDashboard: async (level?: number) => {
+    const response = await apiClient.get('/analytics/dashboard', {
+      params: level ? { level } : {}
+    })
+    return response.data
+  },
+
+  // Time-in-stage percentiles and grading throughput per evaluator
+  getThroughput: async (level?: number) => {
+    const response = await apiClient.get('/analytics/throughput', {
+      params: level ? { level } : {}
+    })
+    return response.data
+  },
+
+  // Score distribution per rubric criterion per study program and level
+  getCriteria: async (level?: number) => {
+    const response = await apiClient.get('/analytics/criteria', {
+      params: level ? { level } : {}
+    })
+    return response.data
+  },
+
   // Deadline Management
   getDeadlines: async () => {
     const response = await apiClient.get('/deadlines')
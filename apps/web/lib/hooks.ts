@@ -253,6 +253,14 @@ export const useAnalyticsTopProjects = (level?: number) => {
   })
 }
 
+export const useAnalyticsDashboard = (level?: number) => {
+  return useQuery({
+    queryKey: [QUERY_KEYS.ANALYTICS, 'dashboard', level],
+    queryFn: () => analyticsAPI.getDashboard(level),
+    staleTime: 10 * 60 * 1000, // 10 minutes
+  })
+}
+
 // Reports Hooks
 export const useReportSummary = (params?: { level?: number; start_date?: string; end_date?: string }) => {
   return useQuery({
@@ -311,8 +319,8 @@ export const useUpdateEvaluation = () => {
   const queryClient = useQueryClient()
 
   return useMutation({
-    mutationFn: ({ evaluationId, data, projectId }: { evaluationId: number; data: any; projectId: number }) =>
-      evaluationsAPI.update(evaluationId, data),
+    mutationFn: ({ evaluationId, data, projectId, version }: { evaluationId: number; data: any; projectId: number; version?: number }) =>
+      evaluationsAPI.update(evaluationId, data, version),
     onSuccess: (_, variables) => {
       const { projectId, evaluationId } = variables
 